@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Scaling benchmark for convert_many() and decode_many() across worker counts.
+
+Usage: python benchmarks/bench_bulk.py [messages]
+"""
+
+import random
+import sys
+import time
+
+import corpus
+import takproto
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = random.Random(0)
+    docs = [corpus.sa_xml(rng, i) for i in range(count)]
+    frames = list(takproto.convert_many(docs))
+
+    print(f"{count} messages")
+    print(f"{'workers':>7} {'convert msgs/sec':>17} {'decode msgs/sec':>16}")
+    for workers in (1, 2, 4, 8):
+        start = time.perf_counter()
+        for _ in takproto.convert_many(docs, workers=workers):
+            pass
+        convert = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in takproto.decode_many(frames, takproto.proto2xml, workers=workers):
+            pass
+        decode = time.perf_counter() - start
+
+        print(f"{workers:>7} {count / convert:>17.0f} {count / decode:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
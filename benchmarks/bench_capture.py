@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Benchmark for archiving & replaying frames: capture files against pickle.
+
+Writes and reads back the same Mesh frames as a takproto capture and as a
+pickled list of TakMessage objects, and prints the time of each step and the
+file sizes. Then indexes the capture, and times a UID & time range query with
+CaptureIndex against a full scan of the capture.
+
+Usage: python benchmarks/bench_capture.py [frames]
+"""
+
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+import corpus
+import takproto
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+def timed(label: str, count: int, func) -> None:
+    """Run func once and print its time per frame."""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<36} {elapsed * 1e3:>9.1f} ms {elapsed / count * 1e6:>8.2f} us/frame"
+    )
+
+
+def timed_query(label: str, func) -> None:
+    """Run func once and print its time and how many records it returned."""
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<36} {elapsed * 1e3:>9.2f} ms {count:>8} records")
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    docs = corpus.build(count)
+    xmls = [xml for kind in docs.values() for xml in kind][:count]
+    frames = [bytes(takproto.xml2proto(xml)) for xml in xmls]
+    msgs = [takproto.parse_proto(frame) for frame in frames]
+    print(f"{len(frames)} frames, protobuf backend {takproto.backend()}")
+    # The generated classes name their module takmessage_pb2, not its full name,
+    # which pickle has to be able to import.
+    for name in takproto.proto.MESSAGES:
+        module = f"{name.lower()}_pb2"
+        sys.modules.setdefault(module, getattr(takproto.proto, module))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        capture_path = os.path.join(tmp, "bench.takcap")
+        pickle_path = os.path.join(tmp, "bench.pickle")
+
+        def write_capture():
+            with takproto.CaptureWriter(capture_path) as writer:
+                for frame in frames:
+                    writer.write(frame, "192.168.1.10:6969")
+
+        def write_pickle():
+            with open(pickle_path, "wb") as out:
+                pickle.dump(msgs, out, pickle.HIGHEST_PROTOCOL)
+
+        def iterate_capture():
+            with takproto.CaptureReader(capture_path) as reader:
+                for _ in reader:
+                    pass
+
+        def parse_capture():
+            with takproto.CaptureReader(capture_path) as reader:
+                for record in reader:
+                    record.message.cotEvent.uid  # pylint: disable=pointless-statement
+
+        def load_pickle():
+            with open(pickle_path, "rb") as pickled:
+                for msg in pickle.load(pickled):
+                    msg.cotEvent.uid  # pylint: disable=pointless-statement
+
+        timed("CaptureWriter.write", len(frames), write_capture)
+        timed("pickle.dump TakMessage list", len(frames), write_pickle)
+        timed("CaptureReader iterate", len(frames), iterate_capture)
+        timed("CaptureReader iterate + parse", len(frames), parse_capture)
+        timed("pickle.load TakMessage list", len(frames), load_pickle)
+        print(f"{'capture file':<36} {os.path.getsize(capture_path):>12} bytes")
+        print(f"{'pickle file':<36} {os.path.getsize(pickle_path):>12} bytes")
+
+        indexed_path = os.path.join(tmp, "indexed.takcap")
+
+        def write_indexed():
+            with takproto.CaptureWriter(indexed_path, index=True) as writer:
+                for frame in frames:
+                    writer.write(frame, "192.168.1.10:6969")
+
+        timed("CaptureWriter.write, indexed", len(frames), write_indexed)
+        timed(
+            "build_index",
+            len(frames),
+            lambda: takproto.build_index(capture_path),
+        )
+        index_size = os.path.getsize(capture_path + takproto.constants.INDEX_SUFFIX)
+        print(f"{'index file':<36} {index_size:>12} bytes")
+
+        # Every event of one UID in a ten minute window.
+        start = corpus.EPOCH_MS + 1_200_000
+        end = start + 600_000
+        uid = next(
+            msg.cotEvent.uid
+            for msg in msgs
+            if start <= msg.cotEvent.sendTime < end and msg.cotEvent.uid
+        )
+
+        def scan_query():
+            count = 0
+            with takproto.CaptureReader(capture_path) as reader:
+                for _, msg in reader.messages():
+                    event = msg.cotEvent
+                    if event.uid == uid and start <= event.sendTime < end:
+                        count += 1
+            return count
+
+        def index_query():
+            with takproto.CaptureIndex(capture_path) as index:
+                return sum(1 for _ in index.messages(uid, start=start, end=end))
+
+        def type_query():
+            with takproto.CaptureIndex(capture_path) as index:
+                return sum(1 for _ in index.messages(type="a-f", start=start, end=end))
+
+        timed_query("uid & time query, full scan", scan_query)
+        timed_query("uid & time query, CaptureIndex", index_query)
+        timed_query("type & time query, CaptureIndex", type_query)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Allocation benchmark for the TAK Protocol Version 1 decode path.
+
+Measures the Python heap allocated while decoding a Mesh and a Stream message
+with a large xmlDetail payload. The protobuf runtime allocates its own arena
+outside of tracemalloc, so the figures reported are the buffer copies made by
+takproto itself. The pre-memoryview implementation is included for comparison;
+it needs delimited-protobuf, which takproto itself no longer depends on, and
+which is installed with requirements_test.txt.
+
+Usage: python benchmarks/bench_decode.py
+"""
+
+import tracemalloc
+
+from io import BytesIO
+
+import delimited_protobuf as dpb
+
+import takproto
+
+from takproto.proto import TakMessage
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+def copying_parse_mesh(msg):
+    """Decode a Mesh message the way takproto 2.0.0 did."""
+    msg = msg[3:]
+    protobuf = TakMessage()
+    protobuf.ParseFromString(bytes(msg))
+    return protobuf
+
+
+def copying_parse_stream(msg):
+    """Decode a Stream message the way takproto 2.0.0 did."""
+    bio = BytesIO(msg[1:])
+    return dpb.read(bio, TakMessage)
+
+
+def make_message(detail_size: int) -> TakMessage:
+    """Build a TakMessage with an xmlDetail of roughly detail_size bytes."""
+    msg = TakMessage()
+    msg.cotEvent.type = "u-d-f"
+    msg.cotEvent.uid = "bench-decode"
+    msg.cotEvent.detail.xmlDetail = "<shape>" + "x" * detail_size + "</shape>"
+    return msg
+
+
+def peak_allocated(func, buf) -> int:
+    """Return the peak Python heap allocation in bytes while func(buf) runs."""
+    func(buf)  # warm up caches so only per-call allocations are counted.
+    tracemalloc.start()
+    func(buf)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    msg = make_message(1024 * 1024)
+    mesh = bytearray(takproto.msg2proto(msg, takproto.TAKProtoVer.MESH))
+    stream = bytearray(takproto.msg2proto(msg, takproto.TAKProtoVer.STREAM))
+
+    cases = [
+        ("parse_mesh (2.0.0)", copying_parse_mesh, mesh),
+        ("parse_mesh", takproto.parse_mesh, mesh),
+        ("parse_stream (2.0.0)", copying_parse_stream, stream),
+        ("parse_stream", takproto.parse_stream, stream),
+    ]
+
+    print(f"payload: {len(mesh)} bytes")
+    print(f"{'path':<24} {'peak bytes':>12} {'copies':>8}")
+    for name, func, buf in cases:
+        peak = peak_allocated(func, buf)
+        print(f"{name:<24} {peak:>12} {peak / len(buf):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Import time benchmark for takproto and the first use of its functions.
+
+Runs each statement in a fresh interpreter under `python -X importtime` and
+reports the median total of the imports it triggers, excluding interpreter
+startup, with the protobuf backend in use.
+
+Usage: python benchmarks/bench_import.py [runs]
+"""
+
+import statistics
+import subprocess
+import sys
+
+import takproto
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+STATEMENTS = (
+    "import takproto",
+    "import takproto; takproto.parse_proto",
+    "import takproto; takproto.xml2proto",
+    "import takproto; takproto.StreamDecoder",
+    "import takproto; takproto.open_stream",
+    "import takproto; takproto.ColumnEncoder",
+    "import takproto.proto; takproto.proto.TakMessage",
+)
+
+
+def import_time(statement: str) -> float:
+    """Return the milliseconds spent importing modules to run statement."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    total = 0
+    started = False
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not started:
+            # Everything up to site is interpreter startup.
+            started = name.strip() == "site"
+            continue
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return total / 1000
+
+
+def main() -> None:
+    """Time each statement runs times and print a table of the medians."""
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"protobuf backend: {takproto.backend()}")
+    print(f"{'statement':<50} {'import ms':>9}")
+    for statement in STATEMENTS:
+        median = statistics.median(import_time(statement) for _ in range(runs))
+        print(f"{statement:<50} {median:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
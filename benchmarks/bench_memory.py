@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Memory benchmark for holding many decoded CoT events in memory.
+
+Compares the resident memory per event of a list of TakMessage objects with
+EventRecord, EncodedEvent and raw Mesh frames, holding the last ten reports of
+each entity. The protobuf backends allocate
+messages outside the Python heap, so each store is built in a fresh process and
+measured by its growth in resident memory, as reported by Linux.
+
+Usage: python benchmarks/bench_memory.py [events]
+"""
+
+import os
+import subprocess
+import sys
+
+import corpus
+import takproto
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+STORES = {
+    "TakMessage": takproto.parse_proto,
+    "EventRecord": takproto.EventRecord.from_frame,
+    "EventRecord, DetailPool": lambda frame, pool=takproto.DetailPool(): (
+        takproto.EventRecord.from_frame(frame, pool)
+    ),
+    "EncodedEvent": takproto.EncodedEvent.from_frame,
+    "Mesh frame bytes": bytes,
+}
+
+
+def rss() -> int:
+    """Return the resident memory of this process in bytes."""
+    with open("/proc/self/statm", encoding="ascii") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def measure(store: str, count: int) -> int:
+    """Return the bytes of resident memory per event of count events as store."""
+    # The last ten reports of count / 10 entities, which move between reports.
+    msgs = [takproto.xml2msg(xml) for xml in corpus.build(1000)["sa"]]
+    frames = []
+    for report in range(10):
+        for i in range(count // 10):
+            msg = msgs[i % len(msgs)]
+            msg.cotEvent.uid = f"{msg.cotEvent.type}-{i:08d}"
+            msg.cotEvent.sendTime += 1000
+            msg.cotEvent.lat += 0.0001 * report
+            frames.append(takproto.msg2proto(msg))
+    convert = STORES[store]
+    before = rss()
+    events = [convert(frame) for frame in frames]
+    return (rss() - before) // len(events)
+
+
+def main() -> None:
+    """Measure each store in a subprocess and print a table of results."""
+    if len(sys.argv) > 2 and sys.argv[1] == "--store":
+        print(measure(sys.argv[2], int(sys.argv[3])))
+        return
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"{count} events")
+    print(f"{'store':<26} {'bytes/event':>11}")
+    for store in STORES:
+        result = subprocess.run(
+            [sys.executable, __file__, "--store", store, str(count)],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        print(f"{store:<26} {int(result.stdout):>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Throughput benchmark for converting between CoT XML and TakMessage.
+
+Times xml2msg() and proto2xml() on the same SA event from corpus.py, plus the full
+XML -> TakMessage -> XML round trip, and prints messages per second.
+
+Usage: python benchmarks/bench_proto2xml.py [iterations]
+"""
+
+import random
+import sys
+import timeit
+
+import corpus
+import takproto
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+SA_XML = corpus.sa_xml(random.Random(0), 0)
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    msg = takproto.xml2msg(SA_XML)
+    cases = [
+        ("xml2msg", lambda: takproto.xml2msg(SA_XML)),
+        ("xml2proto", lambda: takproto.xml2proto(SA_XML)),
+        ("proto2xml", lambda: takproto.proto2xml(msg)),
+        ("round trip", lambda: takproto.proto2xml(takproto.xml2msg(SA_XML))),
+    ]
+
+    print(f"{'path':<12} {'msgs/sec':>12} {'usec/msg':>10}")
+    for name, func in cases:
+        elapsed = min(timeit.repeat(func, number=number, repeat=3))
+        print(f"{name:<12} {number / elapsed:>12.0f} {elapsed / number * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
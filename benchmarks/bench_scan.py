@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Benchmark scan_event() against a full TakMessage parse.
+
+Each path reads uid, type, lat, lon & staleTime from a Mesh frame: an SA event,
+and a drawn shape whose xmlDetail holds a few hundred vertices. scan_event()
+picks the faster of the other two for the protobuf backend in use. Run it with
+PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION=python to compare against the pure Python
+protobuf backend.
+
+Usage: python benchmarks/bench_scan.py [iterations]
+"""
+
+import random
+import sys
+import timeit
+
+from google.protobuf.internal import api_implementation
+
+import corpus
+import takproto
+
+from takproto.constants import DEFAULT_SCAN_FIELDS
+from takproto.proto import TakMessage
+from takproto.wire import _scan_event
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+def shape_frame(vertices: int) -> bytes:
+    """Return a Mesh frame for a polygon with the given number of vertices."""
+    msg = TakMessage()
+    event = msg.cotEvent
+    event.type = "u-d-f"
+    event.uid = "b7b5d2a4-6b4d-4b4e-9d3c-shape"
+    event.how = "h-e"
+    event.sendTime = event.startTime = 1581185444000
+    event.staleTime = 1581271844000
+    event.lat, event.lon = 43.97957317, -66.07737696
+    event.detail.xmlDetail = (
+        "".join(
+            f"<link point='{43.9 + i * 1e-4:.7f},{-66.0 - i * 1e-4:.7f}'/>"
+            for i in range(vertices)
+        )
+        + "<strokeColor value='-1'/><labels_on value='false'/>"
+    )
+    return bytes(takproto.msg2proto(msg))
+
+
+def full_parse(frame):
+    """Read the routing fields with a full parse, into a dict as scan_event() does."""
+    event = takproto.parse_proto(frame).cotEvent
+    return {name: getattr(event, name) for name in DEFAULT_SCAN_FIELDS}
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    frames = [
+        ("SA", bytes(takproto.xml2proto(corpus.sa_xml(random.Random(0), 0)))),
+        ("shape", shape_frame(500)),
+    ]
+
+    print(f"protobuf backend: {api_implementation.Type()}")
+    print(
+        f"{'message':<8} {'bytes':>7} {'parse usec':>11} {'wire usec':>10} "
+        f"{'scan_event usec':>16}"
+    )
+    for name, frame in frames:
+        parse = min(timeit.repeat(lambda: full_parse(frame), number=number, repeat=3))
+        wire = min(
+            timeit.repeat(
+                lambda: _scan_event(frame, DEFAULT_SCAN_FIELDS),
+                number=number,
+                repeat=3,
+            )
+        )
+        scan = min(
+            timeit.repeat(lambda: takproto.scan_event(frame), number=number, repeat=3)
+        )
+        print(
+            f"{name:<8} {len(frame):>7} {parse / number * 1e6:>11.2f} "
+            f"{wire / number * 1e6:>10.2f} {scan / number * 1e6:>16.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
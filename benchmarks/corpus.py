@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Generated corpus of realistic CoT messages for the takproto benchmarks.
+
+Every generator is seeded, so a corpus is identical across runs and commits.
+"""
+
+import random
+
+from typing import Dict, List
+
+import takproto
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+EPOCH_MS = 1581185444000
+# The positional arguments of takproto.encode_cot_event(), as CotEvent fields.
+EVENT_FIELDS = (
+    "uid",
+    "type",
+    "how",
+    "sendTime",
+    "startTime",
+    "staleTime",
+    "lat",
+    "lon",
+    "hae",
+    "ce",
+    "le",
+)
+
+PLATFORMS = (
+    ("ATAK-CIV", "SAMSUNG SM-G998U", "30", "4.8.1.5 (e3d6f9b0).1675269441-CIV"),
+    ("WinTAK-CIV", "LENOVO 20QV0007US", "Microsoft Windows 10 Home", "1.10.0.137"),
+    ("iTAK", "APPLE IPHONE", "16.3", "2.5.1.662"),
+)
+TEAMS = ("Cyan", "Yellow", "Magenta", "Red", "Blue", "Green")
+ROLES = ("Team Member", "Team Lead", "HQ", "Sniper", "Medic", "RTO")
+
+
+def _times(rng: random.Random) -> Dict[str, str]:
+    time = EPOCH_MS + rng.randrange(0, 3_600_000, 250)
+    return {
+        "time": takproto.ms2iso(time),
+        "start": takproto.ms2iso(time),
+        "stale": takproto.ms2iso(time + 120_000),
+    }
+
+
+def sa_xml(rng: random.Random, index: int) -> str:
+    """Return a Situational Awareness (SA) event like those sent by TAK clients."""
+    platform, device, os_version, version = rng.choice(PLATFORMS)
+    return (
+        "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>"
+        f"<event version='2.0' uid='ANDROID-{index:016x}' type='a-f-G-U-C' "
+        "time='{time}' start='{start}' stale='{stale}' how='m-g'>"
+        f"<point lat='{rng.uniform(-80, 80):.8f}' lon='{rng.uniform(-180, 180):.8f}' "
+        f"hae='{rng.uniform(0, 2000):.3f}' ce='{rng.uniform(3, 30):.1f}' le='9999999.0'/>"
+        "<detail>"
+        f"<takv os='{os_version}' version='{version}' device='{device}' "
+        f"platform='{platform}'/>"
+        f"<contact endpoint='*:-1:stcp' callsign='UNIT-{index}'/>"
+        f"<uid Droid='UNIT-{index}'/>"
+        f"<precisionlocation altsrc='GPS' geopointsrc='GPS'/>"
+        f"<__group role='{rng.choice(ROLES)}' name='{rng.choice(TEAMS)}'/>"
+        f"<status battery='{rng.randint(5, 100)}'/>"
+        f"<track course='{rng.uniform(0, 360):.8f}' speed='{rng.uniform(0, 30):.8f}'/>"
+        "</detail></event>"
+    ).format(**_times(rng))
+
+
+def geochat_xml(rng: random.Random, index: int) -> str:
+    """Return an All Chat Rooms GeoChat message."""
+    sender = f"ANDROID-{index:016x}"
+    message_id = f"{rng.getrandbits(64):016x}"
+    text = " ".join(
+        rng.choice(("move", "to", "rally", "point", "ack", "hold", "north"))
+        for _ in range(rng.randint(3, 20))
+    )
+    return (
+        "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>"
+        f"<event version='2.0' uid='GeoChat.{sender}.All Chat Rooms.{message_id}' "
+        "type='b-t-f' time='{time}' start='{start}' stale='{stale}' how='h-g-i-g-o'>"
+        "<point lat='0.0' lon='0.0' hae='9999999.0' ce='9999999.0' le='9999999.0'/>"
+        "<detail>"
+        "<__chat parent='RootContactGroup' groupOwner='false' "
+        "messageId='{message_id}' chatroom='All Chat Rooms' id='All Chat Rooms' "
+        f"senderCallsign='UNIT-{index}'><chatgrp uid0='{sender}' "
+        "uid1='All Chat Rooms' id='All Chat Rooms'/></__chat>"
+        f"<link uid='{sender}' type='a-f-G-U-C' relation='p-p'/>"
+        f"<remarks source='BAO.F.ATAK.{sender}' to='All Chat Rooms' "
+        "time='{time}'>{text}</remarks>"
+        "</detail></event>"
+    ).format(message_id=message_id, text=text, **_times(rng))
+
+
+def marker_xml(rng: random.Random, index: int, vertices: int = 200) -> str:
+    """Return a drawn polygon with a large xmlDetail of vertex links."""
+    lat, lon = rng.uniform(-80, 80), rng.uniform(-180, 180)
+    links = "".join(
+        f"<link point='{lat + rng.uniform(-0.01, 0.01):.7f},"
+        f"{lon + rng.uniform(-0.01, 0.01):.7f}'/>"
+        for _ in range(vertices)
+    )
+    return (
+        "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>"
+        f"<event version='2.0' uid='shape-{index:08d}' type='u-d-f' "
+        "time='{time}' start='{start}' stale='{stale}' how='h-e'>"
+        f"<point lat='{lat:.7f}' lon='{lon:.7f}' hae='9999999.0' ce='9999999.0' "
+        "le='9999999.0'/><detail>"
+        f"{links}<strokeColor value='-1'/><strokeWeight value='4.0'/>"
+        "<fillColor value='-1761607681'/><contact callsign='Shape 1'/>"
+        "<remarks/><archive/><labels_on value='false'/>"
+        "</detail></event>"
+    ).format(**_times(rng))
+
+
+def build(count: int = 1000, seed: int = 0) -> Dict[str, List[str]]:
+    """Return count XML documents of each kind: sa, geochat & marker."""
+    rng = random.Random(seed)
+    return {
+        "sa": [sa_xml(rng, i) for i in range(count)],
+        "geochat": [geochat_xml(rng, i) for i in range(count)],
+        "marker": [marker_xml(rng, i) for i in range(max(count // 10, 1))],
+    }
+
+
+def fragment(data: bytes, rng: random.Random, max_read: int = 1500) -> List[bytes]:
+    """Split data into reads of random size, as a TCP socket would return it."""
+    reads = []
+    pos = 0
+    while pos < len(data):
+        size = rng.randint(1, max_read)
+        reads.append(data[pos : pos + size])
+        pos += size
+    return reads
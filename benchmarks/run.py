@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Benchmark suite for the takproto encode & decode paths.
+
+Runs every path in takproto.functions, plus the stream decoder, batch encoder
+and wire scanner, over a generated corpus (see corpus.py) and reports
+messages/sec, bytes/sec, p50/p99 latency per call and peak Python heap
+allocation per message. Results can be written as JSON and compared with an
+earlier run.
+
+Usage:
+    python benchmarks/run.py [-n COUNT] [-k FILTER] [-o results.json]
+                             [--compare baseline.json]
+"""
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from typing import Any, Callable, Dict, List, NamedTuple, Sequence
+
+import numpy as np
+
+from google.protobuf.internal import api_implementation
+
+import corpus
+import takproto
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+# Messages per batch in the batch and chunked Stream cases.
+BATCH_SIZE = 100
+
+
+class Case(NamedTuple):
+    """One benchmark: func is called once per input.
+
+    size(input) is the number of bytes processed by the call, and messages the
+    number of CoT messages each call handles.
+    """
+
+    name: str
+    func: Callable
+    inputs: Sequence
+    size: Callable[[Any], int] = len
+    messages: int = 1
+
+
+def build_cases(count: int) -> List[Case]:
+    """Return the benchmark cases over a corpus of count messages per kind."""
+    docs = corpus.build(count)
+    rng = random.Random(0)
+    mesh = takproto.TAKProtoVer.MESH
+    stream = takproto.TAKProtoVer.STREAM
+
+    msgs = {
+        kind: [takproto.xml2msg(xml) for xml in xmls] for kind, xmls in docs.items()
+    }
+    mesh_frames = {
+        kind: [bytes(takproto.msg2proto(msg, mesh)) for msg in kind_msgs]
+        for kind, kind_msgs in msgs.items()
+    }
+    stream_frames = [bytes(takproto.msg2proto(msg, stream)) for msg in msgs["sa"]]
+    times = [
+        takproto.ms2iso(corpus.EPOCH_MS + rng.randrange(0, 86_400_000))
+        for _ in range(count)
+    ]
+
+    def serialized_size(msg) -> int:
+        return msg.ByteSize()
+
+    def reads_size(reads) -> int:
+        return sum(len(read) for read in reads)
+
+    def batch_size(batch) -> int:
+        return sum(msg.ByteSize() for msg in batch)
+
+    def fan_out(xml):
+        # One event sent to 10 peers in each of XML, Mesh & Stream.
+        event = takproto.EncodedEvent.from_xml(xml)
+        for _ in range(10):
+            event.xml, event.mesh, event.stream
+
+    def fan_out_xml2proto(xml):
+        for _ in range(10):
+            xml, takproto.xml2proto(xml, mesh), takproto.xml2proto(xml, stream)
+
+    def event_args(msg):
+        cot_event = msg.cotEvent
+        args = [getattr(cot_event, name) for name in corpus.EVENT_FIELDS]
+        track = cot_event.detail.track
+        return args, {
+            "callsign": cot_event.detail.contact.callsign,
+            "speed": track.speed,
+            "course": track.course,
+        }
+
+    def build_and_encode(item):
+        args, kwargs = item
+        msg = takproto.proto.TakMessage()
+        cot_event = msg.cotEvent
+        for name, value in zip(corpus.EVENT_FIELDS, args):
+            setattr(cot_event, name, value)
+        cot_event.detail.contact.callsign = kwargs["callsign"]
+        cot_event.detail.track.speed = kwargs["speed"]
+        cot_event.detail.track.course = kwargs["course"]
+        return takproto.msg2proto(msg)
+
+    def encode_cot_event(item):
+        args, kwargs = item
+        return takproto.encode_cot_event(*args, **kwargs)
+
+    def decode_reads(reads):
+        decoder = takproto.StreamDecoder()
+        for read in reads:
+            decoder.feed(read)
+
+    batch = BATCH_SIZE
+    stream_reads = [
+        corpus.fragment(b"".join(stream_frames[i : i + batch]), rng)
+        for i in range(0, len(stream_frames) - batch + 1, batch)
+    ]
+    sa_batches = [
+        msgs["sa"][i : i + batch] for i in range(0, len(msgs["sa"]) - batch + 1, batch)
+    ]
+
+    # The same SA reports again, with only the times moved on.
+    delta_encoder = takproto.DeltaEncoder(mesh)
+    sa_repeats = []
+    for msg in msgs["sa"]:
+        delta_encoder.encode(msg)
+        repeat = takproto.proto.TakMessage()
+        repeat.CopyFrom(msg)
+        for field in ("sendTime", "startTime", "staleTime"):
+            setattr(repeat.cotEvent, field, getattr(msg.cotEvent, field) + 5000)
+        sa_repeats.append(repeat)
+
+    # A tick of 1000 simulated tracks, each moved on per tick.
+    entities = 1000
+    tick_msgs = msgs["sa"][:entities]
+    column_encoder = takproto.ColumnEncoder(
+        [msg.cotEvent.uid for msg in tick_msgs],
+        [msg.cotEvent.type for msg in tick_msgs],
+        callsigns=[msg.cotEvent.detail.contact.callsign for msg in tick_msgs],
+        track=True,
+    )
+    ticks = [corpus.EPOCH_MS + 1000 * tick for tick in range(10)]
+
+    def tick_msg2proto(now):
+        for msg in tick_msgs:
+            cot_event = msg.cotEvent
+            cot_event.sendTime = cot_event.startTime = now
+            cot_event.staleTime = now + 60000
+            cot_event.lat += 0.0001
+            takproto.msg2proto(msg, mesh)
+
+    lat = np.array([msg.cotEvent.lat for msg in tick_msgs])
+    lon = np.array([msg.cotEvent.lon for msg in tick_msgs])
+    speed = np.array([msg.cotEvent.detail.track.speed for msg in tick_msgs])
+
+    def tick_column_encoder(now):
+        lat[:] += 0.0001
+        column_encoder.frames(now, now, now + 60000, lat, lon, 10.0, 5.0, 5.0, speed)
+
+    cases = [
+        Case("format_time", takproto.format_time, times),
+        Case("format_time (uncached)", takproto.format_time.__wrapped__, times),
+        Case(
+            "ms2iso (uncached)",
+            takproto.ms2iso.__wrapped__,
+            [takproto.format_time(t) for t in times],
+            size=lambda _: 8,
+        ),
+    ]
+    for kind, xmls in docs.items():
+        cases.append(Case(f"xml2msg {kind}", takproto.xml2msg, xmls))
+    cases.append(Case("fast_xml2msg sa", takproto.fast_xml2msg, docs["sa"]))
+    cases += [
+        Case(
+            "xml2proto sa mesh", lambda xml: takproto.xml2proto(xml, mesh), docs["sa"]
+        ),
+        Case(
+            "xml2proto sa stream",
+            lambda xml: takproto.xml2proto(xml, stream),
+            docs["sa"],
+        ),
+        Case(
+            "msg2proto sa mesh",
+            lambda msg: takproto.msg2proto(msg, mesh),
+            msgs["sa"],
+            serialized_size,
+        ),
+        Case(
+            "msg2proto sa stream",
+            lambda msg: takproto.msg2proto(msg, stream),
+            msgs["sa"],
+            serialized_size,
+        ),
+        Case(
+            "encode_stream_batch sa",
+            takproto.encode_stream_batch,
+            sa_batches,
+            batch_size,
+            batch,
+        ),
+        Case(
+            "DeltaEncoder sa repeat",
+            delta_encoder.encode,
+            sa_repeats,
+            serialized_size,
+        ),
+        Case(
+            "DeltaEncoder.refresh sa",
+            lambda msg: delta_encoder.refresh(
+                msg.cotEvent.uid,
+                msg.cotEvent.sendTime,
+                msg.cotEvent.startTime,
+                msg.cotEvent.staleTime,
+            ),
+            sa_repeats,
+            serialized_size,
+        ),
+        Case("EncodedEvent sa fan-out x10", fan_out, docs["sa"]),
+        Case("xml2proto sa fan-out x10", fan_out_xml2proto, docs["sa"]),
+        Case(
+            "TakMessage build+msg2proto track",
+            build_and_encode,
+            [event_args(msg) for msg in msgs["sa"]],
+            lambda item: len(encode_cot_event(item)),
+        ),
+        Case(
+            "encode_cot_event track",
+            encode_cot_event,
+            [event_args(msg) for msg in msgs["sa"]],
+            lambda item: len(encode_cot_event(item)),
+        ),
+        Case(
+            f"msg2proto tick x{entities}",
+            tick_msg2proto,
+            ticks,
+            lambda _: int(column_encoder.offsets[-1]),
+            entities,
+        ),
+        Case(
+            f"ColumnEncoder tick x{entities}",
+            tick_column_encoder,
+            ticks,
+            lambda _: int(column_encoder.offsets[-1]),
+            entities,
+        ),
+        Case("proto2xml sa", takproto.proto2xml, msgs["sa"], serialized_size),
+        Case("proto2xml marker", takproto.proto2xml, msgs["marker"], serialized_size),
+    ]
+    for kind, frames in mesh_frames.items():
+        cases.append(Case(f"parse_mesh {kind}", takproto.parse_mesh, frames))
+    cases += [
+        Case("parse_stream sa", takproto.parse_stream, stream_frames),
+        Case(
+            "StreamDecoder sa fragmented", decode_reads, stream_reads, reads_size, batch
+        ),
+        Case("scan_event sa", takproto.scan_event, mesh_frames["sa"]),
+        Case("scan_event marker", takproto.scan_event, mesh_frames["marker"]),
+    ]
+    return cases
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Return the pct percentile of sorted_values (nearest rank)."""
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[index]
+
+
+def run_case(case: Case, min_time: float = 0.5) -> Dict[str, float]:
+    """Run case for at least min_time seconds and return its statistics."""
+    func = case.func
+    for item in case.inputs[:10]:
+        func(item)  # warm up
+
+    latencies = []
+    nbytes = 0
+    perf_counter = time.perf_counter
+    started = perf_counter()
+    while perf_counter() - started < min_time:
+        for item in case.inputs:
+            call_start = perf_counter()
+            func(item)
+            latencies.append(perf_counter() - call_start)
+        nbytes += sum(case.size(item) for item in case.inputs)
+    elapsed = sum(latencies)
+
+    # Allocation is measured separately, as tracing slows every call down.
+    sample = case.inputs[:50]
+    peaks = []
+    for item in sample:
+        tracemalloc.start()
+        func(item)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    latencies.sort()
+    messages = len(latencies) * case.messages
+    return {
+        "calls": len(latencies),
+        "messages": messages,
+        "msgs_per_sec": messages / elapsed,
+        "bytes_per_sec": nbytes / elapsed,
+        "p50_usec": percentile(latencies, 50) * 1e6,
+        "p99_usec": percentile(latencies, 99) * 1e6,
+        "alloc_bytes_per_msg": sum(peaks) / len(peaks) / case.messages,
+    }
+
+
+def git_commit() -> str:
+    """Return the current git commit, or an empty string outside a checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main() -> None:
+    """Run the suite and print, save and compare the results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument(
+        "-n", "--count", type=int, default=1000, help="messages per kind"
+    )
+    parser.add_argument("-k", "--filter", default="", help="only run matching cases")
+    parser.add_argument(
+        "-t", "--min-time", type=float, default=0.5, help="seconds per case"
+    )
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    parser.add_argument("--compare", help="compare with an earlier JSON result")
+    args = parser.parse_args()
+    if args.count < BATCH_SIZE:
+        parser.error(f"-n/--count must be at least {BATCH_SIZE}, the batch size")
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="UTF-8") as base_file:
+            baseline = json.load(base_file)["results"]
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "protobuf_backend": api_implementation.Type(),
+        "count": args.count,
+        "results": {},
+    }
+    print(
+        f"takproto {report['commit']} python {report['python']} "
+        f"protobuf {report['protobuf_backend']}"
+    )
+    header = (
+        f"{'case':<30} {'msgs/sec':>10} {'MB/sec':>8} {'p50 us':>8} "
+        f"{'p99 us':>8} {'alloc B/msg':>11}"
+    )
+    print(header + ("  vs base" if baseline else ""))
+
+    for case in build_cases(args.count):
+        if args.filter not in case.name or not case.inputs:
+            continue
+        result = run_case(case, args.min_time)
+        report["results"][case.name] = result
+        line = (
+            f"{case.name:<30} {result['msgs_per_sec']:>10.0f} "
+            f"{result['bytes_per_sec'] / 1e6:>8.2f} {result['p50_usec']:>8.2f} "
+            f"{result['p99_usec']:>8.2f} {result['alloc_bytes_per_msg']:>11.0f}"
+        )
+        base = baseline.get(case.name)
+        if base:
+            change = result["msgs_per_sec"] / base["msgs_per_sec"] - 1
+            line += f"  {change:+8.1%}"
+        print(line)
+        sys.stdout.flush()
+
+    if args.output:
+        with open(args.output, "w", encoding="UTF-8") as out_file:
+            json.dump(report, out_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
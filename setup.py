@@ -84,5 +84,7 @@ setuptools.setup(
         "Operating System :: OS Independent",
     ],
     keywords=["Cursor on Target", "ATAK", "TAK", "CoT", "WinTAK", "iTAK"],
-    install_requires=["protobuf >= 4.21.0", "delimited-protobuf >= 1.0.0"],
+    python_requires=">=3.7",
+    install_requires=["protobuf >= 4.21.0"],
+    extras_require={"numpy": ["numpy"]},
 )
@@ -30,16 +30,79 @@
 :source: <https://github.com/snstac/takproto>
 """
 
-from .functions import (  # NOQA
-    xml2proto,
-    parse_proto,
-    parse_mesh,
-    parse_stream,
-    format_time,
-)
-from .constants import TAKProtoVer  # NOQA
+import importlib
+
+from .constants import NegotiationState, TAKProtoVer  # NOQA
 
 __author__ = "Greg Albrecht <gba@snstac.com>"
 __copyright__ = "Copyright 2023 Sensors & Signals LLC"
 __license__ = "MIT License"
 __source__ = "https://github.com/snstac/takproto"
+
+
+# The public names of each submodule. They are imported on first access, so
+# `import takproto` does not load protobuf, asyncio or NumPy until needed; nor
+# typing, so this module is not annotated.
+_SUBMODULE_NAMES = {
+    "functions": (
+        "xml2proto",
+        "xml2msg",
+        "element2msg",
+        "proto2xml",
+        "parse_proto",
+        "parse_mesh",
+        "parse_stream",
+        "format_time",
+        "ms2iso",
+        "msg2proto",
+        "encode_stream_batch",
+        "encode_mesh_batch",
+    ),
+    "aio": ("TAKStreamProtocol", "TAKMeshProtocol", "open_stream", "open_mesh"),
+    "bulk": ("convert_many", "decode_many"),
+    "capture": (
+        "CaptureIndex",
+        "CaptureReader",
+        "CaptureWriter",
+        "build_index",
+        "read_pcap",
+    ),
+    "classes": (
+        "DeltaEncoder",
+        "DetailPool",
+        "EncodedEvent",
+        "EventRecord",
+        "StreamDecoder",
+        "TrackCache",
+        "XMLStreamReader",
+    ),
+    "columns": ("ColumnEncoder", "to_columns", "decode_to_arrays"),
+    "detail": ("register_detail", "unregister_detail"),
+    "fast": ("fast_xml2msg", "fast_xml2proto"),
+    "metrics": (),
+    "negotiation": ("MeshVersions", "StreamNegotiator"),
+    "proto": ("backend",),
+    "wire": ("encode_cot_event", "payload_bounds", "scan_event"),
+}
+_LAZY_NAMES = {
+    name: module for module, names in _SUBMODULE_NAMES.items() for name in names
+}
+
+__all__ = ["NegotiationState", "TAKProtoVer"] + list(_LAZY_NAMES)
+
+
+def __getattr__(name: str):
+    """Import the submodule defining name, or the submodule name, on first access."""
+    if name in _LAZY_NAMES:
+        module = importlib.import_module(f"{__name__}.{_LAZY_NAMES[name]}")
+        value = getattr(module, name)
+    elif name in _SUBMODULE_NAMES:
+        value = importlib.import_module(f"{__name__}.{name}")
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAMES) | set(_SUBMODULE_NAMES))
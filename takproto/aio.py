@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""TAKProto asyncio Protocols for TAK Protocol Version 1 Stream & Mesh."""
+
+import asyncio
+import socket
+import struct
+
+from collections import deque
+from typing import Callable, Iterable, Optional, Tuple
+
+from google.protobuf.message import DecodeError
+
+from takproto.classes import StreamDecoder
+from takproto.constants import (
+    DEFAULT_MAX_FRAME_SIZE,
+    DEFAULT_MESH_GROUP,
+    DEFAULT_MESH_HEADER,
+    DEFAULT_MESH_PORT,
+    DEFAULT_QUEUE_SIZE,
+)
+from takproto.functions import encode_mesh_batch, encode_stream_batch, parse_mesh
+from takproto.proto import TakMessage
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+class _TAKProtocol:
+    """Shared delivery, async iteration & write flow control for TAK Protocols.
+
+    Decoded messages go to callback if one is given, otherwise they are queued
+    for the async iterator. _on_queue_full() and _on_queue_drained() are called
+    when the queue reaches max_queue and when it falls back to half of that.
+    """
+
+    def __init__(
+        self,
+        callback: Optional[Callable[[TakMessage], None]] = None,
+        max_queue: int = DEFAULT_QUEUE_SIZE,
+    ) -> None:
+        self.callback = callback
+        self.max_queue = max_queue
+        self.transport = None
+        self._queue: deque = deque()
+        self._full = False
+        self._closed = False
+        self._exc: Optional[BaseException] = None
+        self._waiter: Optional[asyncio.Future] = None
+        self._write_waiter: Optional[asyncio.Future] = None
+
+    def connection_made(self, transport) -> None:
+        """Store the transport once the connection or endpoint is up."""
+        self.transport = transport
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        """End async iteration once queued messages have been consumed."""
+        self._closed = True
+        if exc is not None and self._exc is None:
+            self._exc = exc
+        self._wake(self._waiter)
+        self._wake(self._write_waiter)
+
+    def pause_writing(self) -> None:
+        """Block drain() until the transport's write buffer empties."""
+        if self._write_waiter is None or self._write_waiter.done():
+            self._write_waiter = asyncio.get_event_loop().create_future()
+
+    def resume_writing(self) -> None:
+        """Release drain()."""
+        self._wake(self._write_waiter)
+
+    async def drain(self) -> None:
+        """Wait until the transport is ready to accept more data."""
+        if self._write_waiter is not None and not self._write_waiter.done():
+            await self._write_waiter
+
+    def _deliver(self, messages: Iterable[TakMessage]) -> None:
+        if self.callback is not None:
+            for msg in messages:
+                self.callback(msg)
+            return
+
+        self._queue.extend(messages)
+        self._wake(self._waiter)
+        if not self._full and len(self._queue) >= self.max_queue:
+            self._full = True
+            self._on_queue_full()
+
+    def _on_queue_full(self) -> None:
+        """Apply backpressure; subclasses override."""
+
+    def _on_queue_drained(self) -> None:
+        """Release backpressure; subclasses override."""
+
+    @staticmethod
+    def _wake(waiter: Optional[asyncio.Future]) -> None:
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> TakMessage:
+        while not self._queue:
+            if self._closed:
+                if self._exc is not None:
+                    raise self._exc
+                raise StopAsyncIteration
+            self._waiter = asyncio.get_event_loop().create_future()
+            await self._waiter
+
+        msg = self._queue.popleft()
+        if self._full and len(self._queue) <= self.max_queue // 2:
+            self._full = False
+            self._on_queue_drained()
+        return msg
+
+
+class TAKStreamProtocol(_TAKProtocol, asyncio.Protocol):
+    """asyncio Protocol for TAK Protocol Version 1 Stream over TCP.
+
+    Incoming data is framed with a StreamDecoder. Reading from the socket is
+    paused while max_queue messages are waiting to be consumed, so a slow
+    consumer pushes back on the sender instead of growing memory. A malformed
+    stream closes the connection and the error is raised by the iterator.
+    """
+
+    def __init__(
+        self,
+        callback: Optional[Callable[[TakMessage], None]] = None,
+        max_queue: int = DEFAULT_QUEUE_SIZE,
+        max_frame_size: int = DEFAULT_MAX_FRAME_SIZE,
+    ) -> None:
+        super().__init__(callback, max_queue)
+        self.decoder = StreamDecoder(max_frame_size)
+
+    def data_received(self, data: bytes) -> None:
+        """Decode data and deliver every complete TakMessage."""
+        try:
+            messages = self.decoder.feed(data)
+        except (ValueError, DecodeError) as exc:
+            self._exc = exc
+            self.transport.close()
+            return
+        self._deliver(messages)
+
+    def _on_queue_full(self) -> None:
+        self.transport.pause_reading()
+
+    def _on_queue_drained(self) -> None:
+        if not self._closed:
+            self.transport.resume_reading()
+
+    def write_messages(self, messages: Iterable[TakMessage]) -> None:
+        """Encode messages as Stream frames and send them in one write.
+
+        Await drain() afterwards to respect the transport's flow control.
+        """
+        # The transport may hold on to the buffer, so it is not reused.
+        buf, offsets = encode_stream_batch(messages)
+        if offsets[-1]:
+            self.transport.write(buf)
+
+
+class TAKMeshProtocol(_TAKProtocol, asyncio.DatagramProtocol):
+    """asyncio DatagramProtocol for TAK Protocol Version 1 Mesh over UDP.
+
+    Datagrams that are not TAK Protocol Version 1 Mesh are ignored, and Mesh
+    datagrams that fail to parse are counted in errors. UDP cannot push back on
+    the sender, so while max_queue messages are waiting new ones are dropped and
+    counted in dropped.
+    """
+
+    def __init__(
+        self,
+        callback: Optional[Callable[[TakMessage], None]] = None,
+        max_queue: int = DEFAULT_QUEUE_SIZE,
+    ) -> None:
+        super().__init__(callback, max_queue)
+        self.dropped = 0
+        self.errors = 0
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        """Decode one datagram and deliver its TakMessage."""
+        if self._full:
+            self.dropped += 1
+            return
+        if data[:3] != DEFAULT_MESH_HEADER:
+            return
+        try:
+            msg = parse_mesh(data)
+        except (DecodeError, ValueError, EOFError):
+            self.errors += 1
+            return
+        self._deliver((msg,))
+
+    def error_received(self, exc: Exception) -> None:
+        """Count socket errors; the endpoint stays open."""
+        self.errors += 1
+
+    def write_messages(
+        self, messages: Iterable[TakMessage], addr: Optional[Tuple[str, int]] = None
+    ) -> None:
+        """Encode messages as Mesh datagrams and send one datagram per message.
+
+        addr may be omitted if the endpoint was created with a remote_addr.
+        """
+        buf, offsets = encode_mesh_batch(messages)
+        view = memoryview(buf)
+        for start, end in zip(offsets, offsets[1:]):
+            self.transport.sendto(view[start:end], addr)
+
+
+async def open_stream(
+    host: str, port: int, **kwargs
+) -> Tuple[asyncio.Transport, TAKStreamProtocol]:
+    """Connect to a TAK Protocol Version 1 Stream server, such as a TAK Server.
+
+    kwargs are passed to TAKStreamProtocol.
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.create_connection(lambda: TAKStreamProtocol(**kwargs), host, port)
+
+
+async def open_mesh(
+    group: str = DEFAULT_MESH_GROUP,
+    port: int = DEFAULT_MESH_PORT,
+    interface: str = "0.0.0.0",
+    **kwargs,
+) -> Tuple[asyncio.DatagramTransport, TAKMeshProtocol]:
+    """Join a TAK Protocol Version 1 Mesh multicast group.
+
+    kwargs are passed to TAKMeshProtocol. Use write_messages() with
+    (group, port) as addr to send to the group.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("", port))
+    mreq = struct.pack("4s4s", socket.inet_aton(group), socket.inet_aton(interface))
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+    sock.setsockopt(
+        socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface)
+    )
+
+    loop = asyncio.get_event_loop()
+    return await loop.create_datagram_endpoint(
+        lambda: TAKMeshProtocol(**kwargs), sock=sock
+    )
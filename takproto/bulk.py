@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""TAKProto Functions for converting & decoding large batches of messages.
+
+Work is split into chunks and, optionally, spread over a pool of worker
+processes. Only raw XML, raw frames and picklable results cross the process
+boundary; TakMessage objects are never pickled.
+"""
+
+import os
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+from takproto.constants import DEFAULT_BULK_CHUNK_SIZE, TAKProtoVer
+from takproto.functions import parse_proto, xml2proto
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+def _convert_chunk(chunk: List[Any], protover: Optional[TAKProtoVer]) -> List[bytes]:
+    return [bytes(xml2proto(xml, protover)) for xml in chunk]
+
+
+def _decode_chunk(chunk: List[bytes], func: Callable) -> List[Any]:
+    return [func(parse_proto(frame)) for frame in chunk]
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[List]:
+    items = iter(items)
+    chunk = list(islice(items, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(items, size))
+
+
+def _run(
+    func: Callable, items: Iterable, args: tuple, workers: Optional[int], chunksize: int
+) -> Iterator:
+    """Apply func(chunk, *args) to chunks of items, yielding results in order.
+
+    At most two chunks per worker are in flight, so items may be an unbounded
+    iterator and results are streamed as soon as they are ready.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        for chunk in _chunked(items, chunksize):
+            yield from func(chunk, *args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: deque = deque()
+        for chunk in _chunked(items, chunksize):
+            pending.append(executor.submit(func, chunk, *args))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def convert_many(
+    xml_docs: Iterable,
+    protover: Optional[TAKProtoVer] = None,
+    workers: Optional[int] = 1,
+    chunksize: int = DEFAULT_BULK_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Convert many plain XML CoT documents to TAK Protocol Version 1.
+
+    Yields the encoded bytes of each document, in input order. With workers > 1
+    (or None, for one per CPU) the conversion runs in a process pool.
+    """
+    return _run(_convert_chunk, xml_docs, (protover,), workers, chunksize)
+
+
+def decode_many(
+    frames: Iterable[bytes],
+    func: Optional[Callable] = None,
+    workers: Optional[int] = 1,
+    chunksize: int = DEFAULT_BULK_CHUNK_SIZE,
+) -> Iterator[Any]:
+    """Decode many TAK Protocol Version 1 Mesh or Stream frames.
+
+    Each frame is parsed with parse_proto() and passed to func, and the results
+    are yielded in input order. With workers > 1 (or None, for one per CPU) the
+    parsing and func run in a process pool, so func must be picklable (a module
+    level function) and return a picklable result such as a tuple of fields or
+    the output of proto2xml().
+
+    Without func the TakMessages themselves are yielded; they are then parsed in
+    the calling process, as shipping them back from a worker would cost another
+    serialize and parse.
+    """
+    if func is None:
+        return (parse_proto(frame) for frame in frames)
+    return _run(_decode_chunk, frames, (func,), workers, chunksize)
@@ -0,0 +1,810 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""TAKProto capture files of TAK Protocol frames, for archiving and replay.
+
+A capture is append-only: the CAPTURE_MAGIC header, then one record per frame.
+Each record is a little-endian header of the receive time in nanoseconds since
+the epoch (u64), the frame length (u32) and the peer length (u16), followed by
+the peer, such as "192.168.1.10:6969", in UTF-8 and the frame exactly as
+received, Mesh or Stream.
+
+A capture can have a sidecar index, at its path + INDEX_SUFFIX: the
+INDEX_MAGIC header, then blocks of index entries. Each block is a little-endian
+header of its entry count (u32), the count and padded size of its strings
+(u32 each), a reserved u32, the first & last sendTime of its entries and the
+size of the capture it covers (u64 each). Then come the UIDs & CoT types first
+used by the block, as their sizes (u32 each) and their UTF-8 concatenated,
+padded to 8 bytes, and four columns of its entries, sorted by sendTime:
+sendTime (u64), record offset (u64), and the UID and type (u32) as positions
+in the strings of the whole index.
+"""
+
+import heapq
+import ipaddress
+import mmap
+import os
+import struct
+import sys
+import time
+
+from array import array
+from bisect import bisect_left
+from itertools import accumulate, chain
+from operator import itemgetter
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from takproto.constants import (
+    CAPTURE_MAGIC,
+    DEFAULT_CAPTURE_BUFFER_SIZE,
+    DEFAULT_INDEX_BLOCK_SIZE,
+    INDEX_MAGIC,
+    INDEX_SUFFIX,
+)
+from takproto.functions import parse_proto
+from takproto.proto import TakMessage
+from takproto.wire import scan_event
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+_RECORD = struct.Struct("<QIH")
+_PEER_MAX_SIZE = 0xFFFF
+
+
+class CaptureRecord(NamedTuple):
+    """One captured frame.
+
+    frame is a memoryview into the capture when read by CaptureReader; it is
+    only valid until the reader is closed, so copy it with bytes() to keep it.
+    offset is the position of the record in the capture.
+    """
+
+    time_ns: int
+    peer: str
+    frame: Union[bytes, memoryview]
+    offset: int = 0
+
+    @property
+    def message(self) -> Optional[TakMessage]:
+        """Return the frame parsed by parse_proto(), parsing it on each access."""
+        return parse_proto(self.frame)
+
+
+def _records(buf, offset: int, end: int) -> Iterator[CaptureRecord]:
+    """Yield the complete records of a capture in buf[offset:end]."""
+    unpack_from = _RECORD.unpack_from
+    header_size = _RECORD.size
+    with memoryview(buf) as view:
+        while offset + header_size <= end:
+            time_ns, frame_size, peer_size = unpack_from(buf, offset)
+            peer_start = offset + header_size
+            frame_start = peer_start + peer_size
+            frame_end = frame_start + frame_size
+            if frame_end > end:
+                # A record cut short by a crash while writing.
+                return
+            yield CaptureRecord(
+                time_ns,
+                str(view[peer_start:frame_start], "utf-8"),
+                view[frame_start:frame_end],
+                offset,
+            )
+            offset = frame_end
+
+
+def _complete_size(buf, end: int) -> int:
+    """Return the size of the capture in buf[:end] without a torn last record."""
+    unpack_from = _RECORD.unpack_from
+    header_size = _RECORD.size
+    offset = len(CAPTURE_MAGIC)
+    while offset + header_size <= end:
+        _, frame_size, peer_size = unpack_from(buf, offset)
+        record_end = offset + header_size + peer_size + frame_size
+        if record_end > end:
+            break
+        offset = record_end
+    return offset
+
+
+class CaptureWriter:
+    """Append frames to a capture file, in bulk.
+
+    Records are collected in memory and written with one system call once
+    buffer_size bytes are pending, and on flush() or close(). An existing
+    capture is appended to, after dropping any record cut short by a crash.
+    If index is true, the sidecar index read by CaptureIndex is kept up to date
+    too, starting with any records it is missing. Use as a context manager, or
+    call close().
+    """
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        buffer_size: int = DEFAULT_CAPTURE_BUFFER_SIZE,
+        index: bool = False,
+    ) -> None:
+        self.buffer_size = buffer_size
+        self._buffer = bytearray()
+        self._index: Optional[_IndexWriter] = None
+        # Unbuffered, as records are buffered here.
+        self._file = open(
+            path, "a+b", buffering=0
+        )  # NOQA pylint: disable=consider-using-with
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size == 0:
+                self._file.write(CAPTURE_MAGIC)
+                size = len(CAPTURE_MAGIC)
+            else:
+                with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    if buf[: len(CAPTURE_MAGIC)] != CAPTURE_MAGIC:
+                        raise ValueError(f"Not a takproto capture: {path}")
+                    complete = _complete_size(buf, size)
+                if complete != size:
+                    self._file.truncate(complete)
+                    size = complete
+            if index:
+                self._index = _IndexWriter(os.fspath(path) + INDEX_SUFFIX)
+                if self._index.end != size:
+                    with mmap.mmap(
+                        self._file.fileno(), 0, access=mmap.ACCESS_READ
+                    ) as buf:
+                        _update_index(self._index, buf, size)
+        except BaseException:
+            self._file.close()
+            if self._index is not None:
+                self._index.close()
+            raise
+        self.size = size
+
+    def __enter__(self) -> "CaptureWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, frame, peer: str = "", time_ns: Optional[int] = None) -> int:
+        """Append frame, received from peer at time_ns (default now).
+
+        Returns the offset of the record in the capture.
+        """
+        encoded_peer = peer.encode()
+        if len(encoded_peer) > _PEER_MAX_SIZE:
+            raise ValueError(f"Peer is longer than {_PEER_MAX_SIZE} bytes: {peer!r}")
+        if time_ns is None:
+            time_ns = time.time_ns()
+        offset = self.size
+        if self._index is not None:
+            self._index.add(frame, offset)
+        buffer = self._buffer
+        buffer += _RECORD.pack(time_ns, len(frame), len(encoded_peer))
+        buffer += encoded_peer
+        buffer += frame
+        self.size += _RECORD.size + len(encoded_peer) + len(frame)
+        if len(buffer) >= self.buffer_size:
+            self.flush()
+        return offset
+
+    def write_records(self, records: Iterable[CaptureRecord]) -> int:
+        """Append records, such as those of read_pcap(); returns how many."""
+        count = 0
+        for record in records:
+            self.write(record.frame, record.peer, record.time_ns)
+            count += 1
+        return count
+
+    def flush(self) -> None:
+        """Write the pending records to the file, then their index entries."""
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+        if self._index is not None:
+            self._index.flush(self.size)
+
+    def close(self) -> None:
+        """Flush the pending records and close the file."""
+        if not self._file.closed:
+            try:
+                self.flush()
+            finally:
+                self._file.close()
+                if self._index is not None:
+                    self._index.close()
+
+
+class CaptureReader:
+    """Read a capture file through a read-only memory map.
+
+    Iterating yields a CaptureRecord per frame, in the order written, with the
+    frame as a memoryview into the map: nothing is copied, and each frame is
+    only parsed when its message is used. A record cut short by a crash while
+    writing ends the capture. Use as a context manager, or call close().
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        with open(path, "rb") as capture:
+            if capture.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+                raise ValueError(f"Not a takproto capture: {path}")
+            self._map = mmap.mmap(capture.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = len(self._map)
+
+    def __enter__(self) -> "CaptureReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[CaptureRecord]:
+        return self.records()
+
+    def records(self, offset: int = len(CAPTURE_MAGIC)) -> Iterator[CaptureRecord]:
+        """Yield the records from the one at offset to the end of the capture."""
+        return _records(self._map, offset, self.size)
+
+    def record(self, offset: int) -> CaptureRecord:
+        """Return the record at offset, which must be the start of a record."""
+        for record in _records(self._map, offset, self.size):
+            return record
+        raise ValueError(f"No complete record at offset {offset}")
+
+    def messages(self) -> Iterator[Tuple[CaptureRecord, Optional[TakMessage]]]:
+        """Yield each record with its frame parsed by parse_proto()."""
+        for record in self.records():
+            yield record, parse_proto(record.frame)
+
+    def close(self) -> None:
+        """Close the memory map.
+
+        If frames from this reader are still referenced the map stays open
+        until they are released.
+        """
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+
+
+_BLOCK = struct.Struct("<IIIIQQQ")
+_INDEX_FIELDS = ("uid", "type", "sendTime")
+
+
+def _index_fields(frame) -> Optional[Tuple[int, str, str]]:
+    """Return the sendTime, UID & type of frame, or None if it is not TAK."""
+    try:
+        fields = scan_event(frame, _INDEX_FIELDS)
+    except ValueError:
+        return None
+    return fields["sendTime"], fields["uid"], fields["type"]
+
+
+class _BlockHeader(NamedTuple):
+    """A complete block of an index, as read by _index_blocks()."""
+
+    count: int
+    min_time: int
+    max_time: int
+    end: int
+    strings: List[str]
+    columns: int
+    next: int
+
+
+def _strings(buf, offset: int, count: int) -> List[str]:
+    """Return the count strings of the string table at buf[offset:]."""
+    if not count:
+        return []
+    sizes = struct.unpack_from(f"<{count}I", buf, offset)
+    start = offset + count * 4
+    ends = list(accumulate(sizes))
+    encoded = bytes(buf[start : start + ends[-1]])
+    text = str(encoded, "utf-8")
+    if len(text) != len(encoded):
+        # Not all ASCII, so the sizes are not of characters.
+        return [
+            str(encoded[first:last], "utf-8") for first, last in zip([0] + ends, ends)
+        ]
+    return [text[first:last] for first, last in zip([0] + ends, ends)]
+
+
+def _index_blocks(buf, size: int) -> Iterator[_BlockHeader]:
+    """Yield the complete blocks of an index in buf[:size]."""
+    offset = len(INDEX_MAGIC)
+    while offset + _BLOCK.size <= size:
+        count, string_count, strings_size, _, min_time, max_time, end = (
+            _BLOCK.unpack_from(buf, offset)
+        )
+        columns = offset + _BLOCK.size + strings_size
+        block_end = columns + count * 24
+        if block_end > size:
+            # A block cut short by a crash while writing.
+            return
+        strings = _strings(buf, offset + _BLOCK.size, string_count)
+        yield _BlockHeader(count, min_time, max_time, end, strings, columns, block_end)
+        offset = block_end
+
+
+class _IndexEntries:
+    """Index entries of captured frames, and the strings they first use."""
+
+    def __init__(self, ids: Optional[Dict[str, int]] = None) -> None:
+        self.entries: List[Tuple[int, int, int, int]] = []
+        self.ids = {} if ids is None else ids
+        self.new_strings: List[str] = []
+
+    def add(self, frame, offset: int) -> None:
+        """Add the entry of frame, the record at offset; skip non-TAK frames."""
+        fields = _index_fields(frame)
+        if fields is not None:
+            send_time, uid, cot_type = fields
+            self.entries.append((send_time, offset, self._id(uid), self._id(cot_type)))
+
+    def _id(self, string: str) -> int:
+        string_id = self.ids.get(string)
+        if string_id is None:
+            string_id = self.ids[string] = len(self.ids)
+            self.new_strings.append(string)
+        return string_id
+
+
+class _IndexWriter(_IndexEntries):
+    """Append blocks of index entries to the sidecar index of a capture."""
+
+    def __init__(self, path: str, block_size: int = DEFAULT_INDEX_BLOCK_SIZE) -> None:
+        super().__init__()
+        self.block_size = block_size
+        self.end = len(CAPTURE_MAGIC)
+        # Unbuffered, as blocks are written whole.
+        self._file = open(
+            path, "a+b", buffering=0
+        )  # NOQA pylint: disable=consider-using-with
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size == 0:
+                self._file.write(INDEX_MAGIC)
+                return
+            complete = len(INDEX_MAGIC)
+            with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                if buf[: len(INDEX_MAGIC)] != INDEX_MAGIC:
+                    raise ValueError(f"Not a takproto capture index: {path}")
+                for block in _index_blocks(buf, size):
+                    for string in block.strings:
+                        self.ids[string] = len(self.ids)
+                    self.end, complete = block.end, block.next
+            if complete != size:
+                self._file.truncate(complete)
+        except BaseException:
+            self._file.close()
+            raise
+
+    def reset(self) -> None:
+        """Drop every block, to index the capture again from its start."""
+        self._file.truncate(len(INDEX_MAGIC))
+        self.entries, self.ids, self.new_strings = [], {}, []
+        self.end = len(CAPTURE_MAGIC)
+
+    def flush(self, end: int) -> None:
+        """Write the pending entries, which cover the capture up to end."""
+        entries = self.entries
+        if not entries and end == self.end:
+            return
+        data = bytearray()
+        for first in range(0, max(len(entries), 1), self.block_size):
+            block = entries[first : first + self.block_size]
+            # The entries are in capture order, so the next block starts the
+            # part of the capture this one does not cover.
+            following = first + self.block_size
+            block_end = entries[following][1] if following < len(entries) else end
+            block.sort(key=itemgetter(0))
+
+            encoded = [string.encode() for string in self.new_strings]
+            strings = struct.pack(f"<{len(encoded)}I", *map(len, encoded))
+            strings += b"".join(encoded)
+            strings += bytes(-len(strings) % 8)
+
+            count = len(block)
+            data += _BLOCK.pack(
+                count,
+                len(self.new_strings),
+                len(strings),
+                0,
+                block[0][0] if block else 0,
+                block[-1][0] if block else 0,
+                block_end,
+            )
+            data += strings
+            if block:
+                data += struct.pack(
+                    f"<{count * 2}Q{count * 2}I", *chain.from_iterable(zip(*block))
+                )
+            self.new_strings = []
+        self._file.write(data)
+        self.entries = []
+        self.end = end
+
+    def close(self) -> None:
+        """Close the file, dropping any entries not flushed."""
+        self._file.close()
+
+
+def _update_index(index: _IndexWriter, buf, size: int) -> int:
+    """Index the records in the capture buf[:size] that index is missing.
+
+    Returns how many records were read.
+    """
+    if index.end > size:
+        # The index is of a longer capture, which this is not a copy of.
+        index.reset()
+    count = 0
+    for record in _records(buf, index.end, size):
+        if len(index.entries) >= index.block_size:
+            index.flush(record.offset)
+        index.add(record.frame, record.offset)
+        count += 1
+    index.flush(size)
+    return count
+
+
+def build_index(
+    path: Union[str, os.PathLike], block_size: int = DEFAULT_INDEX_BLOCK_SIZE
+) -> int:
+    """Build or update the sidecar index of the capture at path, in one pass.
+
+    Only the records the index is missing are read, so this brings the index of
+    a capture written without one, or by a process that crashed, up to date.
+    Returns how many records were read.
+    """
+    with CaptureReader(path) as reader:
+        index = _IndexWriter(os.fspath(path) + INDEX_SUFFIX, block_size)
+        try:
+            return _update_index(
+                index, reader._map, reader.size  # pylint: disable=protected-access
+            )
+        finally:
+            index.close()
+
+
+class _IndexBlock(NamedTuple):
+    """The columns of a block of index entries, sorted by sendTime."""
+
+    min_time: int
+    max_time: int
+    times: Sequence[int]
+    offsets: Sequence[int]
+    uids: Sequence[int]
+    types: Sequence[int]
+
+
+def _column(view: memoryview, start: int, count: int, typecode: str):
+    """Return the count little-endian integers of typecode at view[start:]."""
+    column = view[start : start + count * struct.calcsize(typecode)].cast(typecode)
+    if sys.byteorder == "big":
+        column = array(typecode, column)
+        column.byteswap()
+    return column
+
+
+def _block_entries(
+    block: _IndexBlock,
+    uid: Optional[int],
+    types: Optional[frozenset],
+    start: Optional[int],
+    end: Optional[int],
+) -> Iterator[Tuple[int, int]]:
+    """Yield the (sendTime, offset) of the matching entries of block."""
+    times = block.times
+    first = 0 if start is None else bisect_left(times, start)
+    last = len(times) if end is None else bisect_left(times, end, first)
+    offsets, block_uids, block_types = block.offsets, block.uids, block.types
+    for index in range(first, last):
+        if uid is not None and block_uids[index] != uid:
+            continue
+        if types is not None and block_types[index] not in types:
+            continue
+        yield times[index], offsets[index]
+
+
+class CaptureIndex:
+    """Query a capture by UID, CoT type & sendTime through its sidecar index.
+
+    The index is written by CaptureWriter(index=True) or build_index(). Its
+    blocks of entries are each sorted by sendTime and carry their time range, so
+    a query skips the blocks outside its time range and bisects the rest, and
+    only the matching frames are read and parsed. Records appended to the
+    capture since the index was written are scanned when opening it. Use as a
+    context manager, or call close().
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        self.reader = CaptureReader(path)
+        try:
+            index_path = os.fspath(path) + INDEX_SUFFIX
+            with open(index_path, "rb") as index:
+                if index.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                    raise ValueError(f"Not a takproto capture index: {index_path}")
+                self._map = mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self.reader.close()
+            raise
+        self._view = memoryview(self._map)
+
+        strings: List[str] = []
+        self._blocks: List[_IndexBlock] = []
+        end = len(CAPTURE_MAGIC)
+        for block in _index_blocks(self._map, len(self._map)):
+            strings.extend(block.strings)
+            end = block.end
+            if block.count:
+                columns = [
+                    _column(
+                        self._view,
+                        block.columns + block.count * start,
+                        block.count,
+                        typecode,
+                    )
+                    for start, typecode in zip((0, 8, 16, 20), ("Q", "Q", "I", "I"))
+                ]
+                self._blocks.append(
+                    _IndexBlock(block.min_time, block.max_time, *columns)
+                )
+        if end > self.reader.size:
+            self.close()
+            raise ValueError(f"Index does not match the capture: {index_path}")
+
+        tail = _IndexEntries(dict(zip(strings, range(len(strings)))))
+        for record in self.reader.records(end):
+            tail.add(record.frame, record.offset)
+        if tail.entries:
+            tail.entries.sort(key=itemgetter(0))
+            times, offsets, uids, types = zip(*tail.entries)
+            self._blocks.append(
+                _IndexBlock(
+                    times[0],
+                    times[-1],
+                    array("Q", times),
+                    array("Q", offsets),
+                    array("I", uids),
+                    array("I", types),
+                )
+            )
+        self._ids = tail.ids
+        self._uid_sets: Dict[int, frozenset] = {}
+
+    def __enter__(self) -> "CaptureIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return sum(len(block.times) for block in self._blocks)
+
+    def entries(
+        self,
+        uid: Optional[str] = None,
+        type: Optional[str] = None,  # NOQA pylint: disable=redefined-builtin
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> Iterator[Tuple[int, int]]:
+        """Yield the (sendTime, offset) of the matching records, by sendTime.
+
+        uid is matched exactly and type as a prefix, so "a-f" matches every
+        friendly atom. start and end bound sendTime, in milliseconds since the
+        epoch: start is included and end is not. Omitted criteria match all.
+        """
+        uid_id = None
+        if uid is not None:
+            uid_id = self._ids.get(uid)
+            if uid_id is None:
+                return iter(())
+        type_ids = None
+        if type is not None:
+            type_ids = frozenset(
+                string_id
+                for string, string_id in self._ids.items()
+                if string.startswith(type)
+            )
+            if not type_ids:
+                return iter(())
+
+        matching = []
+        for position, block in enumerate(self._blocks):
+            if start is not None and block.max_time < start:
+                continue
+            if end is not None and block.min_time >= end:
+                continue
+            if uid_id is not None:
+                uids = self._uid_sets.get(position)
+                if uids is None:
+                    uids = self._uid_sets[position] = frozenset(block.uids)
+                if uid_id not in uids:
+                    continue
+            matching.append(_block_entries(block, uid_id, type_ids, start, end))
+        return heapq.merge(*matching)
+
+    def records(
+        self,
+        uid: Optional[str] = None,
+        type: Optional[str] = None,  # NOQA pylint: disable=redefined-builtin
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> Iterator[CaptureRecord]:
+        """Yield the matching records by sendTime, see entries()."""
+        for _, offset in self.entries(uid, type, start, end):
+            yield self.reader.record(offset)
+
+    def messages(
+        self,
+        uid: Optional[str] = None,
+        type: Optional[str] = None,  # NOQA pylint: disable=redefined-builtin
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> Iterator[Tuple[CaptureRecord, Optional[TakMessage]]]:
+        """Yield the matching records by sendTime, each with its frame parsed."""
+        for record in self.records(uid, type, start, end):
+            yield record, parse_proto(record.frame)
+
+    def close(self) -> None:
+        """Close the index and the capture, see CaptureReader.close()."""
+        self._blocks = []
+        self._uid_sets = {}
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+        self.reader.close()
+
+
+# The pcap link-layer types, EtherTypes & IP protocol read_pcap() handles.
+_LINKTYPE_NULL = 0
+_LINKTYPE_ETHERNET = 1
+_LINKTYPE_RAW = (101, 228, 229)
+_LINKTYPE_LINUX_SLL = 113
+_LINKTYPE_LINUX_SLL2 = 276
+_ETHERTYPE_VLAN = (0x8100, 0x88A8)
+_ETHERTYPE_IPV4 = 0x0800
+_ETHERTYPE_IPV6 = 0x86DD
+_IPPROTO_UDP = 17
+_PCAP_MAGIC = {
+    b"\xd4\xc3\xb2\xa1": ("<", 1000),
+    b"\xa1\xb2\xc3\xd4": (">", 1000),
+    b"\x4d\x3c\xb2\xa1": ("<", 1),
+    b"\xa1\xb2\x3c\x4d": (">", 1),
+}
+
+
+def _ip_packet(linktype: int, packet: bytes) -> Optional[memoryview]:
+    """Return the IPv4 or IPv6 packet in a link-layer frame, or None."""
+    view = memoryview(packet)
+    if linktype == _LINKTYPE_ETHERNET:
+        if len(packet) < 14:
+            return None
+        ethertype, start = struct.unpack_from(">H", packet, 12)[0], 14
+        while ethertype in _ETHERTYPE_VLAN and len(packet) >= start + 4:
+            ethertype, start = struct.unpack_from(">H", packet, start + 2)[0], start + 4
+        if ethertype not in (_ETHERTYPE_IPV4, _ETHERTYPE_IPV6):
+            return None
+        return view[start:]
+    if linktype == _LINKTYPE_LINUX_SLL:
+        return view[16:]
+    if linktype == _LINKTYPE_LINUX_SLL2:
+        return view[20:]
+    if linktype == _LINKTYPE_NULL:
+        return view[4:]
+    if linktype in _LINKTYPE_RAW:
+        return view
+    return None
+
+
+def _udp_datagram(packet: memoryview) -> Optional[tuple]:
+    """Return (source, source port, destination, port, payload) of a UDP packet.
+
+    source is formatted for a peer, with an IPv6 address in brackets.
+    """
+    if len(packet) < 20:
+        return None
+    version = packet[0] >> 4
+    if version == 4:
+        header_size = (packet[0] & 0x0F) * 4
+        fragment = struct.unpack_from(">H", packet, 6)[0]
+        # Skip fragments: TAK Protocol datagrams fit in one packet.
+        if packet[9] != _IPPROTO_UDP or fragment & 0x3FFF:
+            return None
+        source = str(ipaddress.IPv4Address(bytes(packet[12:16])))
+        destination = ipaddress.IPv4Address(bytes(packet[16:20]))
+    elif version == 6 and len(packet) >= 40:
+        # Packets with extension headers before UDP are skipped.
+        header_size = 40
+        if packet[6] != _IPPROTO_UDP:
+            return None
+        source = f"[{ipaddress.IPv6Address(bytes(packet[8:24]))}]"
+        destination = ipaddress.IPv6Address(bytes(packet[24:40]))
+    else:
+        return None
+    if len(packet) < header_size + 8:
+        return None
+    source_port, port, length = struct.unpack_from(">HHH", packet, header_size)
+    payload = packet[header_size + 8 : header_size + max(length, 8)]
+    return source, source_port, destination, port, payload
+
+
+def read_pcap(
+    path: Union[str, os.PathLike],
+    port: Optional[int] = None,
+    multicast: bool = False,
+) -> Iterator[CaptureRecord]:
+    """Yield the UDP datagrams of a classic pcap file as CaptureRecords.
+
+    Reads Ethernet (with VLAN tags), Linux cooked, loopback and raw IP captures
+    with microsecond or nanosecond timestamps, IPv4 and IPv6. Only datagrams to
+    port are yielded if it is given, and only those to a multicast group if
+    multicast is true, such as the Mesh SA traffic on 239.2.3.1:6969. The peer
+    of each record is the sender's "address:port", or "[address]:port" for
+    IPv6. pcapng files are not read.
+    """
+    with open(path, "rb") as pcap:
+        header = pcap.read(24)
+        if len(header) < 24 or header[:4] not in _PCAP_MAGIC:
+            raise ValueError(f"Not a classic pcap file: {path}")
+        order, ns_per_tick = _PCAP_MAGIC[header[:4]]
+        linktype = struct.unpack_from(f"{order}I", header, 20)[0] & 0xFFFF
+        record_header = struct.Struct(f"{order}IIII")
+
+        while True:
+            data = pcap.read(record_header.size)
+            if len(data) < record_header.size:
+                return
+            seconds, ticks, size, _ = record_header.unpack(data)
+            packet = pcap.read(size)
+            if len(packet) < size:
+                return
+            ip_packet = _ip_packet(linktype, packet)
+            if ip_packet is None:
+                continue
+            datagram = _udp_datagram(ip_packet)
+            if datagram is None:
+                continue
+            source, source_port, destination, dst_port, payload = datagram
+            if port is not None and dst_port != port:
+                continue
+            if multicast and not destination.is_multicast:
+                continue
+            yield CaptureRecord(
+                seconds * 1_000_000_000 + ticks * ns_per_tick,
+                f"{source}:{source_port}",
+                bytes(payload),
+            )
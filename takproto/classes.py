@@ -0,0 +1,743 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""TAKProto Classes for handling TAK Protocol Version 1 message streams."""
+
+import heapq
+import math
+import struct
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+from collections import OrderedDict
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from takproto.constants import (
+    DEFAULT_DETAIL_POOL_SIZE,
+    DEFAULT_MAX_FRAME_SIZE,
+    DEFAULT_PROTO_HEADER,
+    DEFAULT_TRACK_CACHE_SIZE,
+    TAKProtoVer,
+)
+from takproto.functions import (
+    _decode_varint,
+    _encode_varint,
+    _frame_header,
+    element2msg,
+    msg2proto,
+    proto2xml,
+    xml2msg,
+)
+from takproto.proto import Detail, TakMessage
+from takproto.wire import _field_spans, payload_bounds
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+class StreamDecoder:
+    """Incremental decoder for TAK Protocol Version 1 Stream messages.
+
+    Feed raw bytes to feed() as they are read from a TCP connection. Each call
+    returns every TakMessage completed by that chunk; a trailing partial frame is
+    kept until the rest of its bytes arrive. Frames are parsed from a view of one
+    growable buffer, and only the unconsumed tail is retained between calls.
+    """
+
+    def __init__(self, max_frame_size: int = DEFAULT_MAX_FRAME_SIZE) -> None:
+        self.max_frame_size = max_frame_size
+        self._buffer = bytearray()
+
+    def __len__(self) -> int:
+        """Return the number of buffered bytes not yet decoded."""
+        return len(self._buffer)
+
+    def reset(self) -> None:
+        """Discard any buffered partial frame."""
+        self._buffer.clear()
+
+    def feed(self, data) -> List[TakMessage]:
+        """Buffer data and return every complete TakMessage it finishes.
+
+        Raises ValueError on a bad magic byte, a malformed length varint, or a
+        frame larger than max_frame_size. A protocol error leaves the stream
+        unsynchronised, so the buffer is discarded before raising.
+        """
+        buffer = self._buffer
+        buffer += data
+        messages: List[TakMessage] = []
+        magic = DEFAULT_PROTO_HEADER[0]
+        end = len(buffer)
+        pos = 0
+
+        try:
+            with memoryview(buffer) as view:
+                while pos < end:
+                    if buffer[pos] != magic:
+                        raise ValueError(
+                            f"Invalid TAK Protocol Stream magic byte: {buffer[pos]:#x}"
+                        )
+                    size, start = _decode_varint(buffer, pos + 1)
+                    if size is None:
+                        break
+                    if size > self.max_frame_size:
+                        raise ValueError(
+                            f"Frame size {size} exceeds max_frame_size "
+                            f"{self.max_frame_size}"
+                        )
+                    stop = start + size
+                    if stop > end:
+                        break
+                    msg = TakMessage()
+                    msg.ParseFromString(view[start:stop])
+                    messages.append(msg)
+                    pos = stop
+        except Exception:
+            buffer.clear()
+            raise
+
+        del buffer[:pos]
+        return messages
+
+
+class XMLStreamReader:
+    """Incremental reader for TAK Protocol Version 0 (plain XML) CoT streams.
+
+    A Version 0 TCP stream is an endless series of <event> documents, each
+    usually preceded by an XML declaration. feed() accepts arbitrary chunks of
+    that stream and returns one item per <event> closed by the chunk: a
+    TakMessage, or its Mesh or Stream encoding if protover is given. Each event
+    Element is discarded once converted, so memory use does not grow with the
+    length of the connection.
+    """
+
+    _DECLARATION = b"<?xml"
+
+    def __init__(self, protover: Optional[TAKProtoVer] = None) -> None:
+        self.protover = protover
+        self._pending = b""
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        # The events are parsed as children of one synthetic document element.
+        self._parser.feed(b"<takstream>")
+        self._root: Optional[ET.Element] = None
+        self._depth = 0
+        # Source of the event being parsed, so xmlDetail can be copied from it.
+        self._source = bytearray()
+
+    def feed(self, data: bytes) -> list:
+        """Parse data and return each CoT event it completes.
+
+        Raises xml.etree.ElementTree.ParseError on malformed XML.
+        """
+        data = self._strip_declarations(data)
+        self._source += data
+        self._parser.feed(data)
+        output = []
+        for action, elem in self._parser.read_events():
+            if action == "start":
+                self._depth += 1
+                if self._root is None:
+                    self._root = elem
+                continue
+
+            self._depth -= 1
+            if self._depth != 1:
+                continue
+            if elem.tag == "event":
+                msg = element2msg(elem, self._event_source())
+                output.append(
+                    msg if self.protover is None else msg2proto(msg, self.protover)
+                )
+            self._root.clear()
+        return output
+
+    def _event_source(self) -> Optional[str]:
+        """Remove and return the source of the event that just ended."""
+        end = self._source.find(b"</event>")
+        if end == -1:
+            return None
+        end += len(b"</event>")
+        source = self._source[:end]
+        del self._source[:end]
+        try:
+            return source.decode()
+        except UnicodeDecodeError:
+            return None
+
+    def _strip_declarations(self, data: bytes) -> bytes:
+        """Remove XML declarations, which are not allowed mid-document.
+
+        A declaration, or what may be the start of one, at the end of data is held
+        back until the next call.
+        """
+        data = self._pending + bytes(data)
+        self._pending = b""
+        marker = self._DECLARATION
+        chunks = []
+        pos = 0
+        while True:
+            start = data.find(marker, pos)
+            if start == -1:
+                end = len(data)
+                for size in range(len(marker) - 1, 0, -1):
+                    if data.endswith(marker[:size]):
+                        end -= size
+                        break
+                chunks.append(data[pos:end])
+                self._pending = data[end:]
+                break
+            chunks.append(data[pos:start])
+            stop = data.find(b"?>", start)
+            if stop == -1:
+                self._pending = data[start:]
+                break
+            pos = stop + 2
+        return b"".join(chunks)
+
+
+class TrackCache:
+    """Latest TakMessage per cotEvent.uid, for de-duplicating SA traffic.
+
+    The same report often arrives more than once, over Mesh and from several
+    Stream peers. update() keeps a message only if it is newer, by sendTime,
+    than the one already held for its UID, so each report is handled once.
+
+    Entries are evicted when their staleTime passes, using a heap ordered by
+    staleTime rather than a scan of every entry. Once max_size UIDs are held,
+    the least recently updated entry makes room for a new one. Every stored
+    update gets a version number, and changed_since() returns the entries
+    updated after a given version.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_TRACK_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self.version = 0
+        # uid -> (message, version), in the order the entries were last updated.
+        # An OrderedDict, as reversed() on a dict needs Python 3.8.
+        self._entries: Dict[str, Tuple[TakMessage, int]] = OrderedDict()
+        # (staleTime, version, uid); entries whose version has moved on are dead.
+        self._stale: List[Tuple[int, int, str]] = []
+
+    def __len__(self) -> int:
+        """Return the number of UIDs held."""
+        return len(self._entries)
+
+    def __contains__(self, uid: str) -> bool:
+        """Return True if an entry is held for uid."""
+        return uid in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the UIDs held, least recently updated first."""
+        return iter(self._entries)
+
+    def get(self, uid: str) -> Optional[TakMessage]:
+        """Return the latest TakMessage for uid, or None."""
+        entry = self._entries.get(uid)
+        return None if entry is None else entry[0]
+
+    def update(self, msg: TakMessage, now: Optional[int] = None) -> bool:
+        """Store msg if it is newer than the entry for its UID.
+
+        Returns False, leaving the cache unchanged, if msg is a duplicate or an
+        out-of-order copy (sendTime not after that of the held entry) or is
+        already stale. now is the current time in milliseconds since the epoch,
+        and defaults to the system clock. Raises ValueError if msg has no UID.
+        """
+        cot_event = msg.cotEvent
+        uid = cot_event.uid
+        if not uid:
+            raise ValueError("TakMessage has no cotEvent.uid")
+        if now is None:
+            now = int(time.time() * 1000)
+        self.expire(now)
+
+        entry = self._entries.get(uid)
+        if entry is not None:
+            if cot_event.sendTime <= entry[0].cotEvent.sendTime:
+                return False
+        if cot_event.staleTime <= now:
+            return False
+
+        if entry is None and len(self._entries) >= self.max_size:
+            self._entries.popitem(last=False)
+
+        self.version += 1
+        self._entries[uid] = (msg, self.version)
+        # Keep the entries ordered by last update.
+        self._entries.move_to_end(uid)
+        heapq.heappush(self._stale, (cot_event.staleTime, self.version, uid))
+        if len(self._stale) > 2 * len(self._entries) + 64:
+            self._compact()
+        return True
+
+    def expire(self, now: Optional[int] = None) -> List[str]:
+        """Evict and return the UIDs whose staleTime is at or before now."""
+        if now is None:
+            now = int(time.time() * 1000)
+        stale = self._stale
+        entries = self._entries
+        expired = []
+        while stale and stale[0][0] <= now:
+            _, version, uid = heapq.heappop(stale)
+            entry = entries.get(uid)
+            if entry is not None and entry[1] == version:
+                del entries[uid]
+                expired.append(uid)
+        return expired
+
+    def changed_since(self, version: int) -> Iterator[Tuple[str, TakMessage]]:
+        """Iterate over (uid, message) updated after version, oldest first.
+
+        Only the changed entries are visited, so polling with the previous
+        value of the version attribute costs time proportional to the changes.
+        """
+        changed = []
+        for uid in reversed(self._entries):
+            msg, entry_version = self._entries[uid]
+            if entry_version <= version:
+                break
+            changed.append((uid, msg))
+        return reversed(changed)
+
+    def _compact(self) -> None:
+        """Rebuild the stale-time heap without the entries of replaced messages."""
+        self._stale = [
+            (msg.cotEvent.staleTime, version, uid)
+            for uid, (msg, version) in self._entries.items()
+        ]
+        heapq.heapify(self._stale)
+
+
+_COT_EVENT_FIELDS = TakMessage.DESCRIPTOR.fields_by_name["cotEvent"].message_type
+_TIME_NUMBERS = tuple(
+    _COT_EVENT_FIELDS.fields_by_name[name].number
+    for name in ("sendTime", "startTime", "staleTime")
+)
+_POSITION_NUMBERS = tuple(
+    _COT_EVENT_FIELDS.fields_by_name[name].number for name in ("lat", "lon")
+)
+
+# Mean Earth radius in meters.
+_EARTH_RADIUS = 6371008.8
+
+
+def _distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Return the approximate distance in meters between two nearby points."""
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return _EARTH_RADIUS * math.hypot(x, y)
+
+
+class _Layout(NamedTuple):
+    """Where the fields of a frame are, for comparing it with the next one."""
+
+    size: int
+    # (offset, bytes) of each run between the time & position values.
+    segments: List[Tuple[int, bytes]]
+    # (start, end, mask, expected) of each time varint: the continuation bits
+    # of its bytes, read as a little-endian int and masked, are as expected.
+    times: List[Optional[Tuple[int, int, int, int]]]
+
+
+class _Sent:
+    """The last frame sent for a UID, see DeltaEncoder."""
+
+    __slots__ = ("frame", "layout", "send_time", "lat", "lon")
+
+    def __init__(self, frame, layout: _Layout, cot_event) -> None:
+        self.frame = bytearray(frame)
+        self.layout = layout
+        self.send_time = cot_event.sendTime
+        self.lat = cot_event.lat
+        self.lon = cot_event.lon
+
+
+def _layout(frame) -> _Layout:
+    """Return the _Layout of frame."""
+    spans = _field_spans(frame, _TIME_NUMBERS + _POSITION_NUMBERS)
+    segments = []
+    pos = 0
+    for start, end in sorted(spans.values()):
+        segments.append((pos, bytes(frame[pos:start])))
+        pos = end
+    segments.append((pos, bytes(frame[pos:])))
+
+    times = []
+    for number in _TIME_NUMBERS:
+        span = spans.get(number)
+        if span is None:
+            times.append(None)
+            continue
+        start, end = span
+        mask = int.from_bytes(b"\x80" * (end - start), "little")
+        times.append((start, end, mask, mask >> 8))
+    return _Layout(len(frame), segments, times)
+
+
+def _same_layout(frame, layout: _Layout) -> bool:
+    """Return True if frame differs from layout only in times & position.
+
+    The bytes outside the time and position values must match, and each time
+    varint must be of the same size, so that every field is at the same offset.
+    """
+    if len(frame) != layout.size:
+        return False
+    for pos, segment in layout.segments:
+        if not frame.startswith(segment, pos):
+            return False
+    for span in layout.times:
+        if span is not None:
+            start, end, mask, expected = span
+            if int.from_bytes(frame[start:end], "little") & mask != expected:
+                return False
+    return True
+
+
+class DeltaEncoder:
+    """TAK Protocol Version 1 encoder that suppresses repeated SA updates.
+
+    Stationary units re-announce the same SA every few seconds with only
+    sendTime, startTime and staleTime moved on. The encoder remembers the last
+    frame sent for each cotEvent.uid and compares each new frame with it,
+    skipping over the times and position.
+
+    encode() returns None instead of a frame when the update can be suppressed:
+    nothing but the times changed, or the point moved no more than min_distance
+    meters, and less than min_interval milliseconds of sendTime have passed
+    since the last frame sent. The default min_interval of 0 never suppresses.
+    An update whose sendTime is earlier than that of the last frame sent, which
+    arrived out of order, is never suppressed either: it is returned, and the
+    following updates are compared with it.
+
+    refresh() re-sends the last frame for a UID with new times patched into it,
+    for re-announcing SA without building and serializing a TakMessage. That
+    is several times faster than msg2proto() with the pure Python protobuf
+    backend; the upb and cpp backends serialize an SA message faster still.
+    """
+
+    def __init__(
+        self,
+        protover: Optional[TAKProtoVer] = None,
+        min_interval: int = 0,
+        min_distance: float = 0.0,
+        max_size: int = DEFAULT_TRACK_CACHE_SIZE,
+    ) -> None:
+        self.protover = protover or TAKProtoVer.MESH
+        self.min_interval = min_interval
+        self.min_distance = min_distance
+        self.max_size = max_size
+        # uid -> last frame sent, least recently sent first.
+        self._sent: Dict[str, _Sent] = {}
+
+    def __len__(self) -> int:
+        """Return the number of UIDs with a remembered frame."""
+        return len(self._sent)
+
+    def forget(self, uid: str) -> None:
+        """Discard the remembered frame for uid, if any."""
+        self._sent.pop(uid, None)
+
+    def encode(self, msg: TakMessage) -> Optional[bytearray]:
+        """Return msg as a TAK Protocol Version 1 frame, or None to suppress it."""
+        frame = msg2proto(msg, self.protover)
+        cot_event = msg.cotEvent
+        uid = cot_event.uid
+        if not uid:
+            return frame
+
+        sent = self._sent.pop(uid, None)
+        if sent is not None and _same_layout(frame, sent.layout):
+            if self._suppress(cot_event, sent):
+                self._sent[uid] = sent
+                return None
+            # Only the times or position changed, so the layout still holds.
+            self._sent[uid] = _Sent(frame, sent.layout, cot_event)
+            return frame
+
+        if sent is None and len(self._sent) >= self.max_size:
+            del self._sent[next(iter(self._sent))]
+        self._sent[uid] = _Sent(frame, _layout(frame), cot_event)
+        return frame
+
+    def refresh(
+        self, uid: str, send_time: int, start_time: int, stale_time: int
+    ) -> Optional[bytearray]:
+        """Return the last frame sent for uid with new times patched in.
+
+        Returns None if there is no frame for uid, or if a new time does not
+        fit the encoded size of the old one; encode() the TakMessage instead.
+        """
+        sent = self._sent.get(uid)
+        if sent is None:
+            return None
+        patches = []
+        for span, value in zip(sent.layout.times, (send_time, start_time, stale_time)):
+            if span is None or not value:
+                return None
+            varint = _encode_varint(value)
+            if len(varint) != span[1] - span[0]:
+                return None
+            patches.append((span[0], span[1], varint))
+
+        frame = sent.frame
+        for start, end, varint in patches:
+            frame[start:end] = varint
+        sent.send_time = send_time
+        return bytearray(frame)
+
+    def _suppress(self, cot_event, sent: _Sent) -> bool:
+        """Return True if cot_event may be suppressed after sent."""
+        if self.min_interval <= 0:
+            return False
+        elapsed = cot_event.sendTime - sent.send_time
+        if not 0 <= elapsed < self.min_interval:
+            return False
+        lat, lon = cot_event.lat, cot_event.lon
+        if lat == sent.lat and lon == sent.lon:
+            return True
+        return _distance(sent.lat, sent.lon, lat, lon) <= self.min_distance
+
+
+class EncodedEvent:
+    """One CoT event, encoded on demand in each TAK Protocol format.
+
+    A gateway fanning an event out to XML, Mesh and Stream peers can share one
+    EncodedEvent between all of them: the TakMessage is serialized at most once,
+    and the xml, mesh and stream encodings are each built on first use and
+    memoized. The encodings are bytes, so they can be sent to any number of
+    peers. The TakMessage must not be modified once an encoding is built.
+    """
+
+    __slots__ = ("_message", "_xml", "_payload", "_mesh", "_stream")
+
+    def __init__(
+        self,
+        message: Optional[TakMessage] = None,
+        xml: Optional[str] = None,
+        payload: Optional[bytes] = None,
+    ) -> None:
+        if message is None and xml is None and payload is None:
+            raise ValueError("EncodedEvent needs a message, xml or payload")
+        self._message = message
+        self._xml = xml
+        self._payload = payload
+        self._mesh: Optional[bytes] = None
+        self._stream: Optional[bytes] = None
+
+    @classmethod
+    def from_xml(cls, xml: str) -> "EncodedEvent":
+        """Return an EncodedEvent for a CoT XML document, parsed once."""
+        return cls(xml2msg(xml), xml=xml)
+
+    @classmethod
+    def from_frame(cls, frame) -> "EncodedEvent":
+        """Return an EncodedEvent for a TAK Protocol Version 1 Mesh or Stream frame.
+
+        The payload is kept as received, so re-framing it does not serialize it
+        again; the TakMessage is only parsed if message or xml is used.
+        """
+        start, end = payload_bounds(frame)
+        return cls(payload=bytes(frame[start:end]))
+
+    @property
+    def message(self) -> TakMessage:
+        """Return the TakMessage."""
+        if self._message is None:
+            if self._payload is None:
+                self._message = xml2msg(self._xml)
+            else:
+                self._message = TakMessage.FromString(self._payload)
+        return self._message
+
+    @property
+    def payload(self) -> bytes:
+        """Return the serialized TakMessage, without a TAK Protocol header."""
+        if self._payload is None:
+            self._payload = self.message.SerializeToString()
+        return self._payload
+
+    @property
+    def xml(self) -> str:
+        """Return the event as TAK Protocol Version 0 (CoT XML)."""
+        if self._xml is None:
+            self._xml = proto2xml(self.message)
+        return self._xml
+
+    @property
+    def mesh(self) -> bytes:
+        """Return the event as a TAK Protocol Version 1 Mesh message."""
+        if self._mesh is None:
+            payload = self.payload
+            self._mesh = bytes(_frame_header(TAKProtoVer.MESH, len(payload)) + payload)
+        return self._mesh
+
+    @property
+    def stream(self) -> bytes:
+        """Return the event as a TAK Protocol Version 1 Stream message."""
+        if self._stream is None:
+            payload = self.payload
+            self._stream = bytes(
+                _frame_header(TAKProtoVer.STREAM, len(payload)) + payload
+            )
+        return self._stream
+
+    def encode(self, protover: TAKProtoVer) -> Union[bytes, str]:
+        """Return the event in protover: xml for XML, else mesh or stream."""
+        if protover == TAKProtoVer.MESH:
+            return self.mesh
+        if protover == TAKProtoVer.STREAM:
+            return self.stream
+        if protover == TAKProtoVer.XML:
+            return self.xml
+        raise ValueError(f"Unsupported TAKProtoVer: {protover}")
+
+
+# The CotEvent fields EventRecord interns, then those it packs, in order.
+_RECORD_STRINGS = ("uid", "type", "how", "access", "qos", "opex")
+_RECORD_NUMBERS = (
+    "sendTime",
+    "startTime",
+    "staleTime",
+    "lat",
+    "lon",
+    "hae",
+    "ce",
+    "le",
+)
+_RECORD_STRUCT = struct.Struct("<QQQddddd")
+
+
+def _packed(index: int) -> property:
+    """Return a property reading item index of an EventRecord's packed numbers."""
+
+    def get(self):
+        return _RECORD_STRUCT.unpack(self._numbers)[index]
+
+    return property(get, doc=f"Return the CotEvent {_RECORD_NUMBERS[index]}.")
+
+
+class DetailPool:
+    """Bounded pool of serialized Details, shared by the EventRecords of a store.
+
+    Successive reports of an entity often repeat its Detail, so records built
+    with the same pool share one bytes object for equal Details. The pool holds
+    at most max_size Details, dropping the oldest first, so Details that change
+    with every report do not accumulate.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_DETAIL_POOL_SIZE) -> None:
+        self.max_size = max_size
+        self._details: Dict[bytes, bytes] = {}
+
+    def __len__(self) -> int:
+        return len(self._details)
+
+    def get(self, detail: bytes) -> bytes:
+        """Return the pooled bytes equal to detail, adding detail if absent."""
+        details = self._details
+        shared = details.get(detail)
+        if shared is None:
+            if len(details) >= self.max_size:
+                del details[next(iter(details))]
+            shared = details[detail] = detail
+        return shared
+
+
+class EventRecord:
+    """Compact, immutable record of one CoT event, for large in-memory stores.
+
+    A TakMessage costs several KB; an EventRecord holds the same event in a few
+    hundred bytes, and less for repeated reports of the same entity. The uid,
+    type, how, access, qos and opex strings are interned, so repeated values
+    are shared; the serialized Detail is shared through details, a DetailPool,
+    if one is given; the times and point are packed into one bytes object of
+    integers and doubles; and Detail and TakControl are only parsed on access.
+    to_message() rebuilds a TakMessage that serializes identically to the
+    original.
+    """
+
+    __slots__ = _RECORD_STRINGS + ("_numbers", "_detail", "_control")
+
+    sendTime = _packed(0)
+    startTime = _packed(1)
+    staleTime = _packed(2)
+    lat = _packed(3)
+    lon = _packed(4)
+    hae = _packed(5)
+    ce = _packed(6)
+    le = _packed(7)
+
+    def __init__(self, msg: TakMessage, details: Optional[DetailPool] = None) -> None:
+        if not msg.HasField("cotEvent"):
+            raise ValueError("TakMessage has no cotEvent")
+        cot_event = msg.cotEvent
+        intern = sys.intern
+        for name in _RECORD_STRINGS:
+            setattr(self, name, intern(getattr(cot_event, name)))
+        self._numbers = _RECORD_STRUCT.pack(
+            *[getattr(cot_event, name) for name in _RECORD_NUMBERS]
+        )
+        self._detail: Optional[bytes] = None
+        if cot_event.HasField("detail"):
+            detail = cot_event.detail.SerializeToString()
+            self._detail = detail if details is None else details.get(detail)
+        self._control: Optional[bytes] = (
+            msg.takControl.SerializeToString() if msg.HasField("takControl") else None
+        )
+
+    @classmethod
+    def from_frame(cls, frame, details: Optional[DetailPool] = None) -> "EventRecord":
+        """Return the EventRecord of a TAK Protocol Version 1 Mesh or Stream frame."""
+        start, end = payload_bounds(frame)
+        return cls(TakMessage.FromString(bytes(frame[start:end])), details)
+
+    @property
+    def detail(self) -> Detail:
+        """Return the Detail message, parsed anew on each access."""
+        if self._detail is None:
+            return Detail()
+        return Detail.FromString(self._detail)
+
+    def to_message(self) -> TakMessage:
+        """Return the event as a new TakMessage."""
+        msg = TakMessage()
+        if self._control is not None:
+            msg.takControl.SetInParent()
+            msg.takControl.MergeFromString(self._control)
+        cot_event = msg.cotEvent
+        cot_event.SetInParent()
+        for name in _RECORD_STRINGS:
+            setattr(cot_event, name, getattr(self, name))
+        for name, value in zip(_RECORD_NUMBERS, _RECORD_STRUCT.unpack(self._numbers)):
+            setattr(cot_event, name, value)
+        if self._detail is not None:
+            cot_event.detail.SetInParent()
+            cot_event.detail.MergeFromString(self._detail)
+        return msg
+
+    def to_frame(self, protover: Optional[TAKProtoVer] = None) -> bytearray:
+        """Return the event as a TAK Protocol Version 1 Mesh or Stream frame."""
+        return msg2proto(self.to_message(), protover)
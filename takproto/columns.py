@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""TAKProto Functions for exporting decoded CoT Events as NumPy columns.
+
+NumPy is an optional dependency: pip install takproto[numpy]
+"""
+
+import sys
+
+from typing import Iterable, List, Optional, Sequence, Union
+
+from takproto.constants import TAKProtoVer
+from takproto.functions import parse_proto
+from takproto.proto import CotEvent, TakMessage
+from takproto.wire import _field_spans, encode_cot_event
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+COLUMNS = (
+    ("uid", "O"),
+    ("type", "O"),
+    ("lat", "f8"),
+    ("lon", "f8"),
+    ("hae", "f8"),
+    ("ce", "f8"),
+    ("le", "f8"),
+    ("sendTime", "u8"),
+    ("staleTime", "u8"),
+    ("speed", "f8"),
+    ("course", "f8"),
+)
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError(
+            "NumPy is required for columnar export: pip install takproto[numpy]"
+        )
+
+
+def to_columns(messages: Iterable[TakMessage]):
+    """Return the CoT Events of messages as a NumPy structured array.
+
+    The array has one record per message and the fields listed in COLUMNS; speed
+    and course come from detail.track. uid and type are interned, so repeated
+    values share one string object.
+    """
+    _require_numpy()
+    intern = sys.intern
+    rows = []
+    append = rows.append
+    for msg in messages:
+        event = msg.cotEvent
+        track = event.detail.track
+        append(
+            (
+                intern(event.uid),
+                intern(event.type),
+                event.lat,
+                event.lon,
+                event.hae,
+                event.ce,
+                event.le,
+                event.sendTime,
+                event.staleTime,
+                track.speed,
+                track.course,
+            )
+        )
+    return np.array(rows, dtype=list(COLUMNS))
+
+
+def decode_to_arrays(frames: Iterable[bytes]):
+    """Decode TAK Protocol Version 1 Mesh or Stream frames into a structured array.
+
+    Frames that are not TAK Protocol Version 1 are skipped. See to_columns().
+    """
+    _require_numpy()
+    parsed = (parse_proto(frame) for frame in frames)
+    return to_columns(msg for msg in parsed if msg is not None)
+
+
+# Placeholders giving every field of a ColumnEncoder frame a fixed size: six
+# byte varint times, and non-zero doubles, which protobuf does not omit.
+_TIME_PLACEHOLDER = 1 << 35
+_TIME_LIMIT = 1 << 42
+_TIME_NUMBERS = tuple(
+    CotEvent.DESCRIPTOR.fields_by_name[name].number
+    for name in ("sendTime", "startTime", "staleTime")
+)
+_POINT_NUMBERS = tuple(
+    CotEvent.DESCRIPTOR.fields_by_name[name].number
+    for name in ("lat", "lon", "hae", "ce", "le")
+)
+# The path to Track from CotEvent, through Detail, and its speed & course.
+_DETAIL_FIELD = CotEvent.DESCRIPTOR.fields_by_name["detail"]
+_TRACK_FIELD = _DETAIL_FIELD.message_type.fields_by_name["track"]
+_TRACK_PATH = (_DETAIL_FIELD.number, _TRACK_FIELD.number)
+_TRACK_NUMBERS = tuple(
+    _TRACK_FIELD.message_type.fields_by_name[name].number
+    for name in ("speed", "course")
+)
+
+
+def _per_entity(name: str, values: Union[str, Sequence, None], count: int) -> list:
+    """Return values as a list of count items, repeating a single str or None."""
+    if values is None or isinstance(values, str):
+        return [values] * count
+    values = list(values)
+    if len(values) != count:
+        raise ValueError(f"{name} has {len(values)} items for {count} uids")
+    return values
+
+
+class ColumnEncoder:
+    """Encode the CotEvents of many entities each tick from NumPy columns.
+
+    The uid, type, how, contact and group of each entity are fixed when the
+    encoder is created, and each entity's frame is laid out once. encode() then
+    only writes the times, point and (with track=True) track of every entity,
+    as a few vectorized NumPy operations over one buffer of all the frames.
+
+    So that each frame keeps its layout, zero doubles are written rather than
+    omitted as msg2proto() does; the frames parse to the same TakMessage. Times
+    are milliseconds since the epoch, from 1971 until 2109. uids must not be
+    empty.
+    """
+
+    def __init__(  # NOQA pylint: disable=too-many-arguments
+        self,
+        uids: Sequence[str],
+        types: Union[str, Sequence[str]],
+        how: Union[str, Sequence[str]] = "m-g",
+        *,
+        callsigns: Union[str, Sequence[str], None] = None,
+        endpoints: Union[str, Sequence[str], None] = None,
+        group_names: Union[str, Sequence[str], None] = None,
+        group_roles: Union[str, Sequence[str], None] = None,
+        track: bool = False,
+        protover: Optional[TAKProtoVer] = None,
+    ) -> None:
+        _require_numpy()
+        uids = list(uids)
+        count = len(uids)
+        if not count:
+            raise ValueError("ColumnEncoder needs at least one uid")
+        self.track = track
+        columns = zip(
+            uids,
+            _per_entity("types", types, count),
+            _per_entity("how", how, count),
+            _per_entity("callsigns", callsigns, count),
+            _per_entity("endpoints", endpoints, count),
+            _per_entity("group_names", group_names, count),
+            _per_entity("group_roles", group_roles, count),
+        )
+
+        frames = []
+        time_index = []
+        point_index = []
+        start = 0
+        for uid, cot_type, cot_how, callsign, endpoint, name, role in columns:
+            frame = encode_cot_event(
+                uid,
+                cot_type,
+                cot_how,
+                _TIME_PLACEHOLDER,
+                _TIME_PLACEHOLDER + 1,
+                _TIME_PLACEHOLDER + 2,
+                1.0,
+                1.0,
+                1.0,
+                1.0,
+                1.0,
+                callsign=callsign,
+                endpoint=endpoint,
+                group_name=name,
+                group_role=role,
+                speed=1.0 if track else None,
+                course=1.0 if track else None,
+                protover=protover,
+            )
+            spans = _field_spans(frame, _TIME_NUMBERS + _POINT_NUMBERS)
+            time_index.append([start + spans[number][0] for number in _TIME_NUMBERS])
+            points = [start + spans[number][0] for number in _POINT_NUMBERS]
+            if track:
+                spans = _field_spans(frame, _TRACK_NUMBERS, _TRACK_PATH)
+                points += [start + spans[number][0] for number in _TRACK_NUMBERS]
+            point_index.append(points)
+            frames.append(frame)
+            start += len(frame)
+
+        self.offsets = np.cumsum([0] + [len(frame) for frame in frames])
+        self._template = np.frombuffer(b"".join(frames), dtype=np.uint8)
+        # Byte positions of every value, in the order encode() lays them out.
+        self._time_index = (
+            np.array(time_index, dtype=np.intp).reshape((count, -1, 1)) + np.arange(6)
+        ).reshape((count, -1))
+        self._point_index = (
+            np.array(point_index, dtype=np.intp).reshape((count, -1, 1)) + np.arange(8)
+        ).reshape((count, -1))
+        self._shifts = np.arange(0, 42, 7, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def encode(  # NOQA pylint: disable=too-many-arguments
+        self,
+        send_time,
+        start_time,
+        stale_time,
+        lat,
+        lon,
+        hae=0.0,
+        ce=0.0,
+        le=0.0,
+        speed=0.0,
+        course=0.0,
+    ) -> bytes:
+        """Return the frames of every entity, concatenated in uid order.
+
+        Each argument is an array with one value per entity, or a scalar shared
+        by all of them; speed and course are only used with track=True. Stream
+        frames can be sent as they are, and offsets gives the bounds of each
+        frame. Raises ValueError for a time outside 1971 to 2109.
+        """
+        count = len(self)
+        buf = self._template.copy()
+
+        times = np.empty((count, 3), dtype=np.uint64)
+        for column, value in enumerate((send_time, start_time, stale_time)):
+            value = np.asarray(value)
+            if ((value < _TIME_PLACEHOLDER) | (value >= _TIME_LIMIT)).any():
+                raise ValueError("Times must be milliseconds from 1971 until 2109")
+            times[:, column] = value
+        varints = (times[:, :, np.newaxis] >> self._shifts & 0x7F).astype(np.uint8)
+        varints[:, :, :5] |= 0x80
+        buf[self._time_index] = varints.reshape(count, -1)
+
+        values = [lat, lon, hae, ce, le]
+        if self.track:
+            values += [speed, course]
+        points = np.empty((count, len(values)), dtype="<f8")
+        for column, value in enumerate(values):
+            points[:, column] = value
+        buf[self._point_index] = points.view(np.uint8)
+        return buf.tobytes()
+
+    def frames(self, *args, **kwargs) -> List[bytes]:
+        """Return the frame of each entity as a list, see encode().
+
+        For Mesh, each frame is one datagram.
+        """
+        data = self.encode(*args, **kwargs)
+        bounds = self.offsets.tolist()
+        return [data[start:end] for start, end in zip(bounds, bounds[1:])]
@@ -31,9 +31,31 @@ __copyright__ = "Copyright 2023 Sensors & Signals LLC"
 __license__ = "Apache License, Version 2.0"
 
 
+CAPTURE_MAGIC = b"TAKCAP\x00\x01"
 DEFAULT_PROTO_HEADER = bytearray(b"\xbf")
 DEFAULT_MESH_HEADER = bytearray(b"\xbf\x01\xbf")
+DEFAULT_BULK_CHUNK_SIZE = 256
+DEFAULT_CAPTURE_BUFFER_SIZE = 1024 * 1024
+DEFAULT_DETAIL_POOL_SIZE = 65_536
+DEFAULT_INDEX_BLOCK_SIZE = 4096
+DEFAULT_MAX_FRAME_SIZE = 1024 * 1024
+DEFAULT_MESH_GROUP = "239.2.3.1"
+DEFAULT_MESH_PORT = 6969
+DEFAULT_METRICS_HOST = "127.0.0.1"
+DEFAULT_QUEUE_SIZE = 1024
+DEFAULT_SCAN_FIELDS = ("uid", "type", "lat", "lon", "staleTime")
+DEFAULT_SIZE_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 16384, 65536)
+DEFAULT_TRACK_CACHE_SIZE = 200_000
+INDEX_MAGIC = b"TAKIDX\x00\x01"
+INDEX_SUFFIX = ".idx"
 ISO_8601_UTC = "%Y-%m-%dT%H:%M:%S.%fZ"
+TAK_CONTROL_TIMEOUT = 120_000
+TAKP_NEGOTIATION_TIMEOUT = 60_000
+TAKP_QUERY = "t-x-takp-q"
+TAKP_RESPONSE = "t-x-takp-r"
+TAKP_VERSION = "t-x-takp-v"
+TIME_CACHE_SIZE = 256
+XML_DECLARATION = "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
 
 
 class TAKProtoVer(Enum):
@@ -42,3 +64,12 @@ class TAKProtoVer(Enum):
     XML = 0
     MESH = 1
     STREAM = 2
+
+
+class NegotiationState(Enum):
+    """Enumerator for the states of Streaming Connection Protocol Negotiation."""
+
+    XML = 0
+    OFFERED = 1
+    REQUESTED = 2
+    NEGOTIATED = 3
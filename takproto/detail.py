@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""TAKProto registry of converters between <detail> elements & Detail messages.
+
+Each registered tag maps a child element of <detail> to one of the strongly
+typed fields of the Detail message. xml2proto() dispatches every child of
+<detail> through this table in a single pass; children without a converter, or
+whose conversion fails, are left for xmlDetail.
+"""
+
+import re
+import xml.etree.ElementTree as ET
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+    Union,
+)
+
+from takproto.proto import Detail
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+class DetailConverter(NamedTuple):
+    """How to convert one <detail> child element.
+
+    field is the Detail sub-message to populate. func(elem, sub_message) does the
+    conversion and raises ValueError or TypeError to reject the element. attribs
+    lists the (attribute, coercion) pairs of attribute-spec converters; it is
+    empty for custom converters. render(sub_message) returns the (attribute,
+    value) pairs proto2xml() renders the sub-message back to XML with.
+    """
+
+    field: str
+    func: Callable[[ET.Element, Any], None]
+    attribs: Tuple[Tuple[str, Callable[[str], Any]], ...]
+    pattern: Pattern
+    render: Callable[[Any], Iterable[Tuple[str, Any]]]
+
+
+DETAIL_CONVERTERS: Dict[str, DetailConverter] = {}
+
+
+def _attribute_converter(
+    attribs: Tuple[Tuple[str, Callable[[str], Any]], ...],
+) -> Callable[[ET.Element, Any], None]:
+    """Return a converter copying attribs from an element to a sub-message."""
+
+    def convert(elem: ET.Element, sub_message) -> None:
+        get = elem.get
+        for attrib, coerce in attribs:
+            value = get(attrib)
+            if value:
+                setattr(sub_message, attrib, coerce(value))
+
+    return convert
+
+
+def _attribute_renderer(
+    attribs: Tuple[Tuple[str, Callable[[str], Any]], ...],
+) -> Callable[[Any], Iterable[Tuple[str, Any]]]:
+    """Return a renderer of the attribs fields of a sub-message."""
+
+    def render(sub_message) -> Iterable[Tuple[str, Any]]:
+        return [(attrib, getattr(sub_message, attrib)) for attrib, _ in attribs]
+
+    return render
+
+
+def register_detail(
+    tag: str,
+    field: str,
+    converter: Union[
+        Mapping[str, Callable[[str], Any]], Callable[[ET.Element, Any], None]
+    ],
+    render: Optional[Callable[[Any], Iterable[Tuple[str, Any]]]] = None,
+) -> None:
+    """Register the converter for <detail> child elements named tag.
+
+    field is the name of the Detail sub-message the element populates. converter
+    is either a mapping of attribute name to coercion (such as str or float), in
+    which case each attribute is copied to the sub-message field of the same
+    name, or a callable(elem, sub_message) that populates the sub-message itself.
+    A callable converter needs render, a callable(sub_message) returning the
+    (attribute, value) pairs of the element proto2xml() writes back. Replaces
+    any converter already registered for tag. Raises ValueError if field or an
+    attribute is not in detail.proto.
+    """
+    descriptor = Detail.DESCRIPTOR.fields_by_name.get(field)
+    if descriptor is None or descriptor.message_type is None:
+        raise ValueError(f"Detail has no sub-message {field!r}")
+    if callable(converter):
+        if render is None:
+            raise ValueError(f"Custom converter for {tag!r} needs a render function")
+        func, attribs = converter, ()
+    else:
+        attribs = tuple(converter.items())
+        for attrib, _ in attribs:
+            if attrib not in descriptor.message_type.fields_by_name:
+                raise ValueError(f"Detail.{field} has no field {attrib!r}")
+        func = _attribute_converter(attribs)
+        render = render or _attribute_renderer(attribs)
+    DETAIL_CONVERTERS[tag] = DetailConverter(
+        field, func, attribs, re.compile(f"<{re.escape(tag)}[\\s/>]"), render
+    )
+
+
+def unregister_detail(tag: str) -> None:
+    """Remove the converter for tag, so its elements are kept in xmlDetail."""
+    DETAIL_CONVERTERS.pop(tag, None)
+
+
+def convert_detail(detail: ET.Element, new_detail) -> List[ET.Element]:
+    """Populate the Detail message new_detail from the <detail> Element detail.
+
+    Returns the children that were not converted, in document order. Following
+    detail.proto, a tag that appears more than once, or whose conversion raises
+    ValueError or TypeError, is not converted and all of its elements remain.
+    """
+    children = list(detail)
+    converted = convert_children([(elem.tag, elem) for elem in children], new_detail)
+    if not converted:
+        return children
+    return [elem for index, elem in enumerate(children) if index not in converted]
+
+
+def convert_children(children: List[Tuple[str, Any]], new_detail) -> Set[int]:
+    """Populate new_detail from (tag, element) pairs, see convert_detail().
+
+    Returns the indices of the children that were converted. The element of a
+    child is only passed to its converter; attribute converters only call its
+    get() method, so a dict of the attributes will do in place of an Element.
+    """
+    converters = DETAIL_CONVERTERS
+    matched: Dict[str, Any] = {}
+    for index, (tag, _) in enumerate(children):
+        if tag in converters:
+            matched[tag] = None if tag in matched else index
+
+    converted = set()
+    for tag, index in matched.items():
+        if index is None:
+            continue
+        converter = converters[tag]
+        try:
+            converter.func(children[index][1], getattr(new_detail, converter.field))
+        except (ValueError, TypeError):
+            new_detail.ClearField(converter.field)
+            continue
+        converted.add(index)
+    return converted
+
+
+register_detail("contact", "contact", {"endpoint": str, "callsign": str})
+register_detail("__group", "group", {"name": str, "role": str})
+register_detail(
+    "precisionlocation", "precisionLocation", {"geopointsrc": str, "altsrc": str}
+)
+register_detail("status", "status", {"battery": int})
+register_detail(
+    "takv", "takv", {"device": str, "platform": str, "os": str, "version": str}
+)
+# The fields in track are double-precision floating-point numbers. We can use
+# Python's native float, since that is actually 64-bit floating-point.
+register_detail("track", "track", {"speed": float, "course": float})
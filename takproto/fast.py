@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""TAKProto fast path for converting common CoT XML events to Protobuf.
+
+Most CoT traffic is SA: an <event> with a <point> and a <detail> of empty
+elements such as contact, __group, status, takv and track. fast_xml2msg()
+recognizes that shape with a few precompiled regular expressions, without
+building an ElementTree, and falls back to xml2msg() for anything else. Both
+paths produce identical TakMessages.
+"""
+
+import re
+import xml.etree.ElementTree as ET
+
+from typing import Dict, List, Optional, Tuple
+
+from takproto.constants import TAKProtoVer
+from takproto.detail import DETAIL_CONVERTERS, convert_children
+from takproto.functions import format_time, msg2proto, xml2msg
+from takproto.proto import TakMessage
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+_NAME = r"[A-Za-z_][\w.-]*"
+# Attribute values without entity references or characters that an XML parser
+# would normalize or reject, so that they can be used as they are.
+_VALUE = r"(?:'[^'<&\t\n\r]*'|\"[^\"<&\t\n\r]*\")"
+_ATTRS = rf"(?:\s+{_NAME}\s*=\s*{_VALUE})*\s*"
+# The whole document: an <event> holding an empty <point> and a <detail> of
+# empty elements, both optional, in that order.
+_EVENT_RE = re.compile(
+    r"\s*(?:<\?xml\s[^<>?]*\?>)?\s*"
+    rf"<event({_ATTRS})>\s*"
+    rf"(?:<point({_ATTRS})/>\s*)?"
+    rf"(?:<detail{_ATTRS}(?:/>|>((?:\s*<{_NAME}{_ATTRS}/>)*)\s*</detail>)\s*)?"
+    r"</event>\s*"
+)
+# The name of each start tag and each attribute (name, value in ', value in ").
+_TOKEN_RE = re.compile(rf"<({_NAME})|({_NAME})\s*=\s*(?:'([^']*)'|\"([^\"]*)\")")
+_ELEMENT_RE = re.compile(rf"<{_NAME}{_ATTRS}/>")
+
+_EVENT_ATTRIBS = ("type", "access", "qos", "opex", "uid", "how")
+_TIME_ATTRIBS = (("time", "sendTime"), ("start", "startTime"), ("stale", "staleTime"))
+_POINT_ATTRIBS = ("lat", "lon", "hae", "ce", "le")
+
+
+def _elements(xml: str, pos: int, end: int) -> List[Tuple[str, Dict[str, str]]]:
+    """Return the (tag, attributes) of each element in xml[pos:end].
+
+    Raises ValueError if an element has the same attribute twice.
+    """
+    elements = []
+    attrib: Dict[str, str] = {}
+    for tag, name, single, double in _TOKEN_RE.findall(xml, pos, end):
+        if tag:
+            attrib = {}
+            elements.append((tag, attrib))
+        elif name in attrib:
+            raise ValueError(f"Duplicate attribute {name}")
+        else:
+            attrib[name] = single or double
+    return elements
+
+
+def _scan2msg(xml: str) -> Optional[TakMessage]:
+    """Convert an event of the common shape to a TakMessage, or return None.
+
+    Raises ValueError if the event has that shape but cannot be converted.
+    """
+    match = _EVENT_RE.fullmatch(xml)
+    if match is None:
+        return None
+    # <event>, then <point> and <detail> if present, then the detail children.
+    elements = _elements(xml, match.start(1) - len("<event"), match.end())
+    event = elements[0][1]
+    children = elements[1:]
+    point = None
+    if match.group(2) is not None:
+        point = children.pop(0)[1]
+    has_detail = children and children.pop(0)[0] == "detail"
+
+    tak_message = TakMessage()
+    new_event = tak_message.cotEvent
+    uid = event.get("uid")
+    if uid and "GeoChat." in uid:
+        tak_message.takControl.contactUid = uid.split(".")[1]
+
+    for attrib in _EVENT_ATTRIBS:
+        val = event.get(attrib)
+        if val:
+            setattr(new_event, attrib, val)
+    for attrib, field in _TIME_ATTRIBS:
+        val = event.get(attrib)
+        if val:
+            setattr(new_event, field, format_time(val))
+    if point is not None:
+        for attrib in _POINT_ATTRIBS:
+            val = point.get(attrib)
+            if val:
+                setattr(new_event, attrib, float(val))
+
+    if has_detail and children:
+        # Attribute converters accept the attribute dicts, custom ones need an
+        # Element; either way the conversion is shared with the ElementTree path.
+        for index, (tag, attrib) in enumerate(children):
+            converter = DETAIL_CONVERTERS.get(tag)
+            if converter is not None and not converter.attribs:
+                children[index] = (tag, ET.Element(tag, attrib))
+        converted = convert_children(children, new_event.detail)
+        if len(converted) < len(children):
+            sources = _ELEMENT_RE.findall(xml, match.start(3), match.end(3))
+            new_event.detail.xmlDetail = "".join(
+                source for index, source in enumerate(sources) if index not in converted
+            )
+
+    return tak_message
+
+
+def fast_xml2msg(xml: str) -> TakMessage:
+    """Convert plain XML CoT to a TakMessage, skipping ElementTree if possible.
+
+    Events made of a <point> and a <detail> of empty elements, with attribute
+    values free of entity references, are converted by a regular expression
+    scanner. Anything else, including malformed XML, goes to xml2msg().
+    """
+    if isinstance(xml, str):
+        try:
+            tak_message = _scan2msg(xml)
+        except ValueError:
+            tak_message = None
+        if tak_message is not None:
+            return tak_message
+    return xml2msg(xml)
+
+
+def fast_xml2proto(xml: str, protover: Optional[TAKProtoVer] = None) -> bytearray:
+    """Convert plain XML CoT to Protobuf, see fast_xml2msg()."""
+    return msg2proto(fast_xml2msg(xml), protover)
@@ -27,23 +27,63 @@
 import re
 import xml.etree.ElementTree as ET
 
-from datetime import datetime
-from io import BytesIO
-from typing import Optional
-
-import delimited_protobuf as dpb
+from functools import lru_cache
+from time import gmtime, perf_counter
+from typing import Any, Iterable, List, Optional, Tuple
 
+from takproto import metrics
 from takproto.constants import (
-    ISO_8601_UTC,
     DEFAULT_MESH_HEADER,
     DEFAULT_PROTO_HEADER,
+    TIME_CACHE_SIZE,
+    XML_DECLARATION,
     TAKProtoVer,
 )
+from takproto.detail import DETAIL_CONVERTERS, convert_detail
 from takproto.proto import TakMessage
 
 
-def parse_proto(msg: bytearray) -> Optional[bytearray]:
-    """Parse TAK Protocol Version 1 Mesh & Stream message."""
+def _decode_varint(buf, pos: int = 0) -> Tuple[Optional[int], int]:
+    """Decode an unsigned varint from buf starting at pos.
+
+    Returns a tuple of (value, position after the varint), or (None, pos) if buf
+    ends before the varint does.
+    """
+    start = pos
+    end = len(buf)
+    result = 0
+    shift = 0
+    while pos < end:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+        if shift >= 70:
+            raise ValueError("Varint exceeds 10 bytes")
+    return None, start
+
+
+def _encode_varint(value: int) -> bytes:
+    """Encode value as an unsigned varint."""
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def parse_proto(msg) -> Optional[TakMessage]:
+    """Parse TAK Protocol Version 1 Mesh & Stream message.
+
+    msg may be any bytes-like object: bytes, bytearray or memoryview.
+    """
+    active = metrics.ACTIVE
+    if active is not None:
+        return _measured_parse_proto(active, msg)
+
     parsed = None
 
     if msg[:3] == DEFAULT_MESH_HEADER:
@@ -53,32 +93,234 @@ def parse_proto(msg: bytearray) -> Optional[bytearray]:
     return parsed
 
 
-def parse_mesh(msg):
-    """Parse TAK Protocol Version 1 Mesh message."""
-    msg = msg[3:]
+def _measured_parse_proto(active, msg) -> Optional[TakMessage]:
+    """Do parse_proto(), recording its timing, size and outcome in active."""
+    if msg[:3] == DEFAULT_MESH_HEADER:
+        protover, parse = TAKProtoVer.MESH, parse_mesh
+    elif msg[0] in DEFAULT_PROTO_HEADER:
+        protover, parse = TAKProtoVer.STREAM, parse_stream
+    else:
+        active.error("parse_proto", None)
+        return None
+
+    start = perf_counter()
+    try:
+        parsed = parse(msg)
+    except Exception:
+        active.error("parse_proto", protover)
+        raise
+    active.stage("deserialize", perf_counter() - start)
+    if parsed is not None:
+        active.message("decode", protover, len(msg))
+    return parsed
+
+
+def parse_mesh(msg) -> TakMessage:
+    """Parse TAK Protocol Version 1 Mesh message.
+
+    The payload is parsed from a view at the header offset, without copying msg.
+    """
     protobuf = TakMessage()
-    protobuf.ParseFromString(bytes(msg))
+    with memoryview(msg) as view:
+        protobuf.ParseFromString(view[len(DEFAULT_MESH_HEADER) :])
     return protobuf
 
 
-def parse_stream(msg):
-    """Parse TAK Protocol Version 1 Stream message."""
-    bio = BytesIO(msg[1:])
-    msg = dpb.read(bio, TakMessage)
-    return msg
+def parse_stream(msg) -> Optional[TakMessage]:
+    """Parse TAK Protocol Version 1 Stream message.
 
+    The payload is parsed from a view at the header offset, without copying msg.
+    Only the first message is returned; use StreamDecoder for multi-message reads.
+    """
+    size, start = _decode_varint(msg, len(DEFAULT_PROTO_HEADER))
+    if size is None:
+        raise EOFError("unexpected EOF")
+    if size == 0:
+        return None
+    protobuf = TakMessage()
+    with memoryview(msg) as view:
+        protobuf.ParseFromString(view[start : start + size])
+    return protobuf
 
-def format_time(time: str) -> int:
-    """Format timestamp as microseconds."""
-    s_time = datetime.strptime(time + "+0000", ISO_8601_UTC + "%z")
-    return int(s_time.timestamp() * 1000)
+
+# CoT timestamps: date, time, optional fractional seconds, optional Z or offset.
+_ISO_8601_RE = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})(?:\.(\d+))?"
+    r"(?:Z|([+-])(\d{2}):?(\d{2}))?\Z",
+    re.ASCII,
+)
+_DETAIL_START_RE = re.compile(r"<detail(?:\s[^>]*)?>")
+# Start, end & empty element tags, or a comment, CDATA section or PI.
+_TAG_RE = re.compile(
+    r"<(?:!--.*?-->|!\[CDATA\[.*?\]\]>|\?.*?\?>"
+    r"|(/?)([^\s/>]+)(?:[^>\"']|\"[^\"]*\"|'[^']*')*?(/?)>)",
+    re.DOTALL,
+)
+_MONTH_DAYS = (31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def _days_from_civil(year: int, month: int, day: int) -> int:
+    """Return the number of days from 1970-01-01 to the given proleptic date."""
+    year -= month <= 2
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
 
 
-def xml2proto(
-    xml: str, protover: Optional[TAKProtoVer] = None
-):  # NOQA pylint: disable=too-many-locals,too-many-branches,too-many-statements
+@lru_cache(maxsize=TIME_CACHE_SIZE)
+def format_time(time: str) -> int:
+    """Format an ISO-8601 CoT timestamp as milliseconds since the Unix epoch.
+
+    Accepts any number of fractional second digits (or none), and a trailing
+    "Z", a "+HH:MM"/"-HHMM" offset, or no zone designator (taken as UTC).
+    Results are memoized, since time, start and stale often repeat.
+    """
+    match = _ISO_8601_RE.match(time)
+    if match is None:
+        raise ValueError(f"Invalid CoT timestamp: {time!r}")
+    year, month, day, hour, minute, second = map(int, match.group(1, 2, 3, 4, 5, 6))
+    frac, sign = match.group(7, 8)
+    leap = year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+    if (
+        not 1 <= month <= 12
+        or not 1 <= day <= _MONTH_DAYS[month - 1] - (month == 2 and not leap)
+        or hour > 23
+        or minute > 59
+        or second > 60
+    ):
+        raise ValueError(f"Invalid CoT timestamp: {time!r}")
+
+    seconds = (
+        _days_from_civil(year, month, day) * 86400 + hour * 3600 + minute * 60 + second
+    )
+    if sign:
+        offset = int(match[9]) * 3600 + int(match[10]) * 60
+        seconds += -offset if sign == "+" else offset
+
+    millis = int(frac[:3].ljust(3, "0")) if frac else 0
+    return seconds * 1000 + millis
+
+
+# element2msg() converts times through _convert_time, which metrics.enable()
+# replaces with a timed version while instrumentation is on; see the end of
+# this module.
+_convert_time = format_time
+
+
+@lru_cache(maxsize=TIME_CACHE_SIZE)
+def ms2iso(millis: int) -> str:
+    """Format milliseconds since the Unix epoch as an ISO-8601 CoT timestamp."""
+    seconds, millis = divmod(int(millis), 1000)
+    t_time = gmtime(seconds)
+    return (
+        f"{t_time.tm_year:04d}-{t_time.tm_mon:02d}-{t_time.tm_mday:02d}T"
+        f"{t_time.tm_hour:02d}:{t_time.tm_min:02d}:{t_time.tm_sec:02d}."
+        f"{millis:03d}Z"
+    )
+
+
+def xml2proto(xml: str, protover: Optional[TAKProtoVer] = None) -> bytearray:
     """Convert plain XML CoT to Protobuf."""
-    event = ET.fromstring(xml)
+    active = metrics.ACTIVE
+    if active is not None:
+        return _measured_xml2proto(active, xml, protover)
+
+    output = msg2proto(xml2msg(xml), protover)
+    return output
+
+
+def _measured_xml2proto(active, xml: str, protover: Optional[TAKProtoVer]):
+    """Do xml2proto(), recording its stage timings, size and outcome in active."""
+    protover = protover or TAKProtoVer.MESH
+    try:
+        start = perf_counter()
+        event = ET.fromstring(xml)
+        parsed = perf_counter()
+        msg = element2msg(event, xml)
+        converted = perf_counter()
+    except Exception:
+        active.error("xml2proto", protover)
+        raise
+    active.stage("xml_parse", parsed - start)
+    active.stage("convert", converted - parsed)
+    return _measured_msg2proto(active, msg, protover, "xml2proto")
+
+
+def xml2msg(xml: str) -> TakMessage:
+    """Convert plain XML CoT to a TakMessage."""
+    return element2msg(ET.fromstring(xml), xml)
+
+
+def _detail_source(xml: str, detail: ET.Element) -> Optional[List[str]]:
+    """Return the source text of each child of the <detail> Element in xml.
+
+    Returns None if the children found in the source do not match those of
+    detail, in which case they have to be serialized instead.
+    """
+    match = _DETAIL_START_RE.search(xml)
+    end = xml.rfind("</detail>")
+    if match is None or end < match.end():
+        return None
+
+    slices = []
+    depth = 0
+    elem_start = 0
+    for token in _TAG_RE.finditer(xml, match.end(), end):
+        closing, tag, empty = token.groups()
+        if tag is None:
+            continue
+        if closing:
+            depth -= 1
+            if depth == 0:
+                slices.append(xml[elem_start : token.end()])
+        else:
+            if depth == 0:
+                elem_start = token.start()
+            if not empty:
+                depth += 1
+            elif depth == 0:
+                slices.append(xml[elem_start : token.end()])
+
+    if len(slices) != len(detail):
+        return None
+    for source, elem in zip(slices, detail):
+        if _TAG_RE.match(source).group(2) != elem.tag:
+            return None
+    return slices
+
+
+def _xml_detail(detail: ET.Element, remaining: List[ET.Element], xml) -> str:
+    """Return the xmlDetail for the remaining children of detail.
+
+    The children are copied verbatim from the source document xml where it is
+    available as a str; otherwise they are serialized together in one call.
+    """
+    if isinstance(xml, str):
+        slices = _detail_source(xml, detail)
+        if slices is not None:
+            if len(remaining) == len(slices):
+                return "".join(slices)
+            keep = {id(elem) for elem in remaining}
+            return "".join(
+                source for source, elem in zip(slices, detail) if id(elem) in keep
+            )
+
+    wrapper = ET.Element("detail")
+    wrapper.extend(remaining)
+    serialized = ET.tostring(wrapper, encoding="unicode")
+    return serialized[serialized.index(">") + 1 : serialized.rindex("<")].strip()
+
+
+def element2msg(  # NOQA pylint: disable=too-many-locals,too-many-branches,too-many-statements
+    event: ET.Element, xml: Optional[str] = None
+) -> TakMessage:
+    """Convert a parsed CoT <event> Element to a TakMessage.
+
+    xml is the source document of event, if available, and is used to copy the
+    elements of xmlDetail verbatim instead of serializing them again.
+    """
     tak_message = TakMessage()
     tak_control = tak_message.takControl
     new_event = tak_message.cotEvent
@@ -103,7 +345,7 @@ def xml2proto(
         if val:
             if attrib == "time":
                 attrib = "send"
-            setattr(new_event, f"{attrib}Time", format_time(val))
+            setattr(new_event, f"{attrib}Time", _convert_time(val))
 
     # If the event element includes a point child, write the attributes
     point = event.find("point")
@@ -123,98 +365,214 @@ def xml2proto(
         # from CoT XML. new_event.detail may only contain xmlDetail, contact,
         # __group, precisionlocation, status, takv, and track. xmlDetail should
         # contain an XML string with any data that does not adhere to the other
-        # strongly-typed fields. See more information about each field below.
-
-        # If this is a GeoChat message, write the contents of <detail> in xmlDetail.
-        if uid and "GeoChat." in uid:
-            pattern = "<detail>(.*?)</detail>"
-            xmldetailstr = re.search(pattern, xml).group(1)
-            new_detail.xmlDetail = xmldetailstr
-        else:
-            # Add unknown elements to xmlDetail field.
-            known_elem = [
-                "contact",
-                "__group",
-                "precisionlocation",
-                "status",
-                "takv",
-                "track",
-            ]
-            for elem in detail.iterfind("*"):
-                if elem.tag not in known_elem:
-                    new_detail.xmlDetail = ET.tostring(elem).strip()
-
-        contact = detail.find("contact")
-        if contact is not None:
-            attribs = ["endpoint", "callsign"]
-            for attrib in attribs:
-                attrib_val = contact.get(attrib)
-                if attrib_val:
-                    setattr(new_detail.contact, attrib, attrib_val)
-
-        group = detail.find("__group")  # pylint: disable=protected-access
-        if group is not None:
-            attribs = ["name", "role"]
-            for attrib in attribs:
-                attrib_val = group.get(attrib)
-                if attrib_val:
-                    setattr(new_detail.group, attrib, attrib_val)
-
-        prec_loc = detail.find("precisionlocation")
-        if prec_loc is not None:
-            attribs = ["geopointsrc", "altsrc"]
-            for attrib in attribs:
-                attrib_val = prec_loc.get(attrib)
-                if attrib_val:
-                    setattr(new_detail.precisionLocation, attrib, attrib_val)
-
-        status = detail.find("status")
-        if status is not None:
-            battery = status.get("battery")
-            if battery:
-                new_detail.status.battery = int(battery)
-
-        takv = detail.find("takv")
-        if takv is not None:
-            attribs = ["device", "platform", "os", "version"]
-            for attrib in attribs:
-                attrib_val = takv.get(attrib)
-                if attrib_val:
-                    setattr(new_detail.takv, attrib, attrib_val)
-
-        # The fields in track are double-precision floating-point numbers.
-        # We can use Python's native float, since that is actually 64-bit
-        # floating-point.
-        track = detail.find("track")
-        if track is not None:
-            attribs = ["speed", "course"]
-            for attrib in attribs:
-                attrib_val = track.get(attrib)
-                if attrib_val:
-                    setattr(new_detail.track, attrib, float(attrib_val))
-
-    output = msg2proto(tak_message, protover)
-    return output
+        # strongly-typed fields. The converter for each of those fields is
+        # registered in takproto.detail; children without one are left over.
+        remaining = convert_detail(detail, new_detail)
+        if remaining:
+            new_detail.xmlDetail = _xml_detail(detail, remaining, xml)
+
+    return tak_message
+
+
+def _escape(value: str) -> str:
+    """Escape value for a single-quoted XML attribute, as xml.sax.saxutils would.
+
+    Defined here so that importing takproto does not import xml.sax, and with it
+    urllib.
+    """
+    return (
+        value.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace("'", "&apos;")
+        .replace('"', "&quot;")
+    )
+
+
+def _attrs(pairs) -> str:
+    """Render (name, value) pairs as XML attributes, skipping empty strings."""
+    return "".join(
+        (
+            f" {name}='{_escape(value)}'"
+            if isinstance(value, str)
+            else f" {name}='{value!r}'"
+        )
+        for name, value in pairs
+        if value != ""
+    )
+
+
+def _detail_xml(detail) -> str:
+    """Render a Detail message as CoT XML, following the rules in detail.proto."""
+    xml_detail = detail.xmlDetail
+    parts = ["<detail>", xml_detail]
+    rendered = set()
+    for tag, converter in DETAIL_CONVERTERS.items():
+        field = converter.field
+        if field in rendered or not detail.HasField(field):
+            continue
+        rendered.add(field)
+        # Data for an element already present in xmlDetail takes precedence.
+        if xml_detail and converter.pattern.search(xml_detail):
+            continue
+        sub_msg = getattr(detail, field)
+        attribs = _attrs(converter.render(sub_msg))
+        parts.append(f"<{tag}{attribs}/>")
+    parts.append("</detail>")
+    return "".join(parts)
+
+
+def proto2xml(msg: TakMessage, declaration: bool = True) -> str:
+    """Convert a TakMessage into plain XML CoT.
+
+    The XML is written directly from the message fields. xmlDetail is wrapped in
+    <detail> and the strongly typed Detail messages are merged into it, as
+    receivers are required to do by detail.proto.
+    """
+    event = msg.cotEvent
+    attribs = (
+        ("version", "2.0"),
+        ("uid", event.uid),
+        ("type", event.type),
+        ("access", event.access),
+        ("qos", event.qos),
+        ("opex", event.opex),
+        ("time", ms2iso(event.sendTime)),
+        ("start", ms2iso(event.startTime)),
+        ("stale", ms2iso(event.staleTime)),
+        ("how", event.how),
+    )
+    point = (
+        ("lat", event.lat),
+        ("lon", event.lon),
+        ("hae", event.hae),
+        ("ce", event.ce),
+        ("le", event.le),
+    )
+    parts = [
+        XML_DECLARATION if declaration else "",
+        f"<event{_attrs(attribs)}>",
+        f"<point{_attrs(point)}/>",
+    ]
+    if event.HasField("detail"):
+        parts.append(_detail_xml(event.detail))
+    parts.append("</event>")
+    return "".join(parts)
 
 
 def msg2proto(msg, protover: Optional[TAKProtoVer] = None) -> bytearray:
     """Convert a TakMessage into a TAK Protocol Version 1 protobuf."""
     protover = protover or TAKProtoVer.MESH
+    active = metrics.ACTIVE
+    if active is not None:
+        return _measured_msg2proto(active, msg, protover, "msg2proto")
 
-    output_ba = bytearray()
-    header_ba = bytearray()
-    proto_ba = bytearray()
+    payload = msg.SerializeToString()
+    output_ba = _frame_header(protover, len(payload))
+    output_ba += payload
+    return output_ba
 
-    if protover == TAKProtoVer.MESH:
-        header_ba = DEFAULT_MESH_HEADER
-        proto_ba = bytearray(msg.SerializeToString())
-    elif protover == TAKProtoVer.STREAM:
-        header_ba = DEFAULT_PROTO_HEADER
-        output_io = BytesIO()
-        dpb.write(output_io, msg)
-        proto_ba = bytearray(output_io.getvalue())
-    else:
-        raise ValueError(f"Unsupported TAKProtoVer: {protover}")
 
-    output_ba = header_ba + proto_ba
+def _measured_msg2proto(
+    active, msg, protover: TAKProtoVer, operation: str
+) -> bytearray:
+    """Do msg2proto(), recording its stage timings, size and outcome in active."""
+    try:
+        start = perf_counter()
+        payload = msg.SerializeToString()
+        serialized = perf_counter()
+        output_ba = _frame_header(protover, len(payload))
+        output_ba += payload
+        framed = perf_counter()
+    except Exception:
+        active.error(operation, protover)
+        raise
+    active.stage("serialize", serialized - start)
+    active.stage("frame", framed - serialized)
+    active.message("encode", protover, len(output_ba))
     return output_ba
+
+
+def _frame_header(protover: TAKProtoVer, size: int) -> bytearray:
+    """Return the TAK Protocol Version 1 header for a payload of size bytes."""
+    if protover == TAKProtoVer.MESH:
+        return bytearray(DEFAULT_MESH_HEADER)
+    if protover == TAKProtoVer.STREAM:
+        return DEFAULT_PROTO_HEADER + _encode_varint(size)
+    raise ValueError(f"Unsupported TAKProtoVer: {protover}")
+
+
+def _encode_batch(
+    messages: Iterable[TakMessage], protover: TAKProtoVer, out=None
+) -> Tuple[Any, List[int]]:
+    """Write framed messages back to back into out, see encode_stream_batch()."""
+    if out is None:
+        out = bytearray()
+
+    growable = isinstance(out, bytearray)
+    if growable:
+        target = out
+    else:
+        target = memoryview(out).cast("B")
+    capacity = len(target)
+
+    offsets = [0]
+    pos = 0
+    try:
+        for msg in messages:
+            payload = msg.SerializeToString()
+            header = _frame_header(protover, len(payload))
+            end = pos + len(header) + len(payload)
+            if not growable and end > capacity:
+                raise ValueError(
+                    f"Output buffer of {capacity} bytes is too small for frame "
+                    f"{len(offsets) - 1} ending at byte {end}"
+                )
+            # Slice assignment overwrites in place up to the current length and
+            # extends the bytearray past it, so a reused buffer keeps its memory.
+            target[pos : pos + len(header)] = header
+            pos += len(header)
+            target[pos:end] = payload
+            pos = end
+            offsets.append(pos)
+    finally:
+        if not growable:
+            target.release()
+
+    if growable:
+        del out[pos:]
+    return out, offsets
+
+
+def encode_stream_batch(
+    messages: Iterable[TakMessage], out=None
+) -> Tuple[Any, List[int]]:
+    """Encode many TakMessages as TAK Protocol Version 1 Stream into one buffer.
+
+    Frames are written back to back into out, which may be a bytearray to reuse
+    between calls (it is resized to fit) or any other writable buffer such as a
+    memoryview or mmap (ValueError is raised if the frames do not fit). A new
+    bytearray is used if out is None.
+
+    Returns the buffer and a list of len(messages) + 1 offsets: frame i occupies
+    buf[offsets[i]:offsets[i + 1]] and the frames end at offsets[-1].
+    """
+    return _encode_batch(messages, TAKProtoVer.STREAM, out)
+
+
+def encode_mesh_batch(
+    messages: Iterable[TakMessage], out=None
+) -> Tuple[Any, List[int]]:
+    """Encode many TakMessages as TAK Protocol Version 1 Mesh into one buffer.
+
+    Each frame is one UDP datagram; slice them out of the buffer with a
+    memoryview and the returned offsets. See encode_stream_batch().
+    """
+    return _encode_batch(messages, TAKProtoVer.MESH, out)
+
+
+# The names element2msg() converts times & details through, for metrics.enable()
+# to replace with timed versions.
+metrics.instrument(globals(), "_convert_time", "time")
+metrics.instrument(globals(), "convert_detail", "detail")
+metrics.instrument(globals(), "_xml_detail", "detail")
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""TAKProto metrics for the encode & decode hot paths.
+
+Instrumentation is off by default. While it is off, xml2proto(), msg2proto()
+and parse_proto() each pay for a single check of ACTIVE and nothing else.
+enable() starts collecting into a Metrics instance:
+
+* per-stage timers: xml_parse, convert (XML to TakMessage), and within convert
+  time and detail, then serialize, frame and deserialize;
+* counters of messages, bytes and errors by direction and TAKProtoVer;
+* a histogram of frame sizes by direction.
+
+snapshot() returns the figures as plain data, prometheus_text() renders them in
+the Prometheus text exposition format, and serve() exposes that over HTTP for a
+local scraper.
+"""
+
+import bisect
+import threading
+import time
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from takproto.constants import DEFAULT_METRICS_HOST, DEFAULT_SIZE_BUCKETS, TAKProtoVer
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+class Metrics:
+    """Counters, stage timers and frame size histograms.
+
+    Updates take a lock, so one instance can be shared by several threads.
+    size_buckets are the upper bounds, in bytes, of the size histogram buckets.
+    """
+
+    def __init__(self, size_buckets: Sequence[int] = DEFAULT_SIZE_BUCKETS) -> None:
+        self.size_buckets = tuple(sorted(size_buckets))
+        self._lock = threading.Lock()
+        self._messages: Dict[str, Dict[str, int]] = {}
+        self._bytes: Dict[str, Dict[str, int]] = {}
+        self._errors: Dict[str, Dict[str, int]] = {}
+        self._stages: Dict[str, List[float]] = {}
+        self._sizes: Dict[str, List[int]] = {}
+
+    def reset(self) -> None:
+        """Zero every metric."""
+        with self._lock:
+            self._messages.clear()
+            self._bytes.clear()
+            self._errors.clear()
+            self._stages.clear()
+            self._sizes.clear()
+
+    def message(self, direction: str, protover: TAKProtoVer, size: int) -> None:
+        """Count one frame of size bytes encoded or decoded, by direction."""
+        with self._lock:
+            messages = self._messages.setdefault(direction, {})
+            messages[protover.name] = messages.get(protover.name, 0) + 1
+            sizes = self._bytes.setdefault(direction, {})
+            sizes[protover.name] = sizes.get(protover.name, 0) + size
+            buckets = self._sizes.get(direction)
+            if buckets is None:
+                # One count per bucket, the +Inf bucket, then the sum of sizes.
+                buckets = self._sizes[direction] = [0] * (len(self.size_buckets) + 2)
+            buckets[bisect.bisect_left(self.size_buckets, size)] += 1
+            buckets[-1] += size
+
+    def error(self, operation: str, protover: Optional[TAKProtoVer]) -> None:
+        """Count one failed operation, with protover None if it is unknown."""
+        name = protover.name if protover is not None else "UNKNOWN"
+        with self._lock:
+            errors = self._errors.setdefault(operation, {})
+            errors[name] = errors.get(name, 0) + 1
+
+    def stage(self, name: str, seconds: float) -> None:
+        """Add one call of seconds to the timer of stage name."""
+        with self._lock:
+            timer = self._stages.get(name)
+            if timer is None:
+                self._stages[name] = [1, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a copy of every metric as nested dicts.
+
+        messages, bytes and errors map a direction (or operation) to counts by
+        TAKProtoVer name; stages map a stage to its count and total seconds; and
+        sizes map a direction to cumulative bucket counts by upper bound, with
+        "+Inf", and the count and sum of the sizes.
+        """
+        with self._lock:
+            sizes = {}
+            for direction, buckets in self._sizes.items():
+                cumulative = 0
+                counts: Dict[Any, int] = {}
+                for bound, count in zip(self.size_buckets + ("+Inf",), buckets):
+                    cumulative += count
+                    counts[bound] = cumulative
+                sizes[direction] = {
+                    "buckets": counts,
+                    "count": cumulative,
+                    "sum": buckets[-1],
+                }
+            return {
+                "messages": {k: dict(v) for k, v in self._messages.items()},
+                "bytes": {k: dict(v) for k, v in self._bytes.items()},
+                "errors": {k: dict(v) for k, v in self._errors.items()},
+                "stages": {
+                    name: {"count": count, "seconds": seconds}
+                    for name, (count, seconds) in self._stages.items()
+                },
+                "sizes": sizes,
+            }
+
+    def prometheus_text(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+
+        def counter(name: str, help_text: str, label: str, values) -> None:
+            lines.append(f"# HELP takproto_{name} {help_text}")
+            lines.append(f"# TYPE takproto_{name} counter")
+            for key, counts in values.items():
+                for protover, value in counts.items():
+                    lines.append(
+                        f'takproto_{name}{{{label}="{key}",protover="{protover}"}} '
+                        f"{value}"
+                    )
+
+        counter(
+            "messages_total",
+            "TAK Protocol messages encoded or decoded.",
+            "direction",
+            snapshot["messages"],
+        )
+        counter(
+            "bytes_total",
+            "Bytes of TAK Protocol messages encoded or decoded.",
+            "direction",
+            snapshot["bytes"],
+        )
+        counter(
+            "errors_total",
+            "Encode or decode calls that failed.",
+            "operation",
+            snapshot["errors"],
+        )
+
+        lines.append("# HELP takproto_stage_seconds Time spent in each stage.")
+        lines.append("# TYPE takproto_stage_seconds summary")
+        for name, timer in snapshot["stages"].items():
+            lines.append(
+                f'takproto_stage_seconds_sum{{stage="{name}"}} {timer["seconds"]!r}'
+            )
+            lines.append(
+                f'takproto_stage_seconds_count{{stage="{name}"}} {timer["count"]}'
+            )
+
+        lines.append("# HELP takproto_message_bytes Size of each message in bytes.")
+        lines.append("# TYPE takproto_message_bytes histogram")
+        for direction, histogram in snapshot["sizes"].items():
+            for bound, count in histogram["buckets"].items():
+                lines.append(
+                    f'takproto_message_bytes_bucket{{direction="{direction}",'
+                    f'le="{bound}"}} {count}'
+                )
+            lines.append(
+                f'takproto_message_bytes_sum{{direction="{direction}"}} '
+                f'{histogram["sum"]}'
+            )
+            lines.append(
+                f'takproto_message_bytes_count{{direction="{direction}"}} '
+                f'{histogram["count"]}'
+            )
+        return "\n".join(lines) + "\n"
+
+
+# The Metrics being collected into, or None while instrumentation is off.
+ACTIVE: Optional[Metrics] = None
+
+# The call sites enable() replaces with timed versions, as (module globals,
+# name, stage); registered with instrument() by the modules that hold them.
+_hooks: List[Tuple[Dict[str, Any], str, str]] = []
+# The (module globals, name, function) each replaced name had before enable().
+_originals: List[Tuple[Dict[str, Any], str, Callable]] = []
+
+
+def _timed(metrics: Metrics, stage: str, func: Callable) -> Callable:
+    """Return func, adding the time of each call to stage of metrics."""
+    perf_counter = time.perf_counter
+
+    def timed(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.stage(stage, perf_counter() - start)
+
+    return timed
+
+
+def _replace(metrics: Metrics, namespace: Dict[str, Any], name: str, stage: str):
+    """Replace namespace[name] with a version timed as stage of metrics."""
+    _originals.append((namespace, name, namespace[name]))
+    namespace[name] = _timed(metrics, stage, namespace[name])
+
+
+def instrument(namespace: Dict[str, Any], name: str, stage: str) -> None:
+    """Time the calls made through namespace[name] as stage while enabled.
+
+    namespace is the globals() of the calling module, so this module need not
+    import the modules it instruments.
+    """
+    _hooks.append((namespace, name, stage))
+    if ACTIVE is not None:
+        _replace(ACTIVE, namespace, name, stage)
+
+
+def enable(metrics: Optional[Metrics] = None) -> Metrics:
+    """Start collecting into metrics, or a new Metrics, and return it."""
+    global ACTIVE  # pylint: disable=global-statement
+    disable()
+    if metrics is None:
+        metrics = Metrics()
+    for namespace, name, stage in _hooks:
+        _replace(metrics, namespace, name, stage)
+    ACTIVE = metrics
+    return metrics
+
+
+def disable() -> Optional[Metrics]:
+    """Stop collecting, and return the Metrics that were collected into."""
+    global ACTIVE  # pylint: disable=global-statement
+    metrics, ACTIVE = ACTIVE, None
+    for namespace, name, func in _originals:
+        namespace[name] = func
+    _originals.clear()
+    return metrics
+
+
+def snapshot() -> Dict[str, Any]:
+    """Return the snapshot of the active Metrics, which is empty when disabled."""
+    metrics = ACTIVE
+    return metrics.snapshot() if metrics is not None else Metrics().snapshot()
+
+
+def prometheus_text() -> str:
+    """Return the active Metrics in the Prometheus text exposition format."""
+    metrics = ACTIVE
+    return (metrics or Metrics()).prometheus_text()
+
+
+def serve(port: int, host: str = DEFAULT_METRICS_HOST):
+    """Serve prometheus_text() over HTTP on host:port from a daemon thread.
+
+    Every path returns the metrics. Returns the server; call its shutdown() to
+    stop it. host defaults to the loopback address, for a local scraper.
+    """
+    # Imported here, so that importing takproto.metrics stays cheap.
+    # pylint: disable=import-outside-toplevel
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+
+    class Server(ThreadingMixIn, HTTPServer):
+        """ThreadingHTTPServer, which http.server only has from Python 3.7."""
+
+        daemon_threads = True
+
+    class Handler(BaseHTTPRequestHandler):
+        """Respond to every GET with the metrics."""
+
+        def do_GET(self) -> None:  # NOQA pylint: disable=invalid-name
+            body = prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = Server((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""TAKProto TAK Protocol version negotiation.
+
+Implements the "Streaming Connection Protocol Negotiation" and "Mesh Network
+Protocol Negotiation" sections of src-protobuf/protocol.txt, so that each link
+uses TAK Protocol Version 1 wherever the other end supports it.
+"""
+
+import time
+import uuid
+import xml.etree.ElementTree as ET
+
+from typing import Dict, Iterable, Optional, Tuple
+
+from takproto.constants import (
+    TAK_CONTROL_TIMEOUT,
+    TAKP_NEGOTIATION_TIMEOUT,
+    TAKP_QUERY,
+    TAKP_RESPONSE,
+    TAKP_VERSION,
+    NegotiationState,
+    TAKProtoVer,
+)
+from takproto.proto import TakMessage
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+# Versions of the TAK Protocol payload this module can encode & decode.
+SUPPORTED_VERSIONS = (1,)
+
+
+def _now() -> int:
+    """Return the current time in milliseconds since the epoch."""
+    return int(time.time() * 1000)
+
+
+def _control_event(
+    cot_type: str, uid: str, elements: Iterable[Tuple[str, Dict[str, str]]], now: int
+) -> TakMessage:
+    """Return a t-x-takp-* CoT event with elements in its <TakControl>."""
+    tak_message = TakMessage()
+    cot_event = tak_message.cotEvent
+    cot_event.type = cot_type
+    cot_event.uid = uid
+    cot_event.how = "m-g"
+    cot_event.sendTime = cot_event.startTime = now
+    cot_event.staleTime = now + TAKP_NEGOTIATION_TIMEOUT
+    cot_event.ce = cot_event.le = 999999
+    control = ET.Element("TakControl")
+    for tag, attrs in elements:
+        ET.SubElement(control, tag, attrs)
+    cot_event.detail.xmlDetail = ET.tostring(control, encoding="unicode")
+    return tak_message
+
+
+def _control_elements(msg: TakMessage, tag: str) -> list:
+    """Return the tag elements inside the <TakControl> detail of msg."""
+    xml_detail = msg.cotEvent.detail.xmlDetail
+    if "TakControl" not in xml_detail:
+        return []
+    try:
+        detail = ET.fromstring(f"<detail>{xml_detail}</detail>")
+    except ET.ParseError:
+        return []
+    return detail.findall(f"TakControl/{tag}")
+
+
+class StreamNegotiator:
+    """Streaming Connection Protocol Negotiation for one TAK Server connection.
+
+    Pass every CoT event read from the connection to receive(); it returns the
+    event to send in reply, if any, as a TakMessage to be sent as CoT XML with
+    proto2xml(). As a client, an offer of a supported version (t-x-takp-v) is
+    answered with a request for the highest one (t-x-takp-q). As a server,
+    offer() makes the offer and a request is answered with a t-x-takp-r.
+
+    protover is TAKProtoVer.XML until the server accepts a request, and
+    TAKProtoVer.STREAM after. A client must not send anything while may_send is
+    False, and must disconnect once expired() is True.
+    """
+
+    def __init__(
+        self,
+        versions: Iterable[int] = SUPPORTED_VERSIONS,
+        server: bool = False,
+        timeout: int = TAKP_NEGOTIATION_TIMEOUT,
+    ) -> None:
+        self.versions = frozenset(versions)
+        self.server = server
+        self.timeout = timeout
+        self.state = NegotiationState.XML
+        self.uid: Optional[str] = None
+        self.offered: frozenset = frozenset()
+        self.version = 0
+        self._requested_at = 0
+
+    @property
+    def protover(self) -> TAKProtoVer:
+        """Return the encoding to use on the connection."""
+        if self.state == NegotiationState.NEGOTIATED:
+            return TAKProtoVer.STREAM
+        return TAKProtoVer.XML
+
+    @property
+    def may_send(self) -> bool:
+        """Return False while a client is waiting for a response."""
+        return self.server or self.state != NegotiationState.REQUESTED
+
+    def expired(self, now: Optional[int] = None) -> bool:
+        """Return True if a request has gone unanswered for timeout ms."""
+        if self.server or self.state != NegotiationState.REQUESTED:
+            return False
+        if now is None:
+            now = _now()
+        return now - self._requested_at >= self.timeout
+
+    def offer(self, now: Optional[int] = None) -> TakMessage:
+        """Return a server's t-x-takp-v offer of its versions."""
+        if not self.server:
+            raise ValueError("Only a server offers TAK Protocol versions")
+        if self.uid is not None:
+            raise ValueError("TAK Protocol versions may be offered only once")
+        self.uid = str(uuid.uuid4())
+        self.offered = self.versions
+        self.state = NegotiationState.OFFERED
+        # protocol.txt allows one TakProtocolSupport element per version.
+        return _control_event(
+            TAKP_VERSION,
+            self.uid,
+            [
+                ("TakProtocolSupport", {"version": str(version)})
+                for version in sorted(self.versions)
+            ],
+            now if now is not None else _now(),
+        )
+
+    def request(self, now: Optional[int] = None) -> Optional[TakMessage]:
+        """Return a client's t-x-takp-q for the highest version both support.
+
+        Returns None if no offer has been received, or it has no version in
+        common with versions.
+        """
+        common = self.offered & self.versions
+        if self.server or not common or self.state != NegotiationState.OFFERED:
+            return None
+        if now is None:
+            now = _now()
+        self.version = max(common)
+        self.state = NegotiationState.REQUESTED
+        self._requested_at = now
+        return _control_event(
+            TAKP_QUERY,
+            self.uid,
+            [("TakRequest", {"version": str(self.version)})],
+            now,
+        )
+
+    def receive(
+        self, msg: TakMessage, now: Optional[int] = None
+    ) -> Optional[TakMessage]:
+        """Handle an event read from the connection, returning the reply if any."""
+        cot_type = msg.cotEvent.type
+        if not cot_type.startswith("t-x-takp-"):
+            return None
+
+        if self.server:
+            if cot_type != TAKP_QUERY or self.state != NegotiationState.OFFERED:
+                return None
+            requests = _control_elements(msg, "TakRequest")
+            version = _int_attr(requests[0], "version") if len(requests) == 1 else 0
+            accepted = version in self.versions
+            if accepted:
+                self.version = version
+                self.state = NegotiationState.NEGOTIATED
+            return _control_event(
+                TAKP_RESPONSE,
+                self.uid,
+                [("TakResponse", {"status": "true" if accepted else "false"})],
+                now if now is not None else _now(),
+            )
+
+        if cot_type == TAKP_VERSION and self.state == NegotiationState.XML:
+            self.uid = msg.cotEvent.uid
+            self.offered = frozenset(
+                _int_attr(elem, "version")
+                for elem in _control_elements(msg, "TakProtocolSupport")
+            )
+            self.state = NegotiationState.OFFERED
+            return self.request(now)
+
+        if cot_type == TAKP_RESPONSE and self.state == NegotiationState.REQUESTED:
+            responses = _control_elements(msg, "TakResponse")
+            if responses and responses[0].get("status", "").lower() == "true":
+                self.state = NegotiationState.NEGOTIATED
+            else:
+                self.version = 0
+                self.state = NegotiationState.OFFERED
+        return None
+
+
+def _int_attr(elem: ET.Element, name: str) -> int:
+    """Return the integer value of attribute name of elem, or 0."""
+    try:
+        return int(elem.get(name, ""))
+    except ValueError:
+        return 0
+
+
+class MeshVersions:
+    """Mesh Network Protocol Negotiation: the version to broadcast with.
+
+    update() is called with every message received and the TAK Protocol version
+    it arrived in (0 for XML). Each contact is tracked with the min/max versions
+    from its TakControl, or with the version of its latest message once no
+    TakControl has arrived for control_timeout ms. version() is then the highest
+    version supported by every contact and by this device, or 0 (XML) if there
+    is none. Contacts are forgotten once their last event goes stale.
+
+    When version() changes, a TakControl must be sent straight away; see
+    control().
+    """
+
+    def __init__(
+        self,
+        min_version: int = min(SUPPORTED_VERSIONS),
+        max_version: int = max(SUPPORTED_VERSIONS),
+        control_timeout: int = TAK_CONTROL_TIMEOUT,
+    ) -> None:
+        self.min_version = min_version
+        self.max_version = max_version
+        self.control_timeout = control_timeout
+        # uid -> [min version, max version, TakControl time, last version, stale]
+        self._contacts: Dict[str, list] = {}
+
+    def __len__(self) -> int:
+        """Return the number of contacts tracked."""
+        return len(self._contacts)
+
+    def update(self, msg: TakMessage, version: int, now: Optional[int] = None) -> None:
+        """Track the sender of msg, which was received as TAK Protocol version."""
+        if now is None:
+            now = _now()
+        uid = msg.takControl.contactUid or msg.cotEvent.uid
+        if not uid:
+            return
+        stale = msg.cotEvent.staleTime or now + self.control_timeout
+        contact = self._contacts.get(uid)
+        if contact is None:
+            # protocol.txt 3a: start from the version the contact was seen in.
+            contact = self._contacts[uid] = [version, version, None, version, stale]
+        else:
+            contact[3] = version
+            contact[4] = max(contact[4], stale)
+        # A TakControl only announces versions in a TAK Protocol message: for
+        # XML, element2msg() fills in takControl.contactUid of every GeoChat.
+        if version > 0 and msg.HasField("takControl"):
+            # An unset version reads as 0, which means version 1.
+            control = msg.takControl
+            contact[0] = control.minProtoVersion or 1
+            contact[1] = control.maxProtoVersion or 1
+            contact[2] = now
+
+    def versions(self, uid: str, now: Optional[int] = None) -> Tuple[int, int]:
+        """Return the (min, max) versions of contact uid, or (0, 0) if unknown."""
+        contact = self._contacts.get(uid)
+        if contact is None:
+            return 0, 0
+        if now is None:
+            now = _now()
+        return self._range(contact, now)
+
+    def version(self, now: Optional[int] = None) -> int:
+        """Return the highest version supported by every contact, or 0."""
+        if now is None:
+            now = _now()
+        low, high = self.min_version, self.max_version
+        for uid, contact in list(self._contacts.items()):
+            if contact[4] <= now:
+                del self._contacts[uid]
+                continue
+            contact_min, contact_max = self._range(contact, now)
+            low = max(low, contact_min)
+            high = min(high, contact_max)
+            if low > high:
+                return 0
+        return high
+
+    def protover(self, now: Optional[int] = None) -> TAKProtoVer:
+        """Return the encoding to broadcast with."""
+        return TAKProtoVer.MESH if self.version(now) else TAKProtoVer.XML
+
+    def control(self, uid: str) -> TakMessage:
+        """Return a TakMessage announcing this device's versions as uid."""
+        tak_message = TakMessage()
+        control = tak_message.takControl
+        control.minProtoVersion = self.min_version
+        control.maxProtoVersion = self.max_version
+        control.contactUid = uid
+        return tak_message
+
+    def _range(self, contact: list, now: int) -> Tuple[int, int]:
+        if contact[2] is not None and now - contact[2] < self.control_timeout:
+            return contact[0], contact[1]
+        # protocol.txt 3c: revert to the version of the latest message.
+        return contact[3], contact[3]
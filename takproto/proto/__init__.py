@@ -1 +1,95 @@
-from .takmessage_pb2 import TakMessage
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""TAKProto protobuf message classes, loaded on first use.
+
+The classes come from combined_pb2, which registers every .proto file with the
+default protobuf descriptor pool at once. The protoc generated *_pb2 modules can
+still be imported, and give the same classes.
+"""
+
+import importlib
+
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:  # For type checkers & pylint, which can't see __getattr__.
+    from .combined_pb2 import (  # NOQA
+        Contact,
+        CotEvent,
+        Detail,
+        Group,
+        PrecisionLocation,
+        Status,
+        TakControl,
+        TakMessage,
+        Takv,
+        Track,
+    )
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+MESSAGES = (
+    "Contact",
+    "CotEvent",
+    "Detail",
+    "Group",
+    "PrecisionLocation",
+    "Status",
+    "TakControl",
+    "TakMessage",
+    "Takv",
+    "Track",
+)
+_MODULES = tuple(f"{message.lower()}_pb2" for message in MESSAGES) + ("combined_pb2",)
+
+__all__ = list(MESSAGES) + ["backend"]
+
+
+def __getattr__(name: str) -> Any:
+    """Import the message class or module name on first access."""
+    if name in MESSAGES:
+        value = getattr(importlib.import_module(f"{__name__}.combined_pb2"), name)
+    elif name in _MODULES:
+        value = importlib.import_module(f"{__name__}.{name}")
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(MESSAGES) | set(_MODULES))
+
+
+def backend() -> str:
+    """Return the protobuf backend in use: "upb", "cpp" or "python"."""
+    # Imported here, as importing it loads the backend.
+    from google.protobuf.internal import (  # pylint: disable=import-outside-toplevel
+        api_implementation,
+    )
+
+    return api_implementation.Type()
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# Generated by src-protobuf/combine.py from the protoc output.  DO NOT EDIT!
+# source: contact.proto, group.proto, precisionlocation.proto, status.proto, takv.proto, track.proto, detail.proto, cotevent.proto, takcontrol.proto, takmessage.proto
+"""Every TAK Protocol message, registered with the descriptor pool at once."""
+
+from google.protobuf.internal import builder as _builder
+from google.protobuf import descriptor_pool as _descriptor_pool
+
+_SERIALIZED_FILES = (
+    (
+        "contact_pb2",
+        b'\n\rcontact.proto\x12\x1fatakmap.commoncommo.protobuf.v1"-\n\x07Contact\x12\x10\n\x08endpoint\x18\x01 \x01(\t\x12\x10\n\x08callsign\x18\x02 \x01(\tB\x02H\x03b\x06proto3',
+    ),
+    (
+        "group_pb2",
+        b'\n\x0bgroup.proto\x12\x1fatakmap.commoncommo.protobuf.v1"#\n\x05Group\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0c\n\x04role\x18\x02 \x01(\tB\x02H\x03b\x06proto3',
+    ),
+    (
+        "precisionlocation_pb2",
+        b'\n\x17precisionlocation.proto\x12\x1fatakmap.commoncommo.protobuf.v1"8\n\x11PrecisionLocation\x12\x13\n\x0bgeopointsrc\x18\x01 \x01(\t\x12\x0e\n\x06altsrc\x18\x02 \x01(\tB\x02H\x03b\x06proto3',
+    ),
+    (
+        "status_pb2",
+        b'\n\x0cstatus.proto\x12\x1fatakmap.commoncommo.protobuf.v1"\x19\n\x06Status\x12\x0f\n\x07battery\x18\x01 \x01(\rB\x02H\x03b\x06proto3',
+    ),
+    (
+        "takv_pb2",
+        b'\n\ntakv.proto\x12\x1fatakmap.commoncommo.protobuf.v1"E\n\x04Takv\x12\x0e\n\x06device\x18\x01 \x01(\t\x12\x10\n\x08platform\x18\x02 \x01(\t\x12\n\n\x02os\x18\x03 \x01(\t\x12\x0f\n\x07version\x18\x04 \x01(\tB\x02H\x03b\x06proto3',
+    ),
+    (
+        "track_pb2",
+        b'\n\x0btrack.proto\x12\x1fatakmap.commoncommo.protobuf.v1"&\n\x05Track\x12\r\n\x05speed\x18\x01 \x01(\x01\x12\x0e\n\x06course\x18\x02 \x01(\x01B\x02H\x03b\x06proto3',
+    ),
+    (
+        "detail_pb2",
+        b"\n\x0cdetail.proto\x12\x1fatakmap.commoncommo.protobuf.v1\x1a\rcontact.proto\x1a\x0bgroup.proto\x1a\x17precisionlocation.proto\x1a\x0cstatus.proto\x1a\ntakv.proto\x1a\x0btrack.proto\"\x81\x03\n\x06Detail\x12\x11\n\txmlDetail\x18\x01 \x01(\t\x129\n\x07contact\x18\x02 \x01(\x0b2(.atakmap.commoncommo.protobuf.v1.Contact\x125\n\x05group\x18\x03 \x01(\x0b2&.atakmap.commoncommo.protobuf.v1.Group\x12M\n\x11precisionLocation\x18\x04 \x01(\x0b22.atakmap.commoncommo.protobuf.v1.PrecisionLocation\x127\n\x06status\x18\x05 \x01(\x0b2'.atakmap.commoncommo.protobuf.v1.Status\x123\n\x04takv\x18\x06 \x01(\x0b2%.atakmap.commoncommo.protobuf.v1.Takv\x125\n\x05track\x18\x07 \x01(\x0b2&.atakmap.commoncommo.protobuf.v1.TrackB\x02H\x03b\x06proto3",
+    ),
+    (
+        "cotevent_pb2",
+        b"\n\x0ecotevent.proto\x12\x1fatakmap.commoncommo.protobuf.v1\x1a\x0cdetail.proto\"\x8d\x02\n\x08CotEvent\x12\x0c\n\x04type\x18\x01 \x01(\t\x12\x0e\n\x06access\x18\x02 \x01(\t\x12\x0b\n\x03qos\x18\x03 \x01(\t\x12\x0c\n\x04opex\x18\x04 \x01(\t\x12\x0b\n\x03uid\x18\x05 \x01(\t\x12\x10\n\x08sendTime\x18\x06 \x01(\x04\x12\x11\n\tstartTime\x18\x07 \x01(\x04\x12\x11\n\tstaleTime\x18\x08 \x01(\x04\x12\x0b\n\x03how\x18\t \x01(\t\x12\x0b\n\x03lat\x18\n \x01(\x01\x12\x0b\n\x03lon\x18\x0b \x01(\x01\x12\x0b\n\x03hae\x18\x0c \x01(\x01\x12\n\n\x02ce\x18\r \x01(\x01\x12\n\n\x02le\x18\x0e \x01(\x01\x127\n\x06detail\x18\x0f \x01(\x0b2'.atakmap.commoncommo.protobuf.v1.DetailB\x02H\x03b\x06proto3",
+    ),
+    (
+        "takcontrol_pb2",
+        b'\n\x10takcontrol.proto\x12\x1fatakmap.commoncommo.protobuf.v1"R\n\nTakControl\x12\x17\n\x0fminProtoVersion\x18\x01 \x01(\r\x12\x17\n\x0fmaxProtoVersion\x18\x02 \x01(\r\x12\x12\n\ncontactUid\x18\x03 \x01(\tB\x02H\x03b\x06proto3',
+    ),
+    (
+        "takmessage_pb2",
+        b'\n\x10takmessage.proto\x12\x1fatakmap.commoncommo.protobuf.v1\x1a\x0ecotevent.proto\x1a\x10takcontrol.proto"\x8a\x01\n\nTakMessage\x12?\n\ntakControl\x18\x01 \x01(\x0b2+.atakmap.commoncommo.protobuf.v1.TakControl\x12;\n\x08cotEvent\x18\x02 \x01(\x0b2).atakmap.commoncommo.protobuf.v1.CotEventB\x02H\x03b\x06proto3',
+    ),
+)
+
+_pool = _descriptor_pool.Default()
+for _module, _serialized in _SERIALIZED_FILES:
+    _messages = {}
+    _file = _pool.AddSerializedFile(_serialized)
+    _builder.BuildMessageAndEnumDescriptors(_file, _messages)
+    _builder.BuildTopDescriptorsAndMessages(_file, _module, _messages)
+    globals().update(
+        (name, value) for name, value in _messages.items() if name[0] != "_"
+    )
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""TAKProto Functions for working with the protobuf wire format directly.
+
+These operate on encoded TAK Protocol Version 1 frames without building
+TakMessage objects, for code paths that only need a few fields.
+"""
+
+import math
+import struct
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from google.protobuf.descriptor import FieldDescriptor
+from google.protobuf.message import DecodeError
+
+from takproto.constants import (
+    DEFAULT_MESH_HEADER,
+    DEFAULT_PROTO_HEADER,
+    DEFAULT_SCAN_FIELDS,
+    TAKProtoVer,
+)
+from takproto.functions import _decode_varint, _encode_varint
+from takproto.proto import TakMessage, backend
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+_COT_EVENT = TakMessage.DESCRIPTOR.fields_by_name["cotEvent"]
+_COT_EVENT_FIELD = _COT_EVENT.number
+
+# Scalar CotEvent fields by name: (field number, protobuf type, default value).
+_SCALAR_FIELDS = {
+    field.name: (field.number, field.type, field.default_value)
+    for field in _COT_EVENT.message_type.fields
+    if field.type != FieldDescriptor.TYPE_MESSAGE
+}
+
+# The upb & cpp protobuf backends parse a small frame faster than the fields can
+# be scanned from it in Python; the pure Python backend is several times slower.
+_SCAN = backend() == "python"
+
+_unpack_double = struct.Struct("<d").unpack_from
+_pack_double = struct.Struct("<d").pack
+
+
+def _key(message, name: str) -> bytes:
+    """Return the encoded key of field name of the message descriptor."""
+    field = message.fields_by_name[name]
+    if field.type == FieldDescriptor.TYPE_DOUBLE:
+        wire_type = 1
+    elif field.type in (FieldDescriptor.TYPE_UINT32, FieldDescriptor.TYPE_UINT64):
+        wire_type = 0
+    else:
+        wire_type = 2
+    return _encode_varint(field.number << 3 | wire_type)
+
+
+def _keys(message, *names: str) -> Tuple[bytes, ...]:
+    """Return the encoded keys of the fields names of the message descriptor."""
+    return tuple(_key(message, name) for name in names)
+
+
+# Encoded field keys for encode_cot_event(), from the generated descriptors.
+_TAK_MESSAGE = TakMessage.DESCRIPTOR
+_DETAIL = _COT_EVENT.message_type.fields_by_name["detail"].message_type
+_K_TAK_CONTROL, _K_COT_EVENT = _keys(_TAK_MESSAGE, "takControl", "cotEvent")
+(_K_CONTACT_UID,) = _keys(
+    _TAK_MESSAGE.fields_by_name["takControl"].message_type, "contactUid"
+)
+_K_TYPE, _K_ACCESS, _K_QOS, _K_OPEX, _K_UID, _K_HOW = _keys(
+    _COT_EVENT.message_type, "type", "access", "qos", "opex", "uid", "how"
+)
+_K_SEND_TIME, _K_START_TIME, _K_STALE_TIME = _keys(
+    _COT_EVENT.message_type, "sendTime", "startTime", "staleTime"
+)
+_K_POINT = _keys(_COT_EVENT.message_type, "lat", "lon", "hae", "ce", "le")
+(_K_DETAIL,) = _keys(_COT_EVENT.message_type, "detail")
+_K_XML_DETAIL, _K_CONTACT, _K_GROUP, _K_PRECISION, _K_STATUS, _K_TAKV, _K_TRACK = _keys(
+    _DETAIL,
+    "xmlDetail",
+    "contact",
+    "group",
+    "precisionLocation",
+    "status",
+    "takv",
+    "track",
+)
+_K_ENDPOINT, _K_CALLSIGN = _keys(
+    _DETAIL.fields_by_name["contact"].message_type, "endpoint", "callsign"
+)
+_K_NAME, _K_ROLE = _keys(_DETAIL.fields_by_name["group"].message_type, "name", "role")
+_K_GEOPOINTSRC, _K_ALTSRC = _keys(
+    _DETAIL.fields_by_name["precisionLocation"].message_type, "geopointsrc", "altsrc"
+)
+(_K_BATTERY,) = _keys(_DETAIL.fields_by_name["status"].message_type, "battery")
+_K_DEVICE, _K_PLATFORM, _K_OS, _K_VERSION = _keys(
+    _DETAIL.fields_by_name["takv"].message_type, "device", "platform", "os", "version"
+)
+_K_SPEED, _K_COURSE = _keys(
+    _DETAIL.fields_by_name["track"].message_type, "speed", "course"
+)
+# All five point fields, when none of them is zero.
+_pack_point = struct.Struct("<" + "".join(f"{len(key)}sd" for key in _K_POINT)).pack
+_K_LAT, _K_LON, _K_HAE, _K_CE, _K_LE = _K_POINT
+
+
+def payload_bounds(frame) -> Tuple[int, int]:
+    """Return the (start, end) offsets of the TakMessage payload in frame.
+
+    frame is a TAK Protocol Version 1 Mesh or Stream message. Raises ValueError
+    if it is neither, or if it is truncated.
+    """
+    if frame[:3] == DEFAULT_MESH_HEADER:
+        return len(DEFAULT_MESH_HEADER), len(frame)
+    if frame[:1] == DEFAULT_PROTO_HEADER:
+        size, start = _decode_varint(frame, len(DEFAULT_PROTO_HEADER))
+        if size is None or start + size > len(frame):
+            raise ValueError("Truncated TAK Protocol Stream message")
+        return start, start + size
+    raise ValueError("Not a TAK Protocol Version 1 message")
+
+
+def _read_varint(buf, pos: int) -> Tuple[int, int]:
+    """Decode a varint at pos, raising ValueError if buf ends first."""
+    value, pos = _decode_varint(buf, pos)
+    if value is None:
+        raise ValueError("Truncated varint")
+    return value, pos
+
+
+def _skip(buf, pos: int, wire_type: int) -> int:
+    """Return the position after a field value of wire_type starting at pos."""
+    if wire_type == 0:
+        _, pos = _read_varint(buf, pos)
+        return pos
+    if wire_type == 1:
+        return pos + 8
+    if wire_type == 2:
+        size, pos = _read_varint(buf, pos)
+        return pos + size
+    if wire_type == 5:
+        return pos + 4
+    raise ValueError(f"Unsupported wire type {wire_type}")
+
+
+def _scan_cot_event(
+    buf, pos: int, end: int, wanted: Dict[int, str], out: Dict[str, Any]
+) -> None:
+    """Store the wanted scalar fields of the CotEvent in buf[pos:end] in out.
+
+    wanted maps field numbers to names. The value encoding is taken from the
+    wire type, and the single-byte keys and lengths that make up nearly all of a
+    CotEvent are decoded inline.
+    """
+    while pos < end:
+        key = buf[pos]
+        if key < 0x80:
+            pos += 1
+        else:
+            key, pos = _read_varint(buf, pos)
+        wire_type = key & 7
+        name = wanted.get(key >> 3)
+
+        if wire_type == 1:
+            if name is not None:
+                out[name] = _unpack_double(buf, pos)[0]
+            pos += 8
+        elif wire_type == 2:
+            size = buf[pos]
+            if size < 0x80:
+                pos += 1
+            else:
+                size, pos = _read_varint(buf, pos)
+            if name is not None:
+                out[name] = str(buf[pos : pos + size], "utf-8")
+            pos += size
+        elif wire_type == 0:
+            value, pos = _read_varint(buf, pos)
+            if name is not None:
+                out[name] = value
+        else:
+            pos = _skip(buf, pos, wire_type)
+
+    if pos != end:
+        raise ValueError("Truncated CotEvent")
+
+
+def _message_spans(
+    buf, pos: int, end: int, path: Tuple[int, ...], numbers, spans: dict
+) -> None:
+    """Store the spans of fields numbers of the message path leads to in spans.
+
+    buf[pos:end] is a message, and path the field numbers of the sub-messages
+    to descend through from it.
+    """
+    while pos < end:
+        key, pos = _read_varint(buf, pos)
+        wire_type = key & 7
+        if path and key >> 3 == path[0] and wire_type == 2:
+            size, pos = _read_varint(buf, pos)
+            _message_spans(buf, pos, pos + size, path[1:], numbers, spans)
+            pos += size
+            continue
+        value_start = pos
+        pos = _skip(buf, pos, wire_type)
+        if not path and wire_type != 2 and key >> 3 in numbers:
+            spans[key >> 3] = (value_start, pos)
+
+
+def _field_spans(frame, numbers, path=()) -> Dict[int, Tuple[int, int]]:
+    """Return the (start, end) offsets of CotEvent scalar field values in frame.
+
+    numbers are the field numbers of CotEvent varint or fixed-width fields, or
+    with path those of the sub-message that the message field numbers in path
+    lead to from the CotEvent, such as Detail then Track. Fields absent from the
+    frame, which is how protobuf encodes a zero, are missing from the result.
+    """
+    spans: Dict[int, Tuple[int, int]] = {}
+    start, end = payload_bounds(frame)
+    with memoryview(frame) as buf:
+        _message_spans(
+            buf, start, end, (_COT_EVENT_FIELD,) + tuple(path), numbers, spans
+        )
+    return spans
+
+
+def scan_event(frame, fields: Iterable[str] = DEFAULT_SCAN_FIELDS) -> Dict[str, Any]:
+    """Read selected CotEvent fields from a frame, as quickly as the backend allows.
+
+    frame is a TAK Protocol Version 1 Mesh or Stream message, as bytes,
+    bytearray or memoryview. fields are CotEvent field names, as in cotevent.proto.
+    Fields missing from the frame have their protobuf default value. Raises
+    ValueError if frame is truncated or is not a TAK Protocol message.
+
+    With the pure Python protobuf backend the scalar fields (everything except
+    detail) are read straight from the wire, which is several times faster than
+    a full parse, and detail is skipped over without being decoded. The upb and
+    cpp backends parse a frame faster than it can be scanned, so with those, or
+    when detail is requested, the frame is parsed in full.
+    """
+    fields = tuple(fields)
+    if _SCAN and all(name in _SCALAR_FIELDS for name in fields):
+        return _scan_event(frame, fields)
+    start, end = payload_bounds(frame)
+    try:
+        # Copying the payload is faster than parsing it from a memoryview.
+        cot_event = TakMessage.FromString(frame[start:end]).cotEvent
+    except DecodeError as exc:
+        raise ValueError("Malformed TakMessage") from exc
+    return {name: getattr(cot_event, name) for name in fields}
+
+
+def _scan_event(frame, fields: Tuple[str, ...]) -> Dict[str, Any]:
+    """Read the scalar CotEvent fields from frame without a protobuf parse."""
+    wanted = {_SCALAR_FIELDS[name][0]: name for name in fields}
+    out = {name: _SCALAR_FIELDS[name][2] for name in fields}
+    start, end = payload_bounds(frame)
+    with memoryview(frame) as buf:
+        pos = start
+        try:
+            while pos < end:
+                key, pos = _read_varint(buf, pos)
+                wire_type = key & 7
+                if key >> 3 == _COT_EVENT_FIELD and wire_type == 2:
+                    size, pos = _read_varint(buf, pos)
+                    _scan_cot_event(buf, pos, pos + size, wanted, out)
+                    pos += size
+                else:
+                    pos = _skip(buf, pos, wire_type)
+        except (IndexError, struct.error) as exc:
+            raise ValueError("Truncated TakMessage") from exc
+    return out
+
+
+# Encoded lengths & varints below 0x80, which are a single byte.
+_SMALL = tuple(bytes((value,)) for value in range(0x80))
+
+
+def _varint(value: int) -> bytes:
+    """Encode value as a varint, quickly for millisecond timestamps."""
+    if 0x800000000 <= value < 0x40000000000:
+        # Six bytes, as for every time from 1971 until 2109.
+        return (
+            0x8080808080
+            | value & 0x7F
+            | value << 1 & 0x7F00
+            | value << 2 & 0x7F0000
+            | value << 3 & 0x7F000000
+            | value << 4 & 0x7F00000000
+            | value << 5 & 0x7F0000000000
+        ).to_bytes(6, "little")
+    if value < 0x80:
+        return _SMALL[value]
+    return _encode_varint(value)
+
+
+def _length_delimited(key: bytes, data: bytes) -> bytes:
+    """Return a length-delimited field."""
+    size = len(data)
+    return key + (_SMALL[size] if size < 0x80 else _encode_varint(size)) + data
+
+
+def _string(key: bytes, value: Optional[str]) -> bytes:
+    """Return a string field, or b"" for "" or None, which are omitted."""
+    if not value:
+        return b""
+    data = value.encode()
+    size = len(data)
+    return key + (_SMALL[size] if size < 0x80 else _encode_varint(size)) + data
+
+
+def _double(key: bytes, value: float) -> bytes:
+    """Return a double field, or b"" for 0.0, which is omitted."""
+    # A negative zero differs from the default, so it is encoded.
+    if value or math.copysign(1.0, value) < 0:
+        return key + _pack_double(value)
+    return b""
+
+
+def encode_cot_event(  # NOQA pylint: disable=too-many-arguments,too-many-locals
+    uid: str,
+    type: str,  # NOQA pylint: disable=redefined-builtin
+    how: str,
+    send_time: int,
+    start_time: int,
+    stale_time: int,
+    lat: float = 0.0,
+    lon: float = 0.0,
+    hae: float = 0.0,
+    ce: float = 0.0,
+    le: float = 0.0,
+    *,
+    access: str = "",
+    qos: str = "",
+    opex: str = "",
+    contact_uid: Optional[str] = None,
+    xml_detail: str = "",
+    endpoint: Optional[str] = None,
+    callsign: Optional[str] = None,
+    group_name: Optional[str] = None,
+    group_role: Optional[str] = None,
+    geopointsrc: Optional[str] = None,
+    altsrc: Optional[str] = None,
+    battery: Optional[int] = None,
+    device: Optional[str] = None,
+    platform: Optional[str] = None,
+    os: Optional[str] = None,  # NOQA pylint: disable=invalid-name
+    version: Optional[str] = None,
+    speed: Optional[float] = None,
+    course: Optional[float] = None,
+    protover: Optional[TAKProtoVer] = None,
+    out: Optional[bytearray] = None,
+) -> bytearray:
+    """Write a TakMessage holding one CotEvent without building the TakMessage.
+
+    Encodes the protobuf wire format directly, byte for byte the same as setting
+    the equivalent fields of a TakMessage and calling msg2proto(). Times are in
+    milliseconds since the epoch. A Detail sub-message (contact, group,
+    precisionLocation, status, takv or track) is written when any of its
+    arguments is not None; contact_uid likewise writes takControl.
+
+    The Mesh (the default) or Stream frame is appended to out, which is
+    returned, so one bytearray can collect any number of frames.
+
+    With the pure Python protobuf backend this is over ten times faster than
+    building and serializing a TakMessage. The upb and cpp backends serialize
+    in C, and building a TakMessage is somewhat faster with those.
+    """
+    send = _varint(send_time) if send_time else b""
+    parts = [
+        _string(_K_TYPE, type),
+        _string(_K_ACCESS, access),
+        _string(_K_QOS, qos),
+        _string(_K_OPEX, opex),
+        _string(_K_UID, uid),
+        _K_SEND_TIME + send if send_time else b"",
+    ]
+    if start_time:
+        parts.append(
+            _K_START_TIME + (send if start_time == send_time else _varint(start_time))
+        )
+    if stale_time:
+        parts.append(_K_STALE_TIME + _varint(stale_time))
+    parts.append(_string(_K_HOW, how))
+    if lat and lon and hae and ce and le:
+        parts.append(
+            _pack_point(_K_LAT, lat, _K_LON, lon, _K_HAE, hae, _K_CE, ce, _K_LE, le)
+        )
+    else:
+        for key, value in zip(_K_POINT, (lat, lon, hae, ce, le)):
+            parts.append(_double(key, float(value)))
+
+    detail = [_string(_K_XML_DETAIL, xml_detail)] if xml_detail else []
+    if endpoint is not None or callsign is not None:
+        detail.append(
+            _length_delimited(
+                _K_CONTACT,
+                _string(_K_ENDPOINT, endpoint) + _string(_K_CALLSIGN, callsign),
+            )
+        )
+    if group_name is not None or group_role is not None:
+        detail.append(
+            _length_delimited(
+                _K_GROUP, _string(_K_NAME, group_name) + _string(_K_ROLE, group_role)
+            )
+        )
+    if geopointsrc is not None or altsrc is not None:
+        detail.append(
+            _length_delimited(
+                _K_PRECISION,
+                _string(_K_GEOPOINTSRC, geopointsrc) + _string(_K_ALTSRC, altsrc),
+            )
+        )
+    if battery is not None:
+        detail.append(
+            _length_delimited(
+                _K_STATUS, _K_BATTERY + _varint(battery) if battery else b""
+            )
+        )
+    if (
+        device is not None
+        or platform is not None
+        or os is not None
+        or version is not None
+    ):
+        detail.append(
+            _length_delimited(
+                _K_TAKV,
+                _string(_K_DEVICE, device)
+                + _string(_K_PLATFORM, platform)
+                + _string(_K_OS, os)
+                + _string(_K_VERSION, version),
+            )
+        )
+    if speed is not None or course is not None:
+        detail.append(
+            _length_delimited(
+                _K_TRACK,
+                (b"" if speed is None else _double(_K_SPEED, float(speed)))
+                + (b"" if course is None else _double(_K_COURSE, float(course))),
+            )
+        )
+    if detail:
+        parts.append(_length_delimited(_K_DETAIL, b"".join(detail)))
+
+    payload = _length_delimited(_K_COT_EVENT, b"".join(parts))
+    if contact_uid is not None:
+        payload = (
+            _length_delimited(_K_TAK_CONTROL, _string(_K_CONTACT_UID, contact_uid))
+            + payload
+        )
+
+    if out is None:
+        out = bytearray()
+    if protover is None or protover == TAKProtoVer.MESH:
+        out += DEFAULT_MESH_HEADER
+    elif protover == TAKProtoVer.STREAM:
+        out += DEFAULT_PROTO_HEADER
+        out += _varint(len(payload))
+    else:
+        raise ValueError(f"Unsupported TAKProtoVer: {protover}")
+    out += payload
+    return out
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author:: Greg Albrecht <gba@snstac.com>
+# Copyright:: Copyright 2023 Sensors & Signals LLC
+# License:: Apache License, Version 2.0
+#
+
+
+"""TAKProto sample CoT events shared by the tests."""
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+UID = "aa0b0312-b5cd-4c2c-bbbc-9c4c70216261"
+DETAIL = (
+    "<uid Droid='Eliopoli HQ'/>"
+    "<contact callsign='Eliopoli HQ' endpoint='192.168.1.10:4242:tcp'/>"
+    "<__group name='Yellow' role='HQ'/><status battery='100'/>"
+    "<takv platform='WinTAK-CIV' device='LENOVO 20QV0007US' "
+    "os='Microsoft Windows 10 Home' version='1.10.0.137'/>"
+    "<track speed='0.00000000' course='0.00000000'/>"
+)
+
+
+def event_xml(uid: str = UID, detail: str = DETAIL) -> str:
+    """Return the WinTAK SA event of T_XML, with another uid or <detail>."""
+    return (
+        "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+        f"<event version='2.0' uid='{uid}' type='a-f-G-E-V-C' "
+        "time='2020-02-08T18:10:44.000Z' start='2020-02-08T18:10:44.000Z' "
+        "stale='2020-02-08T18:11:11.000Z' how='h-e'>"
+        "<point lat='43.97957317' lon='-66.07737696' hae='26.767999' "
+        "ce='9999999.0' le='9999999.0' />"
+        f"<detail>{detail}</detail></event>"
+    )
+
+
+# A Situational Awareness event as sent by WinTAK.
+T_XML = event_xml()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author:: Greg Albrecht <gba@snstac.com>
+# Copyright:: Copyright 2023 Sensors & Signals LLC
+# License:: Apache License, Version 2.0
+#
+
+"""TAKProto asyncio Protocol Tests."""
+
+import asyncio
+import functools
+import unittest
+
+import takproto
+
+from samples import T_XML
+
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+def async_test(func):
+    """Run the coroutine test method func in the test case's event loop."""
+
+    @functools.wraps(func)
+    def wrapper(self):
+        return self.loop.run_until_complete(func(self))
+
+    return wrapper
+
+
+class AsyncTestCase(unittest.TestCase):
+    """A TestCase with an event loop, as IsolatedAsyncioTestCase needs 3.8."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.async_setup())
+
+    def tearDown(self):
+        try:
+            self.loop.run_until_complete(self.async_teardown())
+        finally:
+            asyncio.set_event_loop(None)
+            self.loop.close()
+
+    async def async_setup(self):
+        pass
+
+    async def async_teardown(self):
+        pass
+
+
+class TestTAKStreamProtocol(AsyncTestCase):
+    async def async_setup(self):
+        self.msg = takproto.xml2msg(T_XML)
+        self.server_protocols = []
+
+        def factory():
+            protocol = takproto.TAKStreamProtocol(max_queue=4)
+            self.server_protocols.append(protocol)
+            return protocol
+
+        loop = asyncio.get_event_loop()
+        self.server = await loop.create_server(factory, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.transport, self.client = await takproto.open_stream("127.0.0.1", port)
+
+    async def async_teardown(self):
+        self.transport.close()
+        self.server.close()
+        await self.server.wait_closed()
+
+    @async_test
+    async def test_write_and_iterate(self):
+        """Test sending a batch of messages and reading them as an iterator."""
+        self.client.write_messages([self.msg] * 20)
+        await self.client.drain()
+        self.transport.close()
+
+        received = [msg async for msg in self.server_protocols[0]]
+        self.assertEqual(len(received), 20)
+        self.assertEqual(received[-1], self.msg)
+
+    @async_test
+    async def test_backpressure(self):
+        """Test that reading pauses while the queue is full."""
+        self.client.write_messages([self.msg] * 20)
+        await asyncio.sleep(0.1)
+        server = self.server_protocols[0]
+        self.assertFalse(server.transport.is_reading())
+
+        for _ in range(20):
+            await asyncio.wait_for(server.__anext__(), 1)
+        self.assertTrue(server.transport.is_reading())
+
+    @async_test
+    async def test_protocol_error(self):
+        """Test that a malformed stream closes the connection with an error."""
+        self.transport.write(b"\x00garbage")
+        with self.assertRaises(ValueError):
+            await asyncio.wait_for(self._first_server_message(), 1)
+
+    async def _first_server_message(self):
+        while not self.server_protocols:
+            await asyncio.sleep(0.01)
+        return await self.server_protocols[0].__anext__()
+
+
+class TestTAKMeshProtocol(AsyncTestCase):
+    @async_test
+    async def test_write_and_callback(self):
+        """Test sending Mesh datagrams to a callback over loopback."""
+        msg = takproto.xml2msg(T_XML)
+        received = []
+        loop = asyncio.get_event_loop()
+        server_transport, _ = await loop.create_datagram_endpoint(
+            lambda: takproto.TAKMeshProtocol(callback=received.append),
+            local_addr=("127.0.0.1", 0),
+        )
+        addr = server_transport.get_extra_info("sockname")
+        client_transport, client = await loop.create_datagram_endpoint(
+            takproto.TAKMeshProtocol, remote_addr=addr
+        )
+        try:
+            client.write_messages([msg] * 3)
+            client_transport.sendto(b"<event/>")
+            for _ in range(100):
+                if len(received) == 3:
+                    break
+                await asyncio.sleep(0.01)
+            self.assertEqual(received, [msg] * 3)
+        finally:
+            client_transport.close()
+            server_transport.close()
+
+    @async_test
+    async def test_drop_when_full(self):
+        """Test that datagrams are dropped and counted while the queue is full."""
+        msg = takproto.xml2msg(T_XML)
+        protocol = takproto.TAKMeshProtocol(max_queue=2)
+        datagram = bytes(takproto.msg2proto(msg))
+        for _ in range(5):
+            protocol.datagram_received(datagram, ("127.0.0.1", 6969))
+        self.assertEqual(protocol.dropped, 3)
+        self.assertEqual(await protocol.__anext__(), msg)
+
+    @async_test
+    async def test_malformed_datagrams(self):
+        """Test that truncated & malformed datagrams are counted, not raised."""
+        msg = takproto.xml2msg(T_XML)
+        protocol = takproto.TAKMeshProtocol()
+        mesh = bytes(takproto.msg2proto(msg))
+        stream = bytes(takproto.msg2proto(msg, takproto.TAKProtoVer.STREAM))
+        for datagram in (
+            b"",
+            b"\xbf",
+            b"\xbf" + b"\xff" * 12,
+            stream,
+            b"<event/>",
+        ):
+            protocol.datagram_received(datagram, ("127.0.0.1", 6969))
+        self.assertEqual(protocol.errors, 0)
+
+        for datagram in (mesh[:-5], b"\xbf\x01\xbf\xff\xff", b"\xbf\x01\xbf\x0a\x80"):
+            protocol.datagram_received(datagram, ("127.0.0.1", 6969))
+        self.assertEqual(protocol.errors, 3)
+
+        protocol.datagram_received(mesh, ("127.0.0.1", 6969))
+        self.assertEqual(await protocol.__anext__(), msg)
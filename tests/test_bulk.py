@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author:: Greg Albrecht <gba@snstac.com>
+# Copyright:: Copyright 2023 Sensors & Signals LLC
+# License:: Apache License, Version 2.0
+#
+
+"""TAKProto Bulk Conversion Tests."""
+
+import unittest
+
+import takproto
+
+from samples import event_xml
+
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+def get_uid(msg):
+    """Return the CoT Event UID of msg."""
+    return msg.cotEvent.uid
+
+
+class TestBulk(unittest.TestCase):
+    def setUp(self):
+        self.docs = [event_xml(f"uid-{i}") for i in range(50)]
+
+    def test_convert_many(self):
+        """Test converting many XML documents in order, in process & in a pool."""
+        expected = [bytes(takproto.xml2proto(doc)) for doc in self.docs]
+        for workers in (1, 2):
+            output = list(
+                takproto.convert_many(self.docs, workers=workers, chunksize=7)
+            )
+            self.assertEqual(output, expected)
+
+    def test_convert_many_stream(self):
+        """Test converting many XML documents to TAK Protocol Version 1 Stream."""
+        output = takproto.convert_many(self.docs, takproto.TAKProtoVer.STREAM)
+        decoder = takproto.StreamDecoder()
+        self.assertEqual(len(decoder.feed(b"".join(output))), 50)
+
+    def test_decode_many(self):
+        """Test decoding many frames in order, in process & in a pool."""
+        frames = list(takproto.convert_many(self.docs))
+        expected = [f"uid-{i}" for i in range(50)]
+        for workers in (1, 2):
+            output = takproto.decode_many(frames, get_uid, workers=workers, chunksize=7)
+            self.assertEqual(list(output), expected)
+
+        messages = list(takproto.decode_many(frames))
+        self.assertEqual([get_uid(msg) for msg in messages], expected)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author:: Greg Albrecht <gba@snstac.com>
+# Copyright:: Copyright 2023 Sensors & Signals LLC
+# License:: Apache License, Version 2.0
+#
+
+"""TAKProto Capture File Tests."""
+
+import ipaddress
+import os
+import struct
+import tempfile
+import time
+import unittest
+
+import takproto
+
+from takproto.capture import CaptureReader, CaptureWriter, read_pcap
+
+from samples import event_xml
+
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+def _frame(uid, protover=takproto.TAKProtoVer.MESH):
+    return bytes(
+        takproto.xml2proto(event_xml(uid, f"<contact callsign='{uid}'/>"), protover)
+    )
+
+
+def _udp(source, destination, port, payload):
+    """Return an IPv4 or IPv6 packet of a UDP datagram from source:4242."""
+    udp = struct.pack(">HHHH", 4242, port, 8 + len(payload), 0) + payload
+    source = ipaddress.ip_address(source)
+    destination = ipaddress.ip_address(destination)
+    if source.version == 6:
+        return (
+            struct.pack(">IHBB", 6 << 28, len(udp), 17, 1)
+            + source.packed
+            + destination.packed
+            + udp
+        )
+    return (
+        struct.pack(">BBHHHBBH", 0x45, 0, 20 + len(udp), 0, 0, 1, 17, 0)
+        + source.packed
+        + destination.packed
+        + udp
+    )
+
+
+def _pcap(path, linktype, packets, order="<", magic=0xA1B2C3D4):
+    """Write packets, as (seconds, fraction, packet), to a classic pcap file."""
+    with open(path, "wb") as pcap:
+        pcap.write(struct.pack(f"{order}IHHiIII", magic, 2, 4, 0, 0, 65535, linktype))
+        for seconds, fraction, packet in packets:
+            pcap.write(
+                struct.pack(f"{order}IIII", seconds, fraction, len(packet), len(packet))
+            )
+            pcap.write(packet)
+
+
+class TestCapture(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.tmp.name, "test.takcap")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        """Test writing frames in bulk and reading them back, parsed lazily."""
+        frames = [
+            _frame(f"uid-{i}", protover)
+            for i in range(50)
+            for protover in (takproto.TAKProtoVer.MESH, takproto.TAKProtoVer.STREAM)
+        ]
+        with CaptureWriter(self.path, buffer_size=1000) as writer:
+            offsets = [
+                writer.write(
+                    frame, f"10.0.0.{i % 3}:6969", 1_581_185_444_000_000_000 + i
+                )
+                for i, frame in enumerate(frames)
+            ]
+            self.assertEqual(
+                writer.size, os.path.getsize(self.path) + len(writer._buffer)
+            )
+
+        with CaptureReader(self.path) as reader:
+            records = list(reader)
+            self.assertEqual([bytes(record.frame) for record in records], frames)
+            self.assertEqual([record.offset for record in records], offsets)
+            self.assertIsInstance(records[0].frame, memoryview)
+            self.assertEqual(records[4].peer, "10.0.0.1:6969")
+            self.assertEqual(records[4].time_ns, 1_581_185_444_000_000_004)
+            self.assertEqual(records[3].message.cotEvent.uid, "uid-1")
+            self.assertEqual(reader.record(offsets[7]).message.cotEvent.uid, "uid-3")
+            self.assertEqual(len(list(reader.records(offsets[-2]))), 2)
+            record, msg = next(reader.messages())
+            self.assertEqual(msg.cotEvent.detail.contact.callsign, "uid-0")
+            del records, record
+
+    def test_default_time(self):
+        """Test that frames are timestamped with the time they are written."""
+        before = time.time_ns()
+        with CaptureWriter(self.path) as writer:
+            writer.write(_frame("uid-0"))
+        after = time.time_ns()
+
+        with CaptureReader(self.path) as reader:
+            (record,) = reader
+            self.assertTrue(before <= record.time_ns <= after)
+            del record
+
+    def test_append_torn_record(self):
+        """Test that reopening a capture drops a record cut short, then appends."""
+        with CaptureWriter(self.path) as writer:
+            writer.write(_frame("first"), "peer")
+        size = os.path.getsize(self.path)
+        with open(self.path, "ab") as capture:
+            capture.write(struct.pack("<QIH", 0, 500, 4) + b"peer" + b"\xbf" * 10)
+
+        with CaptureReader(self.path) as reader:
+            self.assertEqual(len(list(reader)), 1)
+        with CaptureWriter(self.path) as writer:
+            self.assertEqual(writer.write(_frame("second")), size)
+        with CaptureReader(self.path) as reader:
+            self.assertEqual(
+                [record.message.cotEvent.uid for record in reader], ["first", "second"]
+            )
+
+    def test_not_a_capture(self):
+        """Test that other files are rejected."""
+        with open(self.path, "wb") as other:
+            other.write(b"<event/>")
+        with self.assertRaises(ValueError):
+            CaptureReader(self.path)
+        with self.assertRaises(ValueError):
+            CaptureWriter(self.path)
+        with self.assertRaises(ValueError):
+            list(read_pcap(self.path))
+
+    def test_read_pcap_ethernet(self):
+        """Test importing UDP multicast from an Ethernet pcap with VLAN tags."""
+        ethernet = b"\x01\x00\x5e\x02\x03\x01" + b"\x02" * 6 + b"\x08\x00"
+        vlan = b"\x01\x00\x5e\x02\x03\x01" + b"\x02" * 6 + b"\x81\x00\x00\x05\x08\x00"
+        tcp = bytearray(_udp("10.0.0.9", "10.0.0.1", 6969, b"x"))
+        tcp[9] = 6
+        packets = [
+            (
+                1581185444,
+                250000,
+                ethernet + _udp("10.0.0.2", "239.2.3.1", 6969, _frame("a")),
+            ),
+            (1581185445, 0, vlan + _udp("10.0.0.3", "239.2.3.1", 6969, _frame("b"))),
+            (1581185446, 0, ethernet + _udp("10.0.0.4", "10.0.0.1", 6969, _frame("c"))),
+            (
+                1581185447,
+                0,
+                ethernet + _udp("10.0.0.5", "239.2.3.1", 17012, b"<event/>"),
+            ),
+            (1581185448, 0, ethernet + bytes(tcp)),
+            (1581185449, 0, b"\x01" * 12 + b"\x08\x06" + b"\x00" * 28),
+        ]
+        pcap_path = os.path.join(self.tmp.name, "mesh.pcap")
+        _pcap(pcap_path, 1, packets)
+
+        records = list(read_pcap(pcap_path))
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records[0].peer, "10.0.0.2:4242")
+        self.assertEqual(records[0].time_ns, 1_581_185_444_250_000_000)
+        self.assertEqual(records[1].message.cotEvent.uid, "b")
+
+        multicast = list(read_pcap(pcap_path, port=6969, multicast=True))
+        self.assertEqual(
+            [record.message.cotEvent.uid for record in multicast], ["a", "b"]
+        )
+
+        with CaptureWriter(self.path) as writer:
+            self.assertEqual(writer.write_records(multicast), 2)
+        with CaptureReader(self.path) as reader:
+            self.assertEqual(
+                [record.peer for record in reader], ["10.0.0.2:4242", "10.0.0.3:4242"]
+            )
+
+    def test_read_pcap_linux_cooked_ipv6(self):
+        """Test a big-endian, nanosecond Linux cooked capture of IPv6."""
+        sll = b"\x00\x00\x00\x01\x00\x06" + b"\x02" * 8 + b"\x86\xdd"
+        packet = sll + _udp("fe80::1", "ff02::1", 6969, _frame("v6"))
+        pcap_path = os.path.join(self.tmp.name, "v6.pcap")
+        _pcap(pcap_path, 113, [(1581185444, 7, packet)], ">", 0xA1B23C4D)
+
+        (record,) = read_pcap(pcap_path, multicast=True)
+        self.assertEqual(record.peer, "[fe80::1]:4242")
+        self.assertEqual(record.time_ns, 1_581_185_444_000_000_007)
+        self.assertEqual(record.message.cotEvent.uid, "v6")
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author:: Greg Albrecht <gba@snstac.com>
+# Copyright:: Copyright 2023 Sensors & Signals LLC
+# License:: Apache License, Version 2.0
+#
+
+"""TAKProto Class Tests."""
+
+import unittest
+
+import takproto
+
+from samples import T_XML
+
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+T_STREAM = bytes(takproto.xml2proto(T_XML, takproto.TAKProtoVer.STREAM))
+
+
+class TestStreamDecoder(unittest.TestCase):
+    def test_feed_coalesced(self):
+        """Test decoding several Stream messages delivered in one read."""
+        decoder = takproto.StreamDecoder()
+        messages = decoder.feed(T_STREAM * 3)
+        self.assertEqual(len(messages), 3)
+        for msg in messages:
+            self.assertEqual(msg.cotEvent.uid, "aa0b0312-b5cd-4c2c-bbbc-9c4c70216261")
+        self.assertEqual(len(decoder), 0)
+
+    def test_feed_partial(self):
+        """Test decoding Stream messages split across many reads."""
+        decoder = takproto.StreamDecoder()
+        data = T_STREAM * 2
+        messages = []
+        for i in range(0, len(data), 7):
+            messages.extend(decoder.feed(data[i : i + 7]))
+        self.assertEqual(len(messages), 2)
+        self.assertEqual(messages[1].cotEvent.detail.contact.callsign, "Eliopoli HQ")
+        self.assertEqual(len(decoder), 0)
+
+    def test_feed_keeps_tail(self):
+        """Test that a trailing partial frame is held until completed."""
+        decoder = takproto.StreamDecoder()
+        messages = decoder.feed(T_STREAM + T_STREAM[:2])
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(len(decoder), 2)
+        messages = decoder.feed(T_STREAM[2:])
+        self.assertEqual(len(messages), 1)
+
+    def test_feed_bad_magic(self):
+        """Test that a bad magic byte raises and clears the buffer."""
+        decoder = takproto.StreamDecoder()
+        with self.assertRaises(ValueError):
+            decoder.feed(b"\x00" + T_STREAM)
+        self.assertEqual(len(decoder), 0)
+
+    def test_feed_max_frame_size(self):
+        """Test that frames larger than max_frame_size are rejected."""
+        decoder = takproto.StreamDecoder(max_frame_size=64)
+        with self.assertRaises(ValueError):
+            decoder.feed(T_STREAM[:3])
+
+
+class TestXMLStreamReader(unittest.TestCase):
+    def test_feed_chunks(self):
+        """Test reading concatenated CoT XML events from small chunks."""
+        reader = takproto.XMLStreamReader()
+        data = (T_XML * 3).encode()
+        messages = []
+        for i in range(0, len(data), 5):
+            messages.extend(reader.feed(data[i : i + 5]))
+
+        self.assertEqual(len(messages), 3)
+        for msg in messages:
+            self.assertEqual(msg, takproto.xml2msg(T_XML))
+        self.assertEqual(len(reader._root), 0)
+
+    def test_feed_protover(self):
+        """Test reading CoT XML events as TAK Protocol Version 1 Stream."""
+        reader = takproto.XMLStreamReader(takproto.TAKProtoVer.STREAM)
+        output = reader.feed(T_XML.encode() + T_XML.encode()[:40])
+        self.assertEqual(
+            output, [takproto.xml2proto(T_XML, takproto.TAKProtoVer.STREAM)]
+        )
+        self.assertEqual(len(reader.feed(T_XML.encode()[40:])), 1)
+
+    def test_feed_no_declaration(self):
+        """Test reading CoT XML events without XML declarations."""
+        reader = takproto.XMLStreamReader()
+        event = T_XML.split("\n", 1)[1].encode()
+        self.assertEqual(len(reader.feed(event + b"\n" + event)), 2)
+
+
+def _track(uid, send_time, stale_time):
+    msg = takproto.xml2msg(T_XML)
+    msg.cotEvent.uid = uid
+    msg.cotEvent.sendTime = send_time
+    msg.cotEvent.staleTime = stale_time
+    return msg
+
+
+class TestTrackCache(unittest.TestCase):
+    def test_update_duplicates(self):
+        """Test that duplicate and out-of-order reports are dropped."""
+        cache = takproto.TrackCache()
+        self.assertTrue(cache.update(_track("a", 100, 1000), now=0))
+        self.assertFalse(cache.update(_track("a", 100, 1000), now=0))
+        self.assertFalse(cache.update(_track("a", 50, 1000), now=0))
+        self.assertTrue(cache.update(_track("a", 200, 1000), now=0))
+        self.assertEqual(cache.get("a").cotEvent.sendTime, 200)
+        self.assertIn("a", cache)
+        self.assertIsNone(cache.get("b"))
+        self.assertFalse(cache.update(_track("b", 100, 10), now=10))
+
+        with self.assertRaises(ValueError):
+            cache.update(_track("", 100, 1000))
+
+    def test_expire(self):
+        """Test evicting entries on staleTime."""
+        cache = takproto.TrackCache()
+        cache.update(_track("a", 100, 1000), now=0)
+        cache.update(_track("b", 100, 500), now=0)
+        cache.update(_track("b", 200, 2000), now=0)
+        self.assertEqual(cache.expire(now=999), [])
+        self.assertEqual(cache.expire(now=1000), ["a"])
+        self.assertEqual(list(cache), ["b"])
+        cache.update(_track("c", 100, 3000), now=2000)
+        self.assertEqual(list(cache), ["c"])
+
+    def test_max_size(self):
+        """Test that the least recently updated entry is evicted when full."""
+        cache = takproto.TrackCache(max_size=2)
+        cache.update(_track("a", 100, 1000), now=0)
+        cache.update(_track("b", 100, 1000), now=0)
+        cache.update(_track("a", 200, 1000), now=0)
+        cache.update(_track("c", 100, 1000), now=0)
+        self.assertEqual(list(cache), ["a", "c"])
+
+        for i in range(1000):
+            cache.update(_track("a", 300 + i, 1000 + i), now=0)
+        self.assertLess(len(cache._stale), 100)
+
+    def test_changed_since(self):
+        """Test iterating over the entries updated after a version."""
+        cache = takproto.TrackCache()
+        cache.update(_track("a", 100, 1000), now=0)
+        cache.update(_track("b", 100, 1000), now=0)
+        version = cache.version
+        self.assertEqual(list(cache.changed_since(version)), [])
+        cache.update(_track("c", 100, 1000), now=0)
+        cache.update(_track("a", 200, 1000), now=0)
+        self.assertEqual([uid for uid, _ in cache.changed_since(version)], ["c", "a"])
+        self.assertEqual(len(list(cache.changed_since(0))), 3)
+
+
+class TestDeltaEncoder(unittest.TestCase):
+    def test_encode_unchanged(self):
+        """Test that re-announced SA is encoded like msg2proto()."""
+        encoder = takproto.DeltaEncoder(takproto.TAKProtoVer.STREAM)
+        msg = _track("a", 1581185444000, 1581185474000)
+        self.assertEqual(
+            encoder.encode(msg), takproto.msg2proto(msg, takproto.TAKProtoVer.STREAM)
+        )
+        msg.cotEvent.sendTime += 5000
+        msg.cotEvent.staleTime += 5000
+        self.assertEqual(
+            encoder.encode(msg), takproto.msg2proto(msg, takproto.TAKProtoVer.STREAM)
+        )
+        self.assertEqual(len(encoder), 1)
+
+    def test_encode_suppress(self):
+        """Test suppressing updates under min_interval & min_distance."""
+        encoder = takproto.DeltaEncoder(min_interval=10000, min_distance=5.0)
+        msg = _track("a", 1581185444000, 1581185474000)
+        self.assertIsNotNone(encoder.encode(msg))
+
+        msg.cotEvent.sendTime += 5000
+        self.assertIsNone(encoder.encode(msg))
+        msg.cotEvent.lat += 0.00001  # about 1.1 m
+        self.assertIsNone(encoder.encode(msg))
+        msg.cotEvent.lat += 0.001
+        self.assertIsNotNone(encoder.encode(msg))
+
+        msg.cotEvent.sendTime += 5000
+        msg.cotEvent.detail.contact.callsign = "Changed"
+        self.assertIsNotNone(encoder.encode(msg))
+        msg.cotEvent.sendTime += 10000
+        self.assertIsNotNone(encoder.encode(msg))
+
+    def test_encode_out_of_order(self):
+        """Test that updates older than the last frame sent are not suppressed."""
+        never = takproto.DeltaEncoder()
+        encoder = takproto.DeltaEncoder(min_interval=10000)
+        msg = _track("a", 1581185444000, 1581185474000)
+        self.assertIsNotNone(never.encode(msg))
+        self.assertIsNotNone(encoder.encode(msg))
+
+        msg.cotEvent.sendTime -= 2000
+        self.assertIsNotNone(never.encode(msg))
+        self.assertIsNotNone(encoder.encode(msg))
+        msg.cotEvent.sendTime += 1000
+        self.assertIsNotNone(never.encode(msg))
+        self.assertIsNone(encoder.encode(msg))
+
+    def test_refresh(self):
+        """Test patching new times into the last frame sent."""
+        encoder = takproto.DeltaEncoder()
+        msg = _track("a", 1581185444000, 1581185474000)
+        self.assertIsNone(encoder.refresh("a", 1, 1, 1))
+        encoder.encode(msg)
+
+        cot_event = msg.cotEvent
+        cot_event.sendTime = cot_event.startTime = 1581185449000
+        cot_event.staleTime = 1581185479000
+        frame = encoder.refresh(
+            "a", cot_event.sendTime, cot_event.startTime, cot_event.staleTime
+        )
+        self.assertEqual(frame, takproto.msg2proto(msg))
+        self.assertEqual(takproto.parse_proto(frame), msg)
+        self.assertIsNone(encoder.refresh("a", 1, 1, 1))
+
+
+class TestEncodedEvent(unittest.TestCase):
+    def test_from_xml(self):
+        """Test encoding one CoT XML event in every format."""
+        event = takproto.EncodedEvent.from_xml(T_XML)
+        self.assertEqual(event.xml, T_XML)
+        self.assertEqual(
+            event.mesh, takproto.xml2proto(T_XML, takproto.TAKProtoVer.MESH)
+        )
+        self.assertEqual(
+            event.stream, takproto.xml2proto(T_XML, takproto.TAKProtoVer.STREAM)
+        )
+        self.assertIsInstance(event.mesh, bytes)
+        self.assertIs(event.mesh, event.encode(takproto.TAKProtoVer.MESH))
+        self.assertIs(event.payload, event.payload)
+        self.assertIs(event.xml, event.encode(takproto.TAKProtoVer.XML))
+
+    def test_from_frame(self):
+        """Test re-framing a received message without parsing it."""
+        stream = takproto.xml2proto(T_XML, takproto.TAKProtoVer.STREAM)
+        event = takproto.EncodedEvent.from_frame(memoryview(stream))
+        self.assertEqual(
+            event.mesh, takproto.xml2proto(T_XML, takproto.TAKProtoVer.MESH)
+        )
+        self.assertIsNone(event._message)
+        self.assertEqual(event.stream, stream)
+        self.assertEqual(event.message, takproto.xml2msg(T_XML))
+        self.assertEqual(takproto.xml2msg(event.xml), event.message)
+
+    def test_from_message(self):
+        """Test serializing a TakMessage once for both framings."""
+        msg = takproto.xml2msg(T_XML)
+        event = takproto.EncodedEvent(msg)
+        self.assertEqual(
+            event.stream, takproto.msg2proto(msg, takproto.TAKProtoVer.STREAM)
+        )
+        self.assertEqual(event.mesh, takproto.msg2proto(msg))
+        with self.assertRaises(ValueError):
+            takproto.EncodedEvent()
+        with self.assertRaises(ValueError):
+            event.encode(None)
+
+
+class TestEventRecord(unittest.TestCase):
+    def test_round_trip(self):
+        """Test that a record rebuilds a TakMessage that serializes identically."""
+        msg = takproto.parse_proto(T_STREAM)
+        msg.cotEvent.opex = "e-x"
+        msg.cotEvent.lon = -0.0
+        msg.takControl.contactUid = "ANDROID-1"
+        record = takproto.EventRecord(msg)
+
+        self.assertEqual(record.to_message(), msg)
+        self.assertEqual(
+            record.to_message().SerializeToString(), msg.SerializeToString()
+        )
+        self.assertEqual(record.uid, "aa0b0312-b5cd-4c2c-bbbc-9c4c70216261")
+        self.assertEqual(record.staleTime, msg.cotEvent.staleTime)
+        self.assertEqual(record.lat, msg.cotEvent.lat)
+        self.assertEqual(record.detail.contact.callsign, "Eliopoli HQ")
+
+    def test_frames(self):
+        """Test converting from & to Mesh and Stream frames."""
+        record = takproto.EventRecord.from_frame(T_STREAM)
+        self.assertEqual(record.to_frame(takproto.TAKProtoVer.STREAM), T_STREAM)
+        mesh = record.to_frame()
+        self.assertEqual(takproto.EventRecord.from_frame(mesh).to_frame(), mesh)
+
+    def test_interned_without_detail(self):
+        """Test that strings are shared and an absent Detail stays absent."""
+        msg = takproto.parse_proto(T_STREAM)
+        msg.cotEvent.ClearField("detail")
+        first = takproto.EventRecord(msg)
+        second = takproto.EventRecord(takproto.parse_proto(T_STREAM))
+
+        self.assertIs(first.type, second.type)
+        self.assertFalse(first.to_message().cotEvent.HasField("detail"))
+        self.assertFalse(first.to_message().HasField("takControl"))
+        self.assertEqual(first.detail, takproto.proto.Detail())
+        with self.assertRaises(ValueError):
+            takproto.EventRecord(takproto.proto.TakMessage())
+
+    def test_detail_pool(self):
+        """Test that a pool shares equal Details and holds at most max_size."""
+        pool = takproto.DetailPool(max_size=2)
+        msg = takproto.parse_proto(T_STREAM)
+        first = takproto.EventRecord(msg, pool)
+        second = takproto.EventRecord.from_frame(T_STREAM, pool)
+        self.assertIs(first._detail, second._detail)
+        self.assertIsNot(first._detail, takproto.EventRecord(msg)._detail)
+
+        for battery in range(5):
+            msg.cotEvent.detail.status.battery = battery
+            record = takproto.EventRecord(msg, pool)
+            self.assertEqual(record.detail.status.battery, battery)
+        self.assertEqual(len(pool), 2)
+        self.assertEqual(second.detail.contact.callsign, "Eliopoli HQ")
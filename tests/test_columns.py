@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author:: Greg Albrecht <gba@snstac.com>
+# Copyright:: Copyright 2023 Sensors & Signals LLC
+# License:: Apache License, Version 2.0
+#
+
+"""TAKProto NumPy Column Export Tests."""
+
+import unittest
+
+import takproto
+
+from samples import event_xml
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+DETAIL = (
+    "<contact callsign='Eliopoli HQ' endpoint='192.168.1.10:4242:tcp'/>"
+    "<track speed='{speed}' course='90.0'/>"
+)
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestColumns(unittest.TestCase):
+    def test_decode_to_arrays(self):
+        """Test decoding Mesh & Stream frames into a structured array."""
+        frames = [
+            takproto.xml2proto(
+                event_xml(f"uid-{i % 2}", DETAIL.format(speed=i)), protover
+            )
+            for i in range(4)
+            for protover in (takproto.TAKProtoVer.MESH, takproto.TAKProtoVer.STREAM)
+        ]
+        arr = takproto.decode_to_arrays(frames)
+
+        self.assertEqual(arr.shape, (8,))
+        self.assertEqual(
+            arr.dtype.names, tuple(name for name, _ in takproto.columns.COLUMNS)
+        )
+        np.testing.assert_array_equal(arr["speed"], [0, 0, 1, 1, 2, 2, 3, 3])
+        np.testing.assert_array_equal(arr["course"], 90.0)
+        self.assertEqual(arr["lat"][0], 43.97957317)
+        self.assertEqual(arr["staleTime"][0], 1581185471000)
+        self.assertIs(arr["uid"][0], arr["uid"][4])
+        self.assertIs(arr["type"][0], arr["type"][1])
+
+    def test_to_columns_empty(self):
+        """Test that no messages give an empty array with every column."""
+        arr = takproto.to_columns([])
+        self.assertEqual(len(arr), 0)
+        self.assertIn("staleTime", arr.dtype.names)
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestColumnEncoder(unittest.TestCase):
+    NOW = 1581185444000
+
+    def _encoder(self, count, **kwargs):
+        return takproto.ColumnEncoder(
+            [f"uid-{i}" for i in range(count)],
+            "a-f-G-E-V-C",
+            callsigns=[f"callsign-{i}" for i in range(count)],
+            group_names="Yellow",
+            group_roles="HQ",
+            **kwargs,
+        )
+
+    def test_frames_match_encode_cot_event(self):
+        """Test that each frame parses the same as encode_cot_event() output."""
+        count = 50
+        rng = np.random.default_rng(0)
+        encoder = self._encoder(count, track=True)
+        lat = rng.uniform(-90, 90, count)
+        lat[:5] = 0.0
+        lon = rng.uniform(-180, 180, count)
+        speed = rng.uniform(0, 30, count)
+        speed[::3] = 0.0
+        send_time = self.NOW + rng.integers(0, 1000, count)
+
+        frames = encoder.frames(
+            send_time,
+            self.NOW,
+            self.NOW + 60000,
+            lat,
+            lon,
+            12.5,
+            9999999.0,
+            0.0,
+            speed,
+            90.0,
+        )
+
+        self.assertEqual(len(frames), count)
+        for i, frame in enumerate(frames):
+            expected = takproto.encode_cot_event(
+                f"uid-{i}",
+                "a-f-G-E-V-C",
+                "m-g",
+                int(send_time[i]),
+                self.NOW,
+                self.NOW + 60000,
+                lat[i],
+                lon[i],
+                12.5,
+                9999999.0,
+                0.0,
+                callsign=f"callsign-{i}",
+                group_name="Yellow",
+                group_role="HQ",
+                speed=speed[i],
+                course=90.0,
+            )
+            self.assertEqual(
+                takproto.parse_proto(frame), takproto.parse_proto(expected)
+            )
+
+    def test_encode_stream(self):
+        """Test that a tick of Stream frames decodes as one message per entity."""
+        encoder = self._encoder(10, protover=takproto.TAKProtoVer.STREAM)
+        first = encoder.encode(self.NOW, self.NOW, self.NOW + 1, 1.0, np.arange(10))
+        second = encoder.encode(self.NOW, self.NOW, self.NOW + 1, 2.0, np.arange(10))
+
+        decoder = takproto.StreamDecoder()
+        msgs = list(decoder.feed(second))
+        self.assertEqual(len(first), encoder.offsets[-1])
+        self.assertEqual([msg.cotEvent.lon for msg in msgs], list(range(10)))
+        self.assertEqual({msg.cotEvent.lat for msg in msgs}, {2.0})
+        self.assertFalse(msgs[0].cotEvent.detail.HasField("track"))
+
+    def test_invalid(self):
+        """Test that mismatched columns & out of range times raise ValueError."""
+        with self.assertRaises(ValueError):
+            self._encoder(2, endpoints=["a", "b", "c"])
+        encoder = self._encoder(2)
+        with self.assertRaises(ValueError):
+            encoder.encode(0, self.NOW, self.NOW, 1.0, 1.0)
+        with self.assertRaises(ValueError):
+            encoder.encode(self.NOW, self.NOW, 1 << 42, 1.0, 1.0)
+
+    def test_no_uids(self):
+        """Test that an encoder without any entities is rejected up front."""
+        with self.assertRaisesRegex(ValueError, "at least one uid"):
+            self._encoder(0)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author:: Greg Albrecht <gba@snstac.com>
+# Copyright:: Copyright 2023 Sensors & Signals LLC
+# License:: Apache License, Version 2.0
+#
+
+"""TAKProto Fast Path Tests."""
+
+import random
+import unittest
+import xml.etree.ElementTree as ET
+
+import takproto
+
+from takproto.fast import _scan2msg
+
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+def _element(rng, tag, attrs):
+    """Return an empty element with attrs, quoted & spaced at random."""
+    parts = []
+    items = list(attrs.items())
+    rng.shuffle(items)
+    for name, value in items:
+        quote = rng.choice("'\"")
+        parts.append(f"{rng.choice((' ', '  ', chr(10)))}{name}={quote}{value}{quote}")
+    return f"<{tag}{''.join(parts)}{rng.choice(('', ' '))}/>"
+
+
+def _event(rng, index):
+    """Return a CoT event, usually SA, with random variations."""
+    uid = f"ANDROID-{index}"
+    if rng.random() < 0.05:
+        uid = f"GeoChat.{uid}.All Chat Rooms.{index}"
+    children = [
+        ("contact", {"callsign": f"UNIT-{index}", "endpoint": "*:-1:stcp"}),
+        ("__group", {"name": rng.choice(("Cyan", "")), "role": "Team Lead"}),
+        ("status", {"battery": rng.choice(("100", "5", "full", "-1", ""))}),
+        ("takv", {"platform": "ATAK-CIV", "device": "PIXEL", "os": "30"}),
+        ("track", {"speed": rng.choice(("0.0", "1e3", "fast")), "course": "90"}),
+        ("precisionlocation", {"altsrc": "GPS", "geopointsrc": "USER"}),
+        ("uid", {"Droid": f"UNIT-{index}"}),
+        ("remarks", {}),
+        ("link", {"uid": uid, "relation": "p-p"}),
+    ]
+    detail = [
+        _element(rng, tag, attrs)
+        for tag, attrs in rng.sample(children, rng.randint(0, len(children)))
+    ]
+    if rng.random() < 0.1:
+        detail.append(_element(rng, "contact", {"callsign": "Again"}))
+    if rng.random() < 0.05:
+        detail.append("<remarks>text</remarks>")
+    if rng.random() < 0.05:
+        detail.append(_element(rng, "contact", {"callsign": "A &amp; B"}))
+    space = rng.choice(("", "\n", "  "))
+
+    event = (
+        _element(
+            rng,
+            "event",
+            {
+                "version": "2.0",
+                "uid": uid,
+                "type": rng.choice(("a-f-G-U-C", "b-t-f", "")),
+                "how": "m-g",
+                "time": "2020-02-08T18:10:44.000Z",
+                "start": rng.choice(
+                    ("2020-02-08T18:10:44.000Z", "2020-02-08T18:10:44Z")
+                ),
+                "stale": "2020-02-08T18:12:44.500Z",
+            },
+        )[:-2].rstrip()
+        + ">"
+    )
+    point = _element(
+        rng,
+        "point",
+        {
+            "lat": f"{rng.uniform(-90, 90):.8f}",
+            "lon": f"{rng.uniform(-180, 180):.8f}",
+            "hae": rng.choice(("9999999.0", "0", "")),
+            "ce": "9.9",
+            "le": "9999999.0",
+        },
+    )
+    body = []
+    if rng.random() < 0.95:
+        body.append(point)
+    roll = rng.random()
+    if roll < 0.8:
+        body.append(f"<detail>{space.join(detail)}</detail>")
+    elif roll < 0.85:
+        body.append("<detail/>")
+    prolog = rng.choice(("", "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>"))
+    return f"{prolog}{space}{event}{space.join(body)}{space}</event>{space}"
+
+
+class TestFastPath(unittest.TestCase):
+    def test_differential(self):
+        """Test that the fast path & the ElementTree path give identical output."""
+        rng = random.Random(0)
+        scanned = 0
+        for index in range(3000):
+            xml = _event(rng, index)
+            expected = takproto.xml2proto(xml)
+            self.assertEqual(takproto.fast_xml2proto(xml), expected, xml)
+            scanned += _scan2msg(xml) is not None
+        # Entity references & text content are left to the ElementTree path.
+        self.assertGreater(scanned, 2500)
+
+    def test_custom_converter(self):
+        """Test that custom detail converters get an Element on the fast path."""
+
+        def convert_link(elem, contact):
+            contact.callsign = elem.tag + elem.get("uid")
+
+        xml = _event(random.Random(1), 1)
+        xml = xml.replace("<detail>", "<detail><link uid='x'/>")
+        takproto.register_detail(
+            "link",
+            "contact",
+            convert_link,
+            lambda contact: [("uid", contact.callsign[4:])],
+        )
+        try:
+            self.assertIsNotNone(_scan2msg(xml))
+            self.assertEqual(takproto.fast_xml2proto(xml), takproto.xml2proto(xml))
+        finally:
+            takproto.unregister_detail("link")
+
+    def test_fallback(self):
+        """Test that unusual or malformed events go to the ElementTree path."""
+        for xml in (
+            "<event uid='a'><point lat='1'/><point lat='2'/></event>",
+            "<event uid='a'><!-- comment --></event>",
+            "<event uid='a'><detail><contact callsign='x'/>",
+        ):
+            self.assertIsNone(_scan2msg(xml), xml)
+
+        msg = takproto.fast_xml2msg(
+            "<event uid='a'><point lat='1'/><point lat='2'/></event>"
+        )
+        self.assertEqual(msg.cotEvent.lat, 1.0)
+        with self.assertRaises(ET.ParseError):
+            takproto.fast_xml2msg("<event uid='a' uid='b'></event>")
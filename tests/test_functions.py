@@ -24,6 +24,7 @@
 
 from datetime import datetime, timezone
 import unittest
+import xml.etree.ElementTree as ET
 
 import takproto
 
@@ -32,6 +33,10 @@ __author__ = "Greg Albrecht <gba@snstac.com>"
 __copyright__ = "Copyright 2023 Sensors & Signals LLC"
 __license__ = "Apache License, Version 2.0"
 
+T_XML = """<?xml version='1.0' encoding='UTF-8' standalone='yes'?>
+<event version='2.0' uid='aa0b0312-b5cd-4c2c-bbbc-9c4c70216261' type='a-f-G-E-V-C' time='2020-02-08T18:10:44.000Z' start='2020-02-08T18:10:44.000Z' stale='2020-02-08T18:11:11.000Z' how='h-e'><point lat='43.97957317' lon='-66.07737696' hae='26.767999' ce='9999999.0' le='9999999.0' /><detail><uid Droid='Eliopoli HQ'/><contact callsign='Eliopoli HQ' endpoint='192.168.1.10:4242:tcp'/><__group name='Yellow' role='HQ'/><status battery='100'/><takv platform='WinTAK-CIV' device='LENOVO 20QV0007US' os='Microsoft Windows 10 Home' version='1.10.0.137'/><track speed='0.00000000' course='0.00000000'/></detail></event>
+"""
+
 
 class TestFunctions(unittest.TestCase):
     def test_format_timestamp(self):
@@ -54,7 +59,7 @@ class TestFunctions(unittest.TestCase):
         """
 
         t_ba = bytearray(
-            b'\xbf\x01\xbf\x12\x9c\x02\n\x0ba-f-G-E-V-C*$aa0b0312-b5cd-4c2c-bbbc-9c4c702162610\xa0\xd1\xfc\xaf\x82.8\xa0\xd1\xfc\xaf\x82.@\x98\xa4\xfe\xaf\x82.J\x03h-eQ3\x98T\xa7b\xfdE@Y}*~\xbe\xf3\x84P\xc0aW\\\x1c\x95\x9b\xc4:@i\x00\x00\x00\xe0\xcf\x12cAq\x00\x00\x00\xe0\xcf\x12cAz\x9f\x01\n\x1b<uid Droid="Eliopoli HQ" />\x12$\n\x15192.168.1.10:4242:tcp\x12\x0bEliopoli HQ\x1a\x0c\n\x06Yellow\x12\x02HQ*\x02\x08d2F\n\x11LENOVO 20QV0007US\x12\nWinTAK-CIV\x1a\x19Microsoft Windows 10 Home"\n1.10.0.137:\x00'
+            b"\xbf\x01\xbf\x12\x9b\x02\n\x0ba-f-G-E-V-C*$aa0b0312-b5cd-4c2c-bbbc-9c4c702162610\xa0\xd1\xfc\xaf\x82.8\xa0\xd1\xfc\xaf\x82.@\x98\xa4\xfe\xaf\x82.J\x03h-eQ3\x98T\xa7b\xfdE@Y}*~\xbe\xf3\x84P\xc0aW\\\x1c\x95\x9b\xc4:@i\x00\x00\x00\xe0\xcf\x12cAq\x00\x00\x00\xe0\xcf\x12cAz\x9e\x01\n\x1a<uid Droid='Eliopoli HQ'/>\x12$\n\x15192.168.1.10:4242:tcp\x12\x0bEliopoli HQ\x1a\x0c\n\x06Yellow\x12\x02HQ*\x02\x08d2F\n\x11LENOVO 20QV0007US\x12\nWinTAK-CIV\x1a\x19Microsoft Windows 10 Home\"\n1.10.0.137:\x00"
         )
 
         buf = takproto.xml2proto(t_xml)
@@ -76,7 +81,7 @@ class TestFunctions(unittest.TestCase):
         """
 
         t_ba = bytearray(
-            b'\xbf\x01\xbf\x12\x9c\x02\n\x0ba-f-G-E-V-C*$aa0b0312-b5cd-4c2c-bbbc-9c4c702162610\xa0\xd1\xfc\xaf\x82.8\xa0\xd1\xfc\xaf\x82.@\x98\xa4\xfe\xaf\x82.J\x03h-eQ3\x98T\xa7b\xfdE@Y}*~\xbe\xf3\x84P\xc0aW\\\x1c\x95\x9b\xc4:@i\x00\x00\x00\xe0\xcf\x12cAq\x00\x00\x00\xe0\xcf\x12cAz\x9f\x01\n\x1b<uid Droid="Eliopoli HQ" />\x12$\n\x15192.168.1.10:4242:tcp\x12\x0bEliopoli HQ\x1a\x0c\n\x06Yellow\x12\x02HQ*\x02\x08d2F\n\x11LENOVO 20QV0007US\x12\nWinTAK-CIV\x1a\x19Microsoft Windows 10 Home"\n1.10.0.137:\x00'
+            b"\xbf\x01\xbf\x12\x9b\x02\n\x0ba-f-G-E-V-C*$aa0b0312-b5cd-4c2c-bbbc-9c4c702162610\xa0\xd1\xfc\xaf\x82.8\xa0\xd1\xfc\xaf\x82.@\x98\xa4\xfe\xaf\x82.J\x03h-eQ3\x98T\xa7b\xfdE@Y}*~\xbe\xf3\x84P\xc0aW\\\x1c\x95\x9b\xc4:@i\x00\x00\x00\xe0\xcf\x12cAq\x00\x00\x00\xe0\xcf\x12cAz\x9e\x01\n\x1a<uid Droid='Eliopoli HQ'/>\x12$\n\x15192.168.1.10:4242:tcp\x12\x0bEliopoli HQ\x1a\x0c\n\x06Yellow\x12\x02HQ*\x02\x08d2F\n\x11LENOVO 20QV0007US\x12\nWinTAK-CIV\x1a\x19Microsoft Windows 10 Home\"\n1.10.0.137:\x00"
         )
 
         buf = takproto.xml2proto(t_xml, takproto.TAKProtoVer.MESH)
@@ -104,7 +109,7 @@ class TestFunctions(unittest.TestCase):
         """
 
         t_ba = bytearray(
-            b'\xbf\x9f\x02\x12\x9c\x02\n\x0ba-f-G-E-V-C*$aa0b0312-b5cd-4c2c-bbbc-9c4c702162610\xa0\xd1\xfc\xaf\x82.8\xa0\xd1\xfc\xaf\x82.@\x98\xa4\xfe\xaf\x82.J\x03h-eQ3\x98T\xa7b\xfdE@Y}*~\xbe\xf3\x84P\xc0aW\\\x1c\x95\x9b\xc4:@i\x00\x00\x00\xe0\xcf\x12cAq\x00\x00\x00\xe0\xcf\x12cAz\x9f\x01\n\x1b<uid Droid="Eliopoli HQ" />\x12$\n\x15192.168.1.10:4242:tcp\x12\x0bEliopoli HQ\x1a\x0c\n\x06Yellow\x12\x02HQ*\x02\x08d2F\n\x11LENOVO 20QV0007US\x12\nWinTAK-CIV\x1a\x19Microsoft Windows 10 Home"\n1.10.0.137:\x00'
+            b"\xbf\x9e\x02\x12\x9b\x02\n\x0ba-f-G-E-V-C*$aa0b0312-b5cd-4c2c-bbbc-9c4c702162610\xa0\xd1\xfc\xaf\x82.8\xa0\xd1\xfc\xaf\x82.@\x98\xa4\xfe\xaf\x82.J\x03h-eQ3\x98T\xa7b\xfdE@Y}*~\xbe\xf3\x84P\xc0aW\\\x1c\x95\x9b\xc4:@i\x00\x00\x00\xe0\xcf\x12cAq\x00\x00\x00\xe0\xcf\x12cAz\x9e\x01\n\x1a<uid Droid='Eliopoli HQ'/>\x12$\n\x15192.168.1.10:4242:tcp\x12\x0bEliopoli HQ\x1a\x0c\n\x06Yellow\x12\x02HQ*\x02\x08d2F\n\x11LENOVO 20QV0007US\x12\nWinTAK-CIV\x1a\x19Microsoft Windows 10 Home\"\n1.10.0.137:\x00"
         )
 
         buf = takproto.xml2proto(t_xml, takproto.TAKProtoVer.STREAM)
@@ -124,3 +129,226 @@ class TestFunctions(unittest.TestCase):
         self.assertEqual(cot_event.uid, "aa0b0312-b5cd-4c2c-bbbc-9c4c70216261")
         self.assertEqual(cot_event.detail.xmlDetail, '<uid Droid="Eliopoli HQ" />')
         self.assertEqual(cot_event.detail.contact.callsign, "Eliopoli HQ")
+
+    def test_parse_proto_buffer_types(self):
+        """Test parsing Mesh & Stream messages from bytes, bytearray & memoryview."""
+        t_mesh = takproto.xml2proto(T_XML, takproto.TAKProtoVer.MESH)
+        t_stream = takproto.xml2proto(T_XML, takproto.TAKProtoVer.STREAM)
+
+        for t_ba in (t_mesh, t_stream):
+            for buf in (bytes(t_ba), bytearray(t_ba), memoryview(bytes(t_ba))):
+                parsed = takproto.parse_proto(buf)
+                self.assertEqual(
+                    parsed.cotEvent.uid, "aa0b0312-b5cd-4c2c-bbbc-9c4c70216261"
+                )
+
+    def test_parse_stream_trailing_data(self):
+        """Test that parse_stream() reads only the first Stream message."""
+        t_stream = bytes(takproto.xml2proto(T_XML, takproto.TAKProtoVer.STREAM))
+        parsed = takproto.parse_stream(t_stream + t_stream[:10])
+        self.assertEqual(parsed.cotEvent.type, "a-f-G-E-V-C")
+
+    def test_encode_stream_batch(self):
+        """Test encoding many TakMessages into one Stream buffer."""
+        t_stream = bytes(takproto.xml2proto(T_XML, takproto.TAKProtoVer.STREAM))
+        msg = takproto.parse_proto(t_stream)
+
+        buf, offsets = takproto.encode_stream_batch([msg] * 3)
+        self.assertEqual(bytes(buf), t_stream * 3)
+        self.assertEqual(offsets, [0, len(t_stream), 2 * len(t_stream), len(buf)])
+
+        decoder = takproto.StreamDecoder()
+        self.assertEqual(len(decoder.feed(buf)), 3)
+
+    def test_encode_mesh_batch(self):
+        """Test encoding many TakMessages into one Mesh buffer with offsets."""
+        t_mesh = bytes(takproto.xml2proto(T_XML, takproto.TAKProtoVer.MESH))
+        msg = takproto.parse_proto(t_mesh)
+
+        buf, offsets = takproto.encode_mesh_batch([msg, msg])
+        view = memoryview(buf)
+        for start, end in zip(offsets, offsets[1:]):
+            self.assertEqual(bytes(view[start:end]), t_mesh)
+            self.assertEqual(takproto.parse_proto(view[start:end]), msg)
+
+    def test_encode_batch_reuse(self):
+        """Test that a reused bytearray is resized to fit the new frames."""
+        t_mesh = bytes(takproto.xml2proto(T_XML, takproto.TAKProtoVer.MESH))
+        msg = takproto.parse_proto(t_mesh)
+
+        out = bytearray(b"\x00" * 4096)
+        buf, offsets = takproto.encode_mesh_batch([msg], out)
+        self.assertIs(buf, out)
+        self.assertEqual(bytes(out), t_mesh)
+
+    def test_encode_batch_fixed_buffer(self):
+        """Test encoding into a caller-supplied fixed-size buffer."""
+        t_stream = bytes(takproto.xml2proto(T_XML, takproto.TAKProtoVer.STREAM))
+        msg = takproto.parse_proto(t_stream)
+
+        out = memoryview(bytearray(len(t_stream) * 2 + 10))
+        _, offsets = takproto.encode_stream_batch([msg, msg], out)
+        self.assertEqual(bytes(out[: offsets[-1]]), t_stream * 2)
+
+        with self.assertRaises(ValueError):
+            takproto.encode_stream_batch([msg] * 3, out)
+
+    def test_format_time_variants(self):
+        """Test parsing CoT timestamps with varying precision and zones."""
+        t_ts = 1581185444000
+        self.assertEqual(takproto.format_time("2020-02-08T18:10:44Z"), t_ts)
+        self.assertEqual(takproto.format_time("2020-02-08T18:10:44.000Z"), t_ts)
+        self.assertEqual(takproto.format_time("2020-02-08T18:10:44.5Z"), t_ts + 500)
+        self.assertEqual(
+            takproto.format_time("2020-02-08T18:10:44.123456Z"), t_ts + 123
+        )
+        self.assertEqual(takproto.format_time("2020-02-08T13:10:44.000-05:00"), t_ts)
+        self.assertEqual(takproto.format_time("2020-02-08T19:10:44.000+0100"), t_ts)
+
+    def test_format_time_invalid(self):
+        """Test that malformed CoT timestamps raise ValueError."""
+        for t_time in (
+            "2020-02-08",
+            "2020-02-30T18:10:44Z",
+            "2021-02-29T18:10:44Z",
+            "2020-02-08T24:10:44Z",
+            "2020-02-08T18:10:44.000Q",
+        ):
+            with self.assertRaises(ValueError):
+                takproto.format_time(t_time)
+
+    def test_ms2iso(self):
+        """Test formatting milliseconds since epoch as a CoT timestamp."""
+        self.assertEqual(takproto.ms2iso(1581185444000), "2020-02-08T18:10:44.000Z")
+        self.assertEqual(takproto.ms2iso(1581185444123), "2020-02-08T18:10:44.123Z")
+        for t_ts in (0, 951782400000, 1581185444999, 4102444800001):
+            self.assertEqual(takproto.format_time(takproto.ms2iso(t_ts)), t_ts)
+
+    def test_proto2xml_round_trip(self):
+        """Test converting a TakMessage to CoT XML and back."""
+        msg = takproto.xml2msg(T_XML)
+        xml = takproto.proto2xml(msg)
+        self.assertTrue(xml.startswith("<?xml "))
+        self.assertEqual(takproto.xml2msg(xml), msg)
+        self.assertIn("<uid Droid='Eliopoli HQ'/>", xml)
+        self.assertIn("time='2020-02-08T18:10:44.000Z'", xml)
+
+    def test_proto2xml_xml_detail_precedence(self):
+        """Test that elements in xmlDetail win over strongly typed messages."""
+        msg = takproto.xml2msg(T_XML)
+        msg.cotEvent.detail.xmlDetail = "<contact callsign='Override'/>"
+        xml = takproto.proto2xml(msg, declaration=False)
+        self.assertTrue(xml.startswith("<event "))
+        self.assertIn("<contact callsign='Override'/>", xml)
+        self.assertNotIn("Eliopoli HQ'", xml.split("<detail>")[1].split("<__group")[0])
+
+    def test_proto2xml_escaping(self):
+        """Test that attribute values are XML escaped."""
+        msg = takproto.xml2msg(T_XML)
+        msg.cotEvent.detail.contact.callsign = "<A&B's>"
+        xml = takproto.proto2xml(msg)
+        self.assertIn("callsign='&lt;A&amp;B&apos;s&gt;'", xml)
+        self.assertEqual(
+            takproto.xml2msg(xml).cotEvent.detail.contact.callsign, "<A&B's>"
+        )
+
+    def test_xml2msg_detail_fallback(self):
+        """Test that duplicate or invalid typed elements are left in xmlDetail."""
+        xml = T_XML.replace("<status battery='100'/>", "<status battery='full'/>")
+        detail = takproto.xml2msg(xml).cotEvent.detail
+        self.assertFalse(detail.HasField("status"))
+        self.assertEqual(
+            detail.xmlDetail, "<uid Droid='Eliopoli HQ'/><status battery='full'/>"
+        )
+
+        xml = T_XML.replace("<__group", "<contact callsign='Two'/><__group")
+        detail = takproto.xml2msg(xml).cotEvent.detail
+        self.assertFalse(detail.HasField("contact"))
+        self.assertTrue(detail.HasField("group"))
+
+    def test_xml2msg_xml_detail_unknown_elements(self):
+        """Test that every unknown detail element is kept, copied from the source."""
+        xml = T_XML.replace(
+            "<__group",
+            '<remarks source="x">a &amp; b</remarks><link uid="1" /><__group',
+        )
+        detail = takproto.xml2msg(xml).cotEvent.detail
+        self.assertEqual(
+            detail.xmlDetail,
+            "<uid Droid='Eliopoli HQ'/>"
+            '<remarks source="x">a &amp; b</remarks><link uid="1" />',
+        )
+        self.assertTrue(detail.HasField("group"))
+
+    def test_element2msg_xml_detail_without_source(self):
+        """Test that unknown detail elements are serialized when there is no source."""
+        xml = T_XML.replace("<__group", "<remarks>a &amp; b</remarks><__group")
+        detail = takproto.element2msg(ET.fromstring(xml)).cotEvent.detail
+        self.assertEqual(
+            detail.xmlDetail,
+            '<uid Droid="Eliopoli HQ" /><remarks>a &amp; b</remarks>',
+        )
+
+    def test_register_detail(self):
+        """Test registering a converter for a site-specific detail element."""
+
+        def convert_remarks(elem, contact):
+            contact.callsign = elem.text.upper()
+
+        xml = T_XML.replace("<contact", "<remarks>alpha</remarks><x")
+        takproto.register_detail(
+            "remarks",
+            "contact",
+            convert_remarks,
+            lambda contact: [("callsign", contact.callsign)],
+        )
+        try:
+            detail = takproto.xml2msg(xml).cotEvent.detail
+        finally:
+            takproto.unregister_detail("remarks")
+        self.assertEqual(detail.contact.callsign, "ALPHA")
+        self.assertNotIn("remarks", detail.xmlDetail)
+
+        takproto.register_detail("__group", "group", {"name": str})
+        try:
+            msg = takproto.xml2msg(T_XML)
+        finally:
+            takproto.register_detail("__group", "group", {"name": str, "role": str})
+        self.assertEqual(msg.cotEvent.detail.group.role, "")
+        self.assertIn("<__group name='Yellow'/>", takproto.proto2xml(msg))
+
+    def test_register_detail_invalid(self):
+        """Test that converters are checked against detail.proto."""
+        with self.assertRaises(ValueError):
+            takproto.register_detail("contact", "bogus", {"callsign": str})
+        with self.assertRaises(ValueError):
+            takproto.register_detail("contact", "xmlDetail", {"callsign": str})
+        with self.assertRaises(ValueError):
+            takproto.register_detail("contact", "contact", {"bogus": str})
+        with self.assertRaises(ValueError):
+            takproto.register_detail("track", "track", lambda elem, track: None)
+        self.assertEqual(
+            takproto.xml2msg(T_XML).cotEvent.detail.contact.callsign, "Eliopoli HQ"
+        )
+
+    def test_register_detail_render(self):
+        """Test that proto2xml() renders custom converters with their render."""
+
+        def convert_track(elem, track):
+            track.speed = float(elem.get("speed")) / 3.6
+
+        takproto.register_detail(
+            "track",
+            "track",
+            convert_track,
+            lambda track: [("speed", track.speed * 3.6), ("course", track.course)],
+        )
+        try:
+            msg = takproto.xml2msg(T_XML.replace("speed='0.00000000'", "speed='36'"))
+            xml = takproto.proto2xml(msg)
+        finally:
+            takproto.register_detail(
+                "track", "track", {"speed": float, "course": float}
+            )
+        self.assertAlmostEqual(msg.cotEvent.detail.track.speed, 10.0)
+        self.assertIn("<track speed='36.0' course='0.0'/>", xml)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author:: Greg Albrecht <gba@snstac.com>
+# Copyright:: Copyright 2023 Sensors & Signals LLC
+# License:: Apache License, Version 2.0
+#
+
+"""TAKProto Lazy Import Tests."""
+
+import importlib
+import subprocess
+import sys
+import unittest
+
+import takproto
+
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+class TestLazyImport(unittest.TestCase):
+    def test_import_loads_nothing_heavy(self):
+        """Test that importing takproto does not load protobuf, asyncio or NumPy."""
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, takproto; "
+                "print(' '.join(m for m in ('google.protobuf', 'asyncio', 'numpy', "
+                "'xml.etree.ElementTree', 'takproto.functions') if m in sys.modules))",
+            ],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        self.assertEqual(result.stdout.strip(), "")
+
+    def test_public_names(self):
+        """Test that every public name resolves to its submodule's object."""
+        for name in takproto.__all__:
+            self.assertTrue(hasattr(takproto, name), name)
+        self.assertIs(takproto.parse_proto, takproto.functions.parse_proto)
+        self.assertIs(takproto.EventRecord, takproto.classes.EventRecord)
+        self.assertIn("scan_event", dir(takproto))
+        with self.assertRaises(AttributeError):
+            takproto.no_such_name  # pylint: disable=pointless-statement
+
+    def test_combined_descriptors(self):
+        """Test that combined_pb2 matches & shares classes with the *_pb2 modules."""
+        combined = takproto.proto.combined_pb2
+        for module, serialized in combined._SERIALIZED_FILES:
+            generated = importlib.import_module(f"takproto.proto.{module}")
+            self.assertEqual(generated.DESCRIPTOR.serialized_pb, serialized)
+        for name in takproto.proto.MESSAGES:
+            generated = getattr(takproto.proto, f"{name.lower()}_pb2")
+            self.assertIs(getattr(takproto.proto, name), getattr(generated, name))
+
+    def test_backend(self):
+        """Test reporting the protobuf backend."""
+        self.assertIn(takproto.backend(), ("upb", "cpp", "python"))
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author:: Greg Albrecht <gba@snstac.com>
+# Copyright:: Copyright 2023 Sensors & Signals LLC
+# License:: Apache License, Version 2.0
+#
+
+"""TAKProto Capture Index Tests."""
+
+import os
+import tempfile
+import unittest
+
+import takproto
+
+from takproto.capture import CaptureIndex, CaptureWriter, build_index
+
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+EPOCH_MS = 1_581_185_444_000
+# One UID is not ASCII.
+UIDS = tuple(f"uid-{i}" for i in range(6)) + ("uid-6-\u00fc",)
+
+
+def _frame(uid, cot_type, send_time):
+    return takproto.encode_cot_event(
+        uid, cot_type, "m-g", send_time, send_time, send_time + 60_000, 1.0, 2.0
+    )
+
+
+def _events(count):
+    """Return (uid, type, sendTime) of events from 7 UIDs, not in time order."""
+    return [
+        (
+            UIDS[i % 7],
+            ("a-f-G-U-C", "a-h-G", "b-t-f")[i % 3],
+            EPOCH_MS + (i * 7919) % count * 1000,
+        )
+        for i in range(count)
+    ]
+
+
+class TestCaptureIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.tmp.name, "test.takcap")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, events, **kwargs):
+        """Write the frames of events, returning their offsets."""
+        with CaptureWriter(self.path, **kwargs) as writer:
+            return [writer.write(_frame(*event), "peer") for event in events]
+
+    def assertQueries(self, events, offsets):  # pylint: disable=invalid-name
+        """Check CaptureIndex queries against filtering events directly."""
+        entries = sorted(
+            (send_time, offset, uid, cot_type)
+            for (uid, cot_type, send_time), offset in zip(events, offsets)
+        )
+        queries = [
+            {},
+            {"uid": "uid-3"},
+            {"uid": UIDS[6]},
+            {"type": "a-f"},
+            {"type": "a-"},
+            {"start": EPOCH_MS + 100_000, "end": EPOCH_MS + 160_000},
+            {"uid": "uid-5", "type": "b", "start": EPOCH_MS + 250_000},
+            {"end": EPOCH_MS + 40_000},
+            {"uid": "missing"},
+            {"type": "u-d"},
+        ]
+        with CaptureIndex(self.path) as index:
+            self.assertEqual(len(index), len(events))
+            for query in queries:
+                expected = [
+                    (send_time, offset)
+                    for send_time, offset, uid, cot_type in entries
+                    if query.get("uid", uid) == uid
+                    and cot_type.startswith(query.get("type", ""))
+                    and query.get("start", send_time) <= send_time
+                    and send_time < query.get("end", send_time + 1)
+                ]
+                self.assertEqual(list(index.entries(**query)), expected, query)
+
+            record, msg = next(index.messages(uid="uid-1", type="a-h"))
+            self.assertEqual(msg.cotEvent.uid, "uid-1")
+            self.assertEqual(msg.cotEvent.type, "a-h-G")
+            self.assertEqual(record.peer, "peer")
+            del record
+
+    def test_index_while_writing(self):
+        """Test an index written in blocks while capturing, across reopens."""
+        events = _events(500)
+        offsets = self.write(events[:100])
+        # Reopening with an index first indexes the records written without.
+        offsets += self.write(events[100:300], index=True, buffer_size=2000)
+        offsets += self.write(events[300:], index=True, buffer_size=2000)
+        self.assertQueries(events, offsets)
+
+    def test_build_index(self):
+        """Test building an index in one pass, then updating it."""
+        events = _events(300)
+        offsets = self.write(events[:200])
+        self.assertEqual(build_index(self.path, block_size=64), 200)
+        self.assertQueries(events[:200], offsets)
+
+        offsets += self.write(events[200:])
+        # The records appended since are scanned when opening the index.
+        self.assertQueries(events, offsets)
+        self.assertEqual(build_index(self.path, block_size=64), 100)
+        self.assertEqual(build_index(self.path), 0)
+        self.assertQueries(events, offsets)
+
+    def test_torn_index(self):
+        """Test that a block cut short by a crash is dropped and rebuilt."""
+        events = _events(100)
+        offsets = self.write(events)
+        build_index(self.path, block_size=30)
+        index_path = self.path + takproto.constants.INDEX_SUFFIX
+        with open(index_path, "r+b") as index:
+            index.truncate(os.path.getsize(index_path) - 10)
+        self.assertQueries(events, offsets)
+        self.assertEqual(build_index(self.path), 10)
+        self.assertQueries(events, offsets)
+
+    def test_index_mismatch(self):
+        """Test that an index of another, longer capture is rejected & rebuilt."""
+        self.write(_events(50))
+        build_index(self.path)
+        os.remove(self.path)
+        events = _events(10)
+        offsets = self.write(events)
+        with self.assertRaises(ValueError):
+            CaptureIndex(self.path)
+        self.assertEqual(build_index(self.path), 10)
+        self.assertQueries(events, offsets)
+
+    def test_no_index(self):
+        """Test that a capture without an index cannot be queried."""
+        self.write(_events(5))
+        with self.assertRaises(FileNotFoundError):
+            CaptureIndex(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
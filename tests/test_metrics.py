@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author:: Greg Albrecht <gba@snstac.com>
+# Copyright:: Copyright 2023 Sensors & Signals LLC
+# License:: Apache License, Version 2.0
+#
+
+"""TAKProto Metrics Tests."""
+
+import unittest
+import urllib.request
+import xml.etree.ElementTree as ET
+
+import takproto
+
+from takproto import metrics
+
+from samples import event_xml
+
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+T_XML = event_xml("metrics-1")
+
+
+class TestMetrics(unittest.TestCase):
+    def tearDown(self):
+        metrics.disable()
+
+    def test_disabled(self):
+        """Test that nothing is collected, or timed, until enable()."""
+        takproto.xml2proto(T_XML)
+        self.assertIsNone(metrics.ACTIVE)
+        self.assertIs(takproto.functions._convert_time, takproto.format_time)
+        self.assertEqual(metrics.snapshot()["messages"], {})
+
+    def test_counts_and_stages(self):
+        """Test counting messages & bytes by TAKProtoVer and timing each stage."""
+        collector = metrics.enable()
+        stream = takproto.xml2proto(T_XML, takproto.TAKProtoVer.STREAM)
+        mesh = takproto.msg2proto(takproto.parse_proto(stream))
+        takproto.parse_proto(mesh)
+
+        snapshot = collector.snapshot()
+        self.assertEqual(snapshot["messages"]["encode"], {"STREAM": 1, "MESH": 1})
+        self.assertEqual(snapshot["messages"]["decode"], {"STREAM": 1, "MESH": 1})
+        self.assertEqual(snapshot["bytes"]["encode"]["STREAM"], len(stream))
+        self.assertEqual(snapshot["bytes"]["decode"]["MESH"], len(mesh))
+        self.assertEqual(snapshot["stages"]["time"]["count"], 3)
+        for stage in ("xml_parse", "convert", "detail", "serialize", "frame"):
+            self.assertGreater(snapshot["stages"][stage]["seconds"], 0, stage)
+        self.assertEqual(snapshot["stages"]["deserialize"]["count"], 2)
+
+        sizes = snapshot["sizes"]["encode"]
+        self.assertEqual(sizes["count"], 2)
+        self.assertEqual(sizes["sum"], len(stream) + len(mesh))
+        self.assertEqual(sizes["buckets"][128], 0)
+        self.assertEqual(sizes["buckets"]["+Inf"], 2)
+
+        self.assertIs(metrics.disable(), collector)
+        self.assertIs(takproto.functions._convert_time, takproto.format_time)
+
+    def test_instrument_while_enabled(self):
+        """Test that a name instrumented while enabled is timed straight away."""
+
+        def convert():
+            return 1
+
+        namespace = {"convert": convert}
+        collector = metrics.enable()
+        metrics.instrument(namespace, "convert", "convert")
+        try:
+            self.assertEqual(namespace["convert"](), 1)
+            self.assertEqual(collector.snapshot()["stages"]["convert"]["count"], 1)
+            metrics.disable()
+            self.assertIs(namespace["convert"], convert)
+        finally:
+            metrics._hooks.remove((namespace, "convert", "convert"))
+
+    def test_errors(self):
+        """Test counting failed conversions and frames that are not TAK Protocol."""
+        metrics.enable()
+        with self.assertRaises(ET.ParseError):
+            takproto.xml2proto("<event", takproto.TAKProtoVer.STREAM)
+        self.assertIsNone(takproto.parse_proto(b"<event/>"))
+        self.assertEqual(
+            metrics.snapshot()["errors"],
+            {"xml2proto": {"STREAM": 1}, "parse_proto": {"UNKNOWN": 1}},
+        )
+
+    def test_prometheus(self):
+        """Test the Prometheus text format, served over HTTP."""
+        metrics.enable(metrics.Metrics(size_buckets=(1024, 256)))
+        takproto.xml2proto(T_XML)
+        text = metrics.prometheus_text()
+        self.assertIn(
+            'takproto_messages_total{direction="encode",protover="MESH"} 1\n', text
+        )
+        self.assertIn("# TYPE takproto_message_bytes histogram\n", text)
+        self.assertIn(
+            'takproto_message_bytes_bucket{direction="encode",le="+Inf"} 1\n', text
+        )
+        self.assertIn('takproto_stage_seconds_count{stage="time"} 3\n', text)
+
+        server = metrics.serve(0)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as response:
+                self.assertEqual(response.read().decode(), metrics.prometheus_text())
+        finally:
+            server.shutdown()
+            server.server_close()
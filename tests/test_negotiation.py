@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author:: Greg Albrecht <gba@snstac.com>
+# Copyright:: Copyright 2023 Sensors & Signals LLC
+# License:: Apache License, Version 2.0
+#
+
+"""TAKProto Protocol Negotiation Tests."""
+
+import unittest
+
+import takproto
+
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+def _wire(msg):
+    """Send msg over a Version 0 connection, as CoT XML."""
+    return takproto.xml2msg(takproto.proto2xml(msg))
+
+
+class TestStreamNegotiator(unittest.TestCase):
+    def test_negotiate(self):
+        """Test a client & server switching to TAK Protocol Version 1."""
+        server = takproto.StreamNegotiator(server=True)
+        client = takproto.StreamNegotiator()
+        self.assertEqual(client.protover, takproto.TAKProtoVer.XML)
+
+        request = client.receive(_wire(server.offer(now=0)), now=0)
+        self.assertEqual(request.cotEvent.type, "t-x-takp-q")
+        self.assertEqual(request.cotEvent.uid, server.uid)
+        self.assertFalse(client.may_send)
+        self.assertFalse(client.expired(now=59999))
+        self.assertTrue(client.expired(now=60000))
+
+        response = server.receive(_wire(request))
+        self.assertEqual(response.cotEvent.type, "t-x-takp-r")
+        self.assertEqual(server.protover, takproto.TAKProtoVer.STREAM)
+
+        self.assertIsNone(client.receive(_wire(response)))
+        self.assertTrue(client.may_send)
+        self.assertEqual(client.state, takproto.NegotiationState.NEGOTIATED)
+        self.assertEqual(client.protover, takproto.TAKProtoVer.STREAM)
+        self.assertEqual(client.version, 1)
+
+    def test_negotiate_unsupported(self):
+        """Test that a client stays on XML when no version is in common."""
+        server = takproto.StreamNegotiator(versions=(2, 3), server=True)
+        client = takproto.StreamNegotiator()
+        self.assertIsNone(client.receive(_wire(server.offer())))
+        self.assertEqual(client.state, takproto.NegotiationState.OFFERED)
+        self.assertEqual(client.offered, {2, 3})
+        self.assertEqual(client.protover, takproto.TAKProtoVer.XML)
+        with self.assertRaises(ValueError):
+            server.offer()
+
+    def test_negotiate_denied(self):
+        """Test that a denied request returns the client to XML."""
+        server = takproto.StreamNegotiator(server=True)
+        client = takproto.StreamNegotiator()
+        request = client.receive(_wire(server.offer()))
+        request.cotEvent.detail.xmlDetail = (
+            "<TakControl><TakRequest version='5'/></TakControl>"
+        )
+        response = server.receive(_wire(request))
+        self.assertIn('status="false"', response.cotEvent.detail.xmlDetail)
+        self.assertEqual(server.state, takproto.NegotiationState.OFFERED)
+
+        client.receive(_wire(response))
+        self.assertEqual(client.state, takproto.NegotiationState.OFFERED)
+        self.assertEqual(client.protover, takproto.TAKProtoVer.XML)
+        self.assertIsNotNone(client.request())
+
+
+def _sa(uid, stale=600000, control=None):
+    msg = takproto.proto.TakMessage()
+    msg.cotEvent.uid = uid
+    msg.cotEvent.staleTime = stale
+    if control is not None:
+        msg.takControl.minProtoVersion, msg.takControl.maxProtoVersion = control
+    return msg
+
+
+class TestMeshVersions(unittest.TestCase):
+    def test_version(self):
+        """Test choosing the version supported by every contact."""
+        mesh = takproto.MeshVersions()
+        self.assertEqual(mesh.version(now=0), 1)
+
+        mesh.update(_sa("a", control=(1, 1)), 1, now=0)
+        self.assertEqual(mesh.versions("a", now=0), (1, 1))
+        self.assertEqual(mesh.protover(now=0), takproto.TAKProtoVer.MESH)
+
+        mesh.update(_sa("b"), 0, now=0)
+        self.assertEqual(mesh.version(now=0), 0)
+        self.assertEqual(mesh.protover(now=0), takproto.TAKProtoVer.XML)
+
+        mesh.update(_sa("b", control=(0, 0)), 1, now=1000)
+        self.assertEqual(mesh.versions("b", now=1000), (1, 1))
+        self.assertEqual(mesh.version(now=1000), 1)
+
+    def test_xml_geochat(self):
+        """Test that an XML GeoChat sender keeps the mesh on XML."""
+        geochat = takproto.xml2msg(
+            "<event version='2.0' uid='GeoChat.ANDROID-1.All Chat Rooms.1' "
+            "type='b-t-f' time='2020-02-08T18:10:44.000Z' "
+            "start='2020-02-08T18:10:44.000Z' stale='2020-02-08T18:11:11.000Z' "
+            "how='h-g-i-g-o'><point lat='0' lon='0' hae='0' ce='0' le='0'/>"
+            "<detail><__chat senderCallsign='ALPHA'>"
+            "<chatgrp uid0='ANDROID-1' uid1='All Chat Rooms'/></__chat>"
+            "<link uid='ANDROID-1' type='a-f-G-U-C' relation='p-p'/>"
+            "</detail></event>"
+        )
+        self.assertTrue(geochat.HasField("takControl"))
+        now = geochat.cotEvent.sendTime
+        mesh = takproto.MeshVersions()
+        mesh.update(geochat, 0, now=now)
+        self.assertEqual(mesh.versions("ANDROID-1", now=now), (0, 0))
+        self.assertEqual(mesh.version(now=now), 0)
+        self.assertEqual(mesh.protover(now=now), takproto.TAKProtoVer.XML)
+
+    def test_control_timeout(self):
+        """Test reverting to the version of the last message without TakControl."""
+        mesh = takproto.MeshVersions()
+        mesh.update(_sa("a", control=(1, 2)), 1, now=0)
+        mesh.update(_sa("a"), 0, now=1000)
+        self.assertEqual(mesh.versions("a", now=119999), (1, 2))
+        self.assertEqual(mesh.versions("a", now=120000), (0, 0))
+        self.assertEqual(mesh.version(now=120000), 0)
+
+    def test_stale(self):
+        """Test forgetting contacts once their last event is stale."""
+        mesh = takproto.MeshVersions()
+        mesh.update(_sa("a", stale=5000), 0, now=0)
+        self.assertEqual(mesh.version(now=4999), 0)
+        self.assertEqual(mesh.version(now=5000), 1)
+        self.assertEqual(len(mesh), 0)
+
+    def test_control(self):
+        """Test the TakControl announcement."""
+        msg = takproto.MeshVersions().control("self-uid")
+        self.assertEqual(msg.takControl.contactUid, "self-uid")
+        self.assertEqual(msg.takControl.minProtoVersion, 1)
+        self.assertEqual(msg.takControl.maxProtoVersion, 1)
+        self.assertFalse(msg.HasField("cotEvent"))
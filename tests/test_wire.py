@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2023 Sensors & Signals LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Author:: Greg Albrecht <gba@snstac.com>
+# Copyright:: Copyright 2023 Sensors & Signals LLC
+# License:: Apache License, Version 2.0
+#
+
+"""TAKProto Wire Format Tests."""
+
+import random
+import unittest
+
+import takproto
+
+from takproto.constants import DEFAULT_SCAN_FIELDS
+from takproto.wire import _scan_event
+
+from samples import T_XML
+
+
+__author__ = "Greg Albrecht <gba@snstac.com>"
+__copyright__ = "Copyright 2023 Sensors & Signals LLC"
+__license__ = "Apache License, Version 2.0"
+
+
+def _scan(frame, fields=DEFAULT_SCAN_FIELDS):
+    """Read fields from the wire, whichever protobuf backend is in use."""
+    return _scan_event(frame, tuple(fields))
+
+
+class TestScanEvent(unittest.TestCase):
+    def test_scan_event(self):
+        """Test scanning the default routing fields from Mesh & Stream frames."""
+        for protover in (takproto.TAKProtoVer.MESH, takproto.TAKProtoVer.STREAM):
+            frame = takproto.xml2proto(T_XML, protover)
+            for scan in (takproto.scan_event, _scan):
+                self.assertEqual(
+                    scan(frame),
+                    {
+                        "uid": "aa0b0312-b5cd-4c2c-bbbc-9c4c70216261",
+                        "type": "a-f-G-E-V-C",
+                        "lat": 43.97957317,
+                        "lon": -66.07737696,
+                        "staleTime": 1581185471000,
+                    },
+                )
+
+    def test_scan_event_all_scalars(self):
+        """Test that every scalar field matches a full parse."""
+        msg = takproto.xml2msg(T_XML)
+        msg.cotEvent.access = "Undefined"
+        msg.cotEvent.opex = "e-exercise"
+        msg.takControl.contactUid = "sender"
+        frame = bytes(takproto.msg2proto(msg))
+        cot_event = takproto.parse_proto(frame).cotEvent
+        fields = [f.name for f in cot_event.DESCRIPTOR.fields if f.name != "detail"]
+
+        for scan in (takproto.scan_event, _scan):
+            scanned = scan(frame, fields)
+            self.assertEqual(
+                scanned, {name: getattr(cot_event, name) for name in fields}
+            )
+            self.assertEqual(scanned["qos"], "")
+
+    def test_scan_event_fallback(self):
+        """Test that requesting detail falls back to a full parse."""
+        frame = takproto.xml2proto(T_XML)
+        scanned = takproto.scan_event(frame, ["uid", "detail"])
+        self.assertEqual(scanned["detail"].contact.callsign, "Eliopoli HQ")
+
+    def test_scan_event_truncated(self):
+        """Test that truncated frames raise ValueError."""
+        frame = bytes(takproto.xml2proto(T_XML, takproto.TAKProtoVer.STREAM))
+        for scan in (takproto.scan_event, _scan):
+            with self.assertRaises(ValueError):
+                scan(frame[:50])
+            with self.assertRaises(ValueError):
+                scan(bytes(takproto.xml2proto(T_XML))[:60])
+            with self.assertRaises(ValueError):
+                scan(b"<event/>")
+
+
+# encode_cot_event() arguments for the fields of each Detail sub-message.
+DETAIL_ARGS = {
+    "contact": {"endpoint": "endpoint", "callsign": "callsign"},
+    "group": {"group_name": "name", "group_role": "role"},
+    "precisionLocation": {"geopointsrc": "geopointsrc", "altsrc": "altsrc"},
+    "status": {"battery": "battery"},
+    "takv": {
+        "device": "device",
+        "platform": "platform",
+        "os": "os",
+        "version": "version",
+    },
+    "track": {"speed": "speed", "course": "course"},
+}
+
+
+def _random_event(rng):
+    """Return random encode_cot_event() arguments & the equivalent TakMessage."""
+
+    def text():
+        return rng.choice(("", "a", "ANDROID-0123456789abcdef", "ü" * 70))
+
+    def number():
+        return rng.choice((0.0, -0.0, 1.5, -66.07737696, 9999999.0, 1e-300))
+
+    args = [text(), text(), text()]
+    args += [rng.choice((0, 1, 1581185444000, 2**40, 2**63)) for _ in range(3)]
+    args += [number() for _ in range(5)]
+    kwargs = {}
+    for name in ("access", "qos", "opex", "xml_detail"):
+        if rng.random() < 0.3:
+            kwargs[name] = text()
+    if rng.random() < 0.2:
+        kwargs["contact_uid"] = text()
+
+    msg = takproto.proto.TakMessage()
+    cot_event = msg.cotEvent
+    for name, value in zip(
+        ("uid", "type", "how", "sendTime", "startTime", "staleTime"), args
+    ):
+        setattr(cot_event, name, value)
+    for name, value in zip(("lat", "lon", "hae", "ce", "le"), args[6:]):
+        setattr(cot_event, name, value)
+    for name in ("access", "qos", "opex"):
+        if name in kwargs:
+            setattr(cot_event, name, kwargs[name])
+    if "xml_detail" in kwargs:
+        cot_event.detail.xmlDetail = kwargs["xml_detail"]
+    if "contact_uid" in kwargs:
+        msg.takControl.contactUid = kwargs["contact_uid"]
+
+    for field, names in DETAIL_ARGS.items():
+        for arg, name in names.items():
+            if rng.random() < 0.3:
+                if arg == "battery":
+                    value = rng.choice((0, 5, 100, 2**32 - 1))
+                elif arg in ("speed", "course"):
+                    value = number()
+                else:
+                    value = text()
+                kwargs[arg] = value
+                setattr(getattr(cot_event.detail, field), name, value)
+    return args, kwargs, msg
+
+
+class TestEncodeCotEvent(unittest.TestCase):
+    def test_encode_cot_event(self):
+        """Test that encode_cot_event() matches the generated classes byte for byte."""
+        rng = random.Random(0)
+        for _ in range(2000):
+            args, kwargs, msg = _random_event(rng)
+            for protover in (takproto.TAKProtoVer.MESH, takproto.TAKProtoVer.STREAM):
+                frame = takproto.encode_cot_event(*args, protover=protover, **kwargs)
+                self.assertEqual(frame, takproto.msg2proto(msg, protover), kwargs)
+
+    def test_encode_cot_event_out(self):
+        """Test appending frames to one buffer."""
+        out = bytearray()
+        args = ("uid", "a-f-G", "m-g", 1581185444000, 1581185444000, 1581185564000)
+        takproto.encode_cot_event(*args, out=out)
+        end = len(out)
+        self.assertIs(
+            takproto.encode_cot_event(
+                *args, protover=takproto.TAKProtoVer.STREAM, out=out
+            ),
+            out,
+        )
+        self.assertEqual(takproto.parse_proto(out[:end]).cotEvent.uid, "uid")
+        self.assertEqual(takproto.parse_proto(out[end:]).cotEvent.how, "m-g")
+        with self.assertRaises(ValueError):
+            takproto.encode_cot_event(*args, protover=takproto.TAKProtoVer.XML)